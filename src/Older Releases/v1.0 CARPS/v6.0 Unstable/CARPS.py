@@ -11,6 +11,7 @@ The script will generate a text file with commands to set up the project.
 Features:
 - Creates a new .NET project and solution file.
 - Interactive prompts for project name input.
+- A GUI job queue that scaffolds several projects at once, with per-job status and cancel.
 - Generates a text file with necessary commands for project setup.
 
 Created by: John Akujobi
@@ -25,10 +26,9 @@ import os
 import subprocess
 import re
 import argparse
-import tkinter as tk
-import time
-import threading
-from tkinter import messagebox
+
+# tkinter, threading, queue, time and concurrent.futures are only needed by the GUI; they are
+# imported there so the command-line path starts without them.
 
 greeting_text = """
 C# Automated Rapid Project Setup (CARPS)
@@ -69,79 +69,354 @@ def execute_single_command(single_command):
         print(f"Successfully executed command: {single_command}")
         print(f"Output: {stdout.decode()}")
 
-def console_execute_dotnet_commands(project_name):
-    current_directory = os.getcwd()
-    project_directory_path = os.path.join(current_directory, project_name)
-
-    os.makedirs(project_name, exist_ok=True)
-    os.makedirs(project_directory_path, exist_ok=True)
-
-    dotnet_commands = [
+def get_dotnet_commands(project_name, project_directory_path, project_type='console'):
+    csproj_path = os.path.join(project_directory_path, project_name, f"{project_name}.csproj")
+    return [
         f'dotnet new sln -n {project_name} -o "{project_directory_path}"',
-        f'dotnet new console -o "{os.path.join(project_directory_path, project_name)}"',
-        f'dotnet sln "{os.path.join(project_directory_path, f"{project_name}.sln")}" add "{os.path.join(project_directory_path, project_name, f"{project_name}.csproj")}"',
-        f'dotnet build "{os.path.join(project_directory_path, project_name, f"{project_name}.csproj")}"',
-        f'dotnet run --project "{os.path.join(project_directory_path, project_name, f"{project_name}.csproj")}"'
+        f'dotnet new {project_type} -o "{os.path.join(project_directory_path, project_name)}"',
+        f'dotnet sln "{os.path.join(project_directory_path, f"{project_name}.sln")}" add "{csproj_path}"',
+        f'dotnet build "{csproj_path}"',
+        f'dotnet run --project "{csproj_path}"'
     ]
 
-    for single_command in dotnet_commands:
-        execute_single_command(single_command)
-
-def execute_dotnet_commands(project_name, loading_label, run_button, status_bar):
+def console_execute_dotnet_commands(project_name):
     current_directory = os.getcwd()
     project_directory_path = os.path.join(current_directory, project_name)
 
-    os.makedirs(project_name, exist_ok=True)
     os.makedirs(project_directory_path, exist_ok=True)
 
-    dotnet_commands = [
-        f'dotnet new sln -n {project_name} -o "{project_directory_path}"',
-        f'dotnet new console -o "{os.path.join(project_directory_path, project_name)}"',
-        f'dotnet sln "{os.path.join(project_directory_path, f"{project_name}.sln")}" add "{os.path.join(project_directory_path, project_name, f"{project_name}.csproj")}"',
-        f'dotnet build "{os.path.join(project_directory_path, project_name, f"{project_name}.csproj")}"',
-        f'dotnet run --project "{os.path.join(project_directory_path, project_name, f"{project_name}.csproj")}"'
-    ]
-
-    for single_command in dotnet_commands:
+    for single_command in get_dotnet_commands(project_name, project_directory_path):
         execute_single_command(single_command)
 
-    time.sleep(5)  # Simulate a long-running operation
-    stop_loading_animation(loading_label)
-    run_button.pack(padx=10, pady=10)  # Show the button again
-    status_bar.config(text="Done! Check the directory for your project")
-    root.destroy()  # Close the Tkinter window
-
-################################################################
-
-
-
-def animate_loading_label(loading_label):
-    dots = loading_label.cget("text").count('.')
-    if dots < 3:
-        loading_label.config(text=loading_label.cget("text") + '.')
+def start_process_group(single_command):
+    # The command runs in its own process group, so cancelling it also stops the dotnet
+    # processes the shell started.
+    if os.name == 'nt':
+        group_kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
     else:
-        loading_label.config(text="Loading")
+        group_kwargs = {'start_new_session': True}
+    return subprocess.Popen(single_command, shell=True, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, errors='replace', **group_kwargs)
 
-def start_loading_animation(loading_label):
-    loading_label.place(x=250, y=100)  # Start the loading animation
-    animate_loading_label(loading_label)
-    loading_label.after(500, start_loading_animation, loading_label)  # Update every 500 ms
+def kill_process_group(process):
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            import signal
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass  # It has already exited.
 
-def stop_loading_animation(loading_label):
-    loading_label.place_forget()  # Stop the loading animation
+################################################################
 
-def run_program(project_name_entry, loading_label, status_bar, run_button):
-    project_name = project_name_entry.get()
+PROJECT_TYPES = ['console', 'webapi', 'classlib', 'xunit', 'mstest']
+MAX_CONCURRENT_JOBS = min(4, os.cpu_count() or 1)
+EVENT_POLL_MS = 100
+OUTPUT_TAIL_LINES = 200
+
+class Job:
+    """
+    One project to scaffold from the GUI's job queue.
+
+    Attributes:
+        job_id (int): The job's number, which is also the id of its row in the job list.
+        project_name (str): The name of the project.
+        project_type (str): The dotnet template, e.g. console or webapi.
+        status (str): queued, running, succeeded, failed or cancelled.
+        step (str): The command running, the last one completed between steps, or the outcome once the job has finished.
+        total_steps (int): How many commands the job runs, once it has started.
+        start_time (float): When the job started running, or None while it is queued.
+        end_time (float): When the job finished, or None while it is queued or running.
+        output_tail (deque): The last lines of output.
+        output_count (int): How many lines of output the job has printed, including those no longer in output_tail.
+
+    Methods:
+        elapsed: Returns the seconds the job has been running, or ran for.
+        cancel: Stops the job: a queued job never starts, a running job's command is killed.
+        start_command: Starts a command for the job, unless the job has been cancelled.
+    """
+
+    def __init__(self, job_id, project_name, project_type):
+        import threading
+        from collections import deque
+        self.job_id = job_id
+        self.project_name = project_name
+        self.project_type = project_type
+        self.status = 'queued'
+        self.step = ''
+        self.total_steps = 0
+        self.start_time = None
+        self.end_time = None
+        self.output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        self.output_count = 0
+        self.cancelled = False
+        self._process = None
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        import time
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.perf_counter()) - self.start_time
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            process = self._process
+        if process is not None:
+            kill_process_group(process)
+
+    def start_command(self, single_command):
+        # Checked and started under the lock, so a cancel cannot slip in between.
+        with self._lock:
+            if self.cancelled:
+                return None
+            self._process = start_process_group(single_command)
+            return self._process
+
+def execute_dotnet_commands(job, events):
+    # Runs on a worker thread and never touches Tk: progress and output are published to the
+    # events queue as ('started', job), ('step_started', job, index, total, command),
+    # ('output', job, line), ('step_finished', job, index, command, succeeded) and finally
+    # ('finished', job, status, message).
+    if job.cancelled:
+        events.put(('finished', job, 'cancelled', "Cancelled before it started"))
+        return
+    events.put(('started', job))
+    project_directory_path = os.path.join(os.getcwd(), job.project_name)
     try:
+        os.makedirs(project_directory_path, exist_ok=True)
+    except OSError as e:
+        events.put(('finished', job, 'failed', f"Could not create {project_directory_path}: {e}"))
+        return
+
+    dotnet_commands = get_dotnet_commands(job.project_name, project_directory_path, job.project_type)
+    for index, single_command in enumerate(dotnet_commands, 1):
+        try:
+            process = job.start_command(single_command)
+        except OSError as e:
+            events.put(('finished', job, 'failed', f"Failed to start {single_command}: {e}"))
+            return
+        if process is None:
+            events.put(('finished', job, 'cancelled', "Cancelled"))
+            return
+        events.put(('step_started', job, index, len(dotnet_commands), single_command))
+        for line in process.stdout:
+            events.put(('output', job, line.rstrip('\n')))
+        succeeded = process.wait() == 0
+        events.put(('step_finished', job, index, single_command, succeeded))
+        if not succeeded:
+            if job.cancelled:
+                events.put(('finished', job, 'cancelled', f"Cancelled during step {index}"))
+            else:
+                events.put(('finished', job, 'failed', f"Failed: {single_command}"))
+            return
+
+    events.put(('finished', job, 'succeeded', "Done"))
+
+def parse_job_specs(text, default_type):
+    # "Api:webapi, Core:classlib, Tools" -> [('Api', 'webapi'), ('Core', 'classlib'), ('Tools', default_type)]
+    specs = []
+    for spec in text.split(','):
+        project_name, _, project_type = spec.strip().partition(':')
+        project_name, project_type = project_name.strip(), project_type.strip() or default_type
         validate_project_name(project_name)
-        status_bar.config(text="Running...")
-        run_button.pack_forget()  # Hide the button
-        start_loading_animation(loading_label)
-        threading.Thread(target=execute_dotnet_commands, args=(project_name, loading_label, run_button, status_bar)).start()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
-
+        if project_type not in PROJECT_TYPES:
+            raise ValueError(f"Invalid project type '{project_type}'. Please use one of: {', '.join(PROJECT_TYPES)}.")
+        specs.append((project_name, project_type))
+    return specs
+
+def redraw_output(gui, job):
+    # Replaces the output pane with the tail of job, or empties it when job is None.
+    output_text = gui['output_text']
+    output_text.config(state='normal')
+    output_text.delete('1.0', 'end')
+    if job is not None:
+        output_text.insert('end', "\n".join(job.output_tail))
+    output_text.see('end')
+    output_text.config(state='disabled')
+    gui['shown_output_count'] = job.output_count if job is not None else 0
+
+def append_output(gui, job):
+    # Inserts only the lines job printed since the pane was last updated, and drops the oldest
+    # ones so the pane never holds more than the tail.
+    new_count = min(job.output_count - gui['shown_output_count'], len(job.output_tail))
+    if new_count <= 0:
+        return
+    lines = list(job.output_tail)[-new_count:]
+    output_text = gui['output_text']
+    output_text.config(state='normal')
+    output_text.insert('end', ("\n" if gui['shown_output_count'] else "") + "\n".join(lines))
+    excess_lines = int(output_text.index('end-1c').split('.')[0]) - OUTPUT_TAIL_LINES
+    if excess_lines > 0:
+        output_text.delete('1.0', f"{excess_lines + 1}.0")
+    output_text.see('end')
+    output_text.config(state='disabled')
+    gui['shown_output_count'] = job.output_count
+
+def selected_jobs(gui):
+    return [gui['jobs'][int(row)] for row in gui['job_list'].selection()]
+
+def refresh_job_row(gui, job):
+    timing = f"{job.elapsed():.1f}s" if job.start_time is not None else ""
+    gui['job_list'].item(str(job.job_id), values=(job.project_name, job.project_type, job.status, timing, job.step))
+
+def refresh_status(gui):
+    counts = {}
+    for job in gui['jobs'].values():
+        counts[job.status] = counts.get(job.status, 0) + 1
+    order = ['running', 'queued', 'succeeded', 'failed', 'cancelled']
+    gui['status_bar'].config(text=", ".join(f"{counts[status]} {status}" for status in order if status in counts) or "Ready")
+
+def process_events(gui):
+    # Drains the events published by the workers on the Tk main loop, the only thread that
+    # updates widgets, and keeps doing so while any job is queued or running.
+    import queue
+    import time
+    shown_jobs = selected_jobs(gui)
+    shown_job = shown_jobs[0] if len(shown_jobs) == 1 else None
+    show_output = False
+    while True:
+        try:
+            event = gui['events'].get_nowait()
+        except queue.Empty:
+            break
+        job = event[1]
+        if event[0] == 'started':
+            job.status, job.start_time = 'running', time.perf_counter()
+        elif event[0] == 'step_started':
+            _, _, index, job.total_steps, single_command = event
+            job.step = f"{index}/{job.total_steps}: {single_command}"
+        elif event[0] == 'step_finished':
+            _, _, index, single_command, succeeded = event
+            job.step = f"{index}/{job.total_steps} {'done' if succeeded else 'failed'}: {single_command}"
+        elif event[0] == 'output':
+            job.output_tail.append(event[2])
+            job.output_count += 1
+            show_output = show_output or job is shown_job
+        elif event[0] == 'finished':
+            _, _, job.status, job.step = event
+            if job.start_time is not None:
+                job.end_time = time.perf_counter()
+        refresh_job_row(gui, job)
+    for job in gui['jobs'].values():
+        if job.status == 'running':
+            refresh_job_row(gui, job)  # Keeps the timing current.
+    if show_output:
+        append_output(gui, shown_job)
+    refresh_status(gui)
+    if any(job.status in ('queued', 'running') for job in gui['jobs'].values()):
+        gui['root'].after(EVENT_POLL_MS, process_events, gui)
+    else:
+        gui['polling'] = False
 
+def add_jobs(gui):
+    from tkinter import messagebox
+    try:
+        specs = parse_job_specs(gui['project_name_entry'].get(), gui['project_type'].get())
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    active_names = {job.project_name for job in gui['jobs'].values() if job.status in ('queued', 'running')}
+    for project_name, project_type in specs:
+        if project_name in active_names:
+            messagebox.showerror("Error", f"{project_name} is already queued or running.")
+            continue
+        active_names.add(project_name)
+        gui['next_job_id'] += 1
+        job = Job(gui['next_job_id'], project_name, project_type)
+        gui['jobs'][job.job_id] = job
+        gui['job_list'].insert('', 'end', iid=str(job.job_id))
+        refresh_job_row(gui, job)
+        gui['futures'][job.job_id] = gui['executor'].submit(execute_dotnet_commands, job, gui['events'])
+    gui['project_name_entry'].delete(0, 'end')
+    refresh_status(gui)
+    if not gui['polling']:
+        gui['polling'] = True
+        process_events(gui)
+
+def cancel_jobs(gui):
+    for job in selected_jobs(gui):
+        if job.status not in ('queued', 'running'):
+            continue
+        job.cancel()
+        # A job no worker has picked up yet is taken out of the queue at once.
+        if gui['futures'][job.job_id].cancel():
+            job.status, job.step = 'cancelled', "Cancelled before it started"
+            refresh_job_row(gui, job)
+    refresh_status(gui)
+
+def clear_finished_jobs(gui):
+    for job_id, job in list(gui['jobs'].items()):
+        if job.status in ('succeeded', 'failed', 'cancelled'):
+            gui['job_list'].delete(str(job_id))
+            del gui['jobs'][job_id]
+            del gui['futures'][job_id]
+    refresh_status(gui)
+
+def show_selected_output(gui):
+    jobs = selected_jobs(gui)
+    redraw_output(gui, jobs[0] if len(jobs) == 1 else None)
+
+def close_window(gui):
+    for job in gui['jobs'].values():
+        job.cancel()
+    gui['executor'].shutdown(wait=False, cancel_futures=True)
+    gui['root'].destroy()
+
+def run_gui():
+    import queue
+    import tkinter as tk
+    from concurrent.futures import ThreadPoolExecutor
+    from tkinter import ttk
+    root = tk.Tk()
+    root.title("CARPS - C# Automated Rapid Project Setup")
+    root.geometry("800x500")
+    gui = {'root': root, 'jobs': {}, 'futures': {}, 'next_job_id': 0, 'events': queue.Queue(), 'polling': False,
+           'shown_output_count': 0, 'executor': ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS)}
+
+    form = tk.Frame(root)
+    form.pack(padx=10, pady=10, fill=tk.X)
+    project_name_label = tk.Label(form, text="Project Name(s):", font=("Arial", 14))
+    project_name_label.pack(side=tk.LEFT)
+
+    project_name_entry = tk.Entry(form, font=("Arial", 14))
+    project_name_entry.insert(0, "Api:webapi, Core:classlib, Tests:xunit")  # Add default text
+    project_name_entry.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
+    project_name_entry.bind('<Return>', lambda event: add_jobs(gui))
+    gui['project_name_entry'] = project_name_entry
+
+    project_type = tk.StringVar(value='console')  # The type of names given without one
+    tk.OptionMenu(form, project_type, *PROJECT_TYPES).pack(side=tk.LEFT)
+    gui['project_type'] = project_type
+
+    buttons = tk.Frame(root)
+    buttons.pack(padx=10, fill=tk.X)
+    run_button = tk.Button(buttons, text="Add to Queue", command=lambda: add_jobs(gui), font=("Arial", 14), bg="blue", fg="white", relief=tk.GROOVE, bd=5, highlightbackground="red", highlightcolor="green", activebackground="purple", activeforeground="yellow")
+    run_button.pack(side=tk.LEFT, padx=5)
+    tk.Button(buttons, text="Cancel Selected", command=lambda: cancel_jobs(gui), font=("Arial", 14)).pack(side=tk.LEFT, padx=5)
+    tk.Button(buttons, text="Clear Finished", command=lambda: clear_finished_jobs(gui), font=("Arial", 14)).pack(side=tk.LEFT, padx=5)
+
+    status_bar = tk.Label(root, text="Ready", bd=1, relief=tk.SUNKEN, anchor=tk.W)  # Add status bar
+    status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    gui['status_bar'] = status_bar
+
+    columns = ('project', 'type', 'status', 'time', 'step')
+    job_list = ttk.Treeview(root, columns=columns, show='headings', height=8)
+    for column, width in zip(columns, (120, 80, 80, 60, 420)):
+        job_list.heading(column, text=column.capitalize())
+        job_list.column(column, width=width, stretch=column == 'step')
+    job_list.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    job_list.bind('<<TreeviewSelect>>', lambda event: show_selected_output(gui))
+    gui['job_list'] = job_list
+
+    output_text = tk.Text(root, height=8, state='disabled', font=("Courier", 10))  # The output tail of the selected job
+    output_text.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+    gui['output_text'] = output_text
+
+    root.protocol("WM_DELETE_WINDOW", lambda: close_window(gui))
+    root.mainloop()
 
 def main():
     parser = argparse.ArgumentParser(description="Set up a new .NET project.")
@@ -154,29 +429,7 @@ def main():
         validate_project_name(args.project_name)
         console_execute_dotnet_commands(args.project_name)
     else:
-        root = tk.Tk()
-        root.title("CARPS - C# Automated Rapid Project Setup")
-        root.geometry("500x200")
-
-        loading_label = tk.Label(root, text="Loading", font=("Arial", 14))
-
-        project_name_label = tk.Label(root, text="Project Name:", font=("Arial", 14))
-        project_name_label.pack(padx=10, pady=10)  # Add padding
-
-        project_name_entry = tk.Entry(root, font=("Arial", 14))
-        project_name_entry.insert(0, "Enter project name here")  # Add default text
-        project_name_entry.pack(padx=10, pady=10)
-
-        run_button = tk.Button(root, text="Run Program", command=lambda: run_program(project_name_entry, loading_label, status_bar, run_button), font=("Arial", 14), bg="blue", fg="white", relief=tk.GROOVE, bd=5, highlightbackground="red", highlightcolor="green", activebackground="purple", activeforeground="yellow")
-        run_button.pack(padx=10, pady=10)
-
-        clear_button = tk.Button(root, text="Clear", command=lambda: project_name_entry.delete(0, 'end'), font=("Arial", 14))  # Add clear button
-        clear_button.pack(padx=10, pady=10)
-
-        status_bar = tk.Label(root, text="Ready", bd=1, relief=tk.SUNKEN, anchor=tk.W)  # Add status bar
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
-
-        root.mainloop()
+        run_gui()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -37,7 +37,8 @@ The `DotNetProject` class encapsulates the functionality for setting up the .NET
 
 * `__init__(self, project_name, project_type='console')`: Initializes a new instance of the `DotNetProject` class with the specified project name and type.
 * `execute_single_command(self, single_command)`: Executes a given shell command and prints the output or error message.
-* `execute_dotnet_commands(self)`: Sequentially executes a series of .NET CLI commands to set up the project environment, including creating the solution and project files, and building and running the project.
+* `build_step_graph(self)`: Describes the .NET CLI commands as a graph of steps with explicit dependencies (see `step_graph.py`).
+* `execute_dotnet_commands(self)`: Executes the step graph to set up the project environment, including creating the solution and project files, and building and running the project. Independent steps run at the same time and steps that depend on a failed step are skipped.
 
 == Implementation
 The implementation involves initializing instances of the `UserInterface` and `DotNetProject` classes and invoking their methods based on user input. The script starts by displaying a greeting message, then prompts the user for project details and executes the necessary .NET CLI commands to set up the project.
@@ -62,6 +63,27 @@ import subprocess
 import re
 import argparse
 import sys
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from build_cache import BuildCache
+from command_line import dotnet, join_commands
+from environment_probe import load_environment
+from instrumentation import MetricsReport, StepMetrics
+from output_stream import run_streaming, CommandOutput, DEFAULT_TAIL_LINES
+from process_control import CancellationToken, READY_PATTERN, process_group_kwargs
+from project_templates import add_project_references, framework_for_sdk, generate_project, is_builtin_template, is_native_framework, MINIMUM_NATIVE_VERSION
+from solution_file import SolutionFile, SolutionFileError, add_projects_to_solution
+from step_graph import StepGraph, COMPLETED, FAILED, SKIPPED, SUCCEEDED, UP_TO_DATE
+from step_manifest import StepManifest
+from step_planner import DotNetStep, describe_eliminated, estimate_savings, plan_dotnet_steps
+from template_cache import TemplateCache, PLACEHOLDER_NAME
+
+# Modules that only some modes need (asyncio, the scaffold server, JSON Lines batches, the
+# project pool and solution manifests) are imported where they are used, so a plain
+# `StartDotNet-v2.1.py MyApp` starts its first command without loading them.
 
 greeting_text = """
 StartDotNet - C# Automated Rapid Project Setup
@@ -77,6 +99,25 @@ Please ensure that .NET is installed.
 Let's get started!\n
 """
 
+# The project types accepted by -t, --batch, manifests and --serve requests.
+project_types = ['console', 'webapi', 'classlib', 'xunit', 'mstest', 'mvc']
+
+# Project types whose `dotnet run` serves requests until it is stopped.
+server_project_types = ['webapi', 'mvc', 'web', 'webapp', 'razor', 'blazor', 'grpc', 'worker']
+
+# How `dotnet run` is handled: wait for the app to exit, stop it once it reports it is ready, or skip it.
+run_modes = ['auto', 'wait', 'ready', 'skip']
+DEFAULT_READY_TIMEOUT = 120
+
+# Serialises console output when several projects are scaffolded at once.
+print_lock = threading.Lock()
+
+# Steps whose work a scaffold from the project pool has already done.
+pooled_steps = ['new_sln', 'new_project', 'sln_add', 'restore']
+
+# Used to start the background process that refills the project pool after a chdir.
+script_path = os.path.abspath(__file__)
+
 class UserInterface:
     """
     The UserInterface class is responsible for handling all interactions with the user. It displays
@@ -108,10 +149,10 @@ class UserInterface:
     def get_project_type(self):
         while True:
             project_type = input("Enter the type of the project (console, webapi, etc.): ")
-            if project_type in ['console', 'webapi', 'classlib', 'xunit', 'mstest']:
+            if project_type in project_types:
                 return project_type
             else:
-                print("Invalid project type. Please enter a valid project type (console, webapi, classlib, xunit, mstest).")
+                print(f"Invalid project type. Please enter a valid project type ({', '.join(project_types)}).")
 
     def display_menu(self):
         print("\nPlease select an option from the menu:")
@@ -144,65 +185,1041 @@ class DotNetProject:
     Attributes:
         project_name (str): The name of the project.
         project_type (str): The type of the project (default is 'console').
-        project_directory_path (str): The filesystem path to the project directory.
+        project_directory_path (str): The filesystem path to the project directory, inside directory (the current directory by default).
+        output_prefix (str): Text prepended to every line this project prints (empty by default).
+        output_callback (callable): Called with every message instead of printing it, e.g. to send it to a client (None prints).
+        solution_path (str): The path of the .sln file.
+        csproj_path (str): The path of the project's .csproj file.
+        skipped_commands (list): Commands not run because a step they depend on failed.
+        prefix_commands (bool): Whether each output line is prefixed with the name of the step that wrote it.
+        tail_lines (int): How many of the last output lines are kept in memory for error reporting.
+        log_directory (str): Where the complete output of each step is saved.
+        template_cache (TemplateCache): Serves `dotnet new` output from disk when set (None runs the CLI every time).
+        native_sln (bool): Whether the project is added to the .sln file directly instead of through `dotnet sln add`.
+        native_templates (bool): Whether the solution and built-in project types are written directly instead of through `dotnet new`.
+        framework (str): The target framework, e.g. net8.0 (None uses the installed SDK's default).
+        timeout (float): Seconds any single step may run before its process tree is killed (None waits forever).
+        step_timeouts (dict): Per-step timeouts in seconds, keyed by step name, overriding timeout.
+        run_mode (str): wait runs the app until it exits, ready stops it cleanly once it reports it is
+            listening, skip leaves out the run step, and auto picks ready for server project types and wait otherwise.
+        cancel_token (CancellationToken): Cancels every running and pending step of the project when cancelled.
+        timed_out_commands (list): Commands that were killed because they ran past their timeout.
+        step_errors (dict): The exceptions that made steps of the last run fail, keyed by command.
+        metrics (list): StepMetrics for every step of the last run, in step order.
+        resume (bool): Whether steps the manifest records as completed, with unchanged files, are skipped.
+        manifest_path (str): Where the record of completed steps and their file hashes is kept.
+        up_to_date_commands (list): Commands not run because their outputs were unchanged since they last completed.
+        plan_steps (bool): Whether the dotnet steps are rewritten to restore once, build once and run with --no-build.
+        plan (ExecutionPlan): The rewrite made for the last step graph, or None when planning is off.
+        eliminated_work (list): The (step_name, work) restores and builds the planner removed from the steps that ran.
+        estimated_savings (float): Seconds the eliminated work would have taken, going by the measured restore and build steps.
+        max_workers (int): The most steps run at the same time (None runs every step that is ready).
+        environment (DotNetEnvironment): The probed SDKs and runtimes, used for the default framework (None falls back to the template cache's SDK version).
+        project_pool (ProjectPool): Hands out restored and built scaffolds for new projects (None creates every project from scratch).
+        from_pool (bool): Whether the last run started from a scaffold out of the project pool.
+        build_cache (BuildCache): Restores the output of a build whose inputs were built before instead of running it (None always builds).
+        stage_root (str): Where new projects are created, restored and built before they are published to project_directory_path (None builds in place).
+        staged_directory (StagedDirectory): The scratch directory of the current run, or None when it builds in place.
+        publish_error (str): Why the last staged run could not be published, or None.
 
     Methods:
         __init__: Initializes a new instance of the DotNetProject class.
-        execute_single_command: Executes a single shell command and prints its output or error.
+        set_project_directory: Points the project directory and every path inside it at a directory.
+        log: Prints a message (or passes it to output_callback), prefixed with output_prefix, without interleaving with other projects.
+        execute_single_command: Executes a single shell command, streaming its output as it arrives.
+        execute_single_command_async: The asyncio version of execute_single_command.
+        step_timeout: Returns the timeout for a step.
+        step_deadline: Returns the time.monotonic() time a step must finish by, or None without a timeout.
+        time_remaining: Returns the seconds left until a deadline, or None without one.
+        log_path: Returns the file a step's full output is saved to.
+        sdk_version: Returns the SDK version projects are created for, or None if it is unknown.
+        cancel: Kills every running step of the project and prevents pending steps from starting.
+        record_process: Adds the wall time, CPU time and peak memory of a finished command to its step's metrics.
+        collect_metrics: Builds the StepMetrics of a finished step graph.
+        measured_durations: Returns the mean wall time per step name of the steps of the last run that succeeded.
+        step_files: Returns the files a step reads and writes, relative to the solution directory.
+        step_up_to_date: Whether the manifest shows a step's files unchanged since it last completed, or the build cache had the step's output.
+        build_cache_directories: Returns the project directories a build writes output to, relative to the solution directory.
+        restore_build_output: Restores a build's output from the build cache, if it holds output for the same inputs.
+        cached_build_action: Wraps a build step action so its output is stored in the build cache when it succeeds.
+        update_manifest: Records the completed steps of a run in the manifest and saves it.
+        prepare_run: Creates the solution directory, from the project pool when possible, and loads the manifest before a run.
+        adopt_pooled_steps: Records the steps a pooled scaffold has already done as completed in the manifest.
+        start_staging: Moves the project directory to a scratch directory under stage_root, unless the project must be built in place.
+        finish_staging: Publishes the staged project if every step completed, or discards it; returns whether it was published.
+        finish_run: Collects the metrics and step outcomes of a run and returns the commands that failed.
+        report_command_result: Prints whether a command succeeded and, if not, the tail of its output.
+        execute_template_command: Creates files from a template, using the template cache when available.
+        create_solution: Writes an empty solution file, or runs `dotnet new sln` when native templates are off.
+        create_project: Writes a built-in project type, or runs `dotnet new` for any other template.
+        add_to_solution: Adds the project to the solution file, falling back to `dotnet sln add` if the file cannot be edited.
+        command_step_action: Returns a step action that runs a command, as a coroutine function when asynchronous.
+        build_step_graph: Builds the graph of .NET CLI steps and the dependencies between them.
+        add_dotnet_steps: Adds the restore, build and run steps to a graph, rewritten by the planner when it is on.
+        run_dotnet_commands: Executes the step graph and returns the commands that failed.
+        run_dotnet_commands_async: The asyncio version of run_dotnet_commands.
         execute_dotnet_commands: Executes a series of .NET CLI commands to set up the project.
     """
     
-    def __init__(self, project_name, project_type='console'):
+    def __init__(self, project_name, project_type='console', output_prefix='', prefix_commands=False, tail_lines=DEFAULT_TAIL_LINES,
+                 template_cache=None, native_sln=True, native_templates=True, framework=None, timeout=None,
+                 step_timeouts=None, run_mode='auto', cancel_token=None, resume=True, plan_steps=True, environment=None,
+                 directory=None, output_callback=None, project_pool=None, build_cache=None, stage_root=None):
         self.project_name = project_name
         self.project_type = project_type
-        self.project_directory_path = os.path.join(os.getcwd(), self.project_name)
+        self.output_prefix = output_prefix
+        self.output_callback = output_callback
+        self.set_project_directory(os.path.join(directory or os.getcwd(), self.project_name))
+        self.skipped_commands = []
+        self.prefix_commands = prefix_commands
+        self.tail_lines = tail_lines
+        self.template_cache = template_cache
+        self.native_sln = native_sln
+        self.native_templates = native_templates
+        self.framework = framework
+        self.timeout = timeout
+        self.step_timeouts = dict(step_timeouts or {})
+        self.run_mode = run_mode
+        if self.run_mode == 'auto':
+            self.run_mode = 'ready' if self.project_type in server_project_types else 'wait'
+        if self.run_mode == 'ready':
+            self.step_timeouts.setdefault('run', self.timeout or DEFAULT_READY_TIMEOUT)
+        self.cancel_token = cancel_token or CancellationToken()
+        self.timed_out_commands = []
+        self.step_errors = {}
+        self.metrics = []
+        self.process_metrics = {}
+        self.resume = resume
+        self.manifest = None
+        self.up_to_date_commands = []
+        self.plan_steps = plan_steps
+        self.plan = None
+        self.eliminated_work = []
+        self.estimated_savings = 0.0
+        self.max_workers = None
+        self.environment = environment
+        self.project_pool = project_pool
+        self.from_pool = False
+        self.build_cache = build_cache
+        self.stage_root = stage_root
+        self.staged_directory = None
+        self.publish_error = None
+
+    def set_project_directory(self, project_directory_path):
+        self.project_directory_path = project_directory_path
+        self.solution_path = os.path.join(self.project_directory_path, f"{self.project_name}.sln")
+        self.csproj_path = os.path.join(self.project_directory_path, self.project_name, f"{self.project_name}.csproj")
+        self.log_directory = os.path.join(self.project_directory_path, '.startdotnet', 'logs')
+        self.manifest_path = os.path.join(self.project_directory_path, '.startdotnet', 'manifest.json')
+
+    def log(self, message):
+        if self.output_prefix:
+            message = "\n".join(f"{self.output_prefix}{line}" for line in str(message).split("\n"))
+        if self.output_callback is not None:
+            self.output_callback(str(message))
+            return
+        with print_lock:
+            print(message)
 
-    def execute_single_command(self, single_command):
-        print(f"Executing command: {single_command}")
-        completed_process = subprocess.run(single_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    def step_timeout(self, step_name):
+        # Per-project steps such as "new_project:Core" also use the timeout set for "new_project".
+        return self.step_timeouts.get(step_name, self.step_timeouts.get(step_name.partition(':')[0], self.timeout))
 
-        if completed_process.returncode != 0:
-            print(f"Failed to execute command: {single_command}")
-            print(f"Error: {completed_process.stderr.decode()}")
-            print(f"Output: {completed_process.stdout.decode()}")
+    def sdk_version(self):
+        if self.environment is not None:
+            return self.environment.sdk_version_for(self.project_directory_path)
+        return self.template_cache.sdk_version if self.template_cache else None
+
+    def step_deadline(self, step_name):
+        # The timeout covers the whole step, however many commands it runs.
+        timeout = self.step_timeout(step_name)
+        return time.monotonic() + timeout if timeout else None
+
+    @staticmethod
+    def time_remaining(deadline):
+        return None if deadline is None else deadline - time.monotonic()
+
+    def log_path(self, step_name):
+        return os.path.join(self.log_directory, f"{step_name.replace(':', '-')}.log")
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+    def execute_single_command(self, single_command, step_name='command', ready_pattern=None):
+        if self.cancel_token.cancelled:
+            self.log(f"Cancelled before it started: {single_command}")
+            return False
+        self.log(f"Executing command: {single_command}")
+        line_prefix = f"[{step_name}] " if self.prefix_commands else ""
+        log_path = self.log_path(step_name)
+        deadline = self.step_deadline(step_name)
+        # Every command of the step writes to the same log; only the first starts it afresh.
+        for position, argv in enumerate(single_command.argvs):
+            timeout = self.time_remaining(deadline)
+            if timeout is not None and timeout <= 0:
+                output = CommandOutput(None, [], [], log_path, timed_out=True)
+                break
+            output = run_streaming(argv, lambda stream, line: self.log(f"{line_prefix}{line}"),
+                                   log_path=log_path, log_mode='a' if position else 'w', tail_lines=self.tail_lines,
+                                   timeout=timeout, cancel_token=self.cancel_token, ready_pattern=ready_pattern)
+            self.record_process(step_name, output)
+            if not output.succeeded:
+                break
+        return self.report_command_result(single_command, output, step_name)
+
+    async def execute_single_command_async(self, single_command, step_name='command', ready_pattern=None):
+        import async_runner
+        if self.cancel_token.cancelled:
+            self.log(f"Cancelled before it started: {single_command}")
+            return False
+        self.log(f"Executing command: {single_command}")
+        line_prefix = f"[{step_name}] " if self.prefix_commands else ""
+        log_path = self.log_path(step_name)
+        deadline = self.step_deadline(step_name)
+        for position, argv in enumerate(single_command.argvs):
+            timeout = self.time_remaining(deadline)
+            if timeout is not None and timeout <= 0:
+                output = CommandOutput(None, [], [], log_path, timed_out=True)
+                break
+            output = await async_runner.execute_single_command(argv, lambda stream, line: self.log(f"{line_prefix}{line}"),
+                                                               log_path=log_path, log_mode='a' if position else 'w',
+                                                               tail_lines=self.tail_lines, timeout=timeout,
+                                                               cancel_token=self.cancel_token, ready_pattern=ready_pattern)
+            self.record_process(step_name, output)
+            if not output.succeeded:
+                break
+        return self.report_command_result(single_command, output, step_name)
+
+    def record_process(self, step_name, output):
+        metrics = self.process_metrics.setdefault(step_name, StepMetrics(self.project_name, step_name))
+        metrics.add_process(output.rusage)
+
+    def measured_durations(self):
+        report = MetricsReport()
+        report.add(self.metrics)
+        return report.mean_wall_times()
+
+    def collect_metrics(self, steps):
+        self.metrics = []
+        for step in steps:
+            metrics = StepMetrics(self.project_name, step.name, step.command, step.status, step.duration, step.error)
+            recorded = self.process_metrics.get(step.name)
+            if recorded is not None:
+                metrics.user_cpu, metrics.system_cpu = recorded.user_cpu, recorded.system_cpu
+                metrics.peak_rss, metrics.processes = recorded.peak_rss, recorded.processes
+            self.metrics.append(metrics)
+        return self.metrics
+
+    def report_command_result(self, single_command, output, step_name='command'):
+        if output.timed_out:
+            self.timed_out_commands.append(single_command)
+            self.log(f"Timed out after {self.step_timeout(step_name)}s, stopped: {single_command}")
+            self.log(f"Full output saved to: {output.log_path}")
+            return False
+        elif output.cancelled:
+            self.log(f"Cancelled: {single_command}")
+            return False
+        elif output.ready:
+            self.log(f"Application started successfully and was shut down: {single_command}")
+            return True
+        elif output.returncode != 0:
+            self.log(f"Failed to execute command: {single_command}")
+            self.log("Error: " + "\n".join(output.stderr_tail))
+            self.log(f"Output (last {self.tail_lines} lines): " + "\n".join(output.stdout_tail))
+            self.log(f"Full output saved to: {output.log_path}")
             return False
         else:
-            print(f"Successfully executed command: {single_command}")
-            print(f"Output: {completed_process.stdout.decode()}")
+            self.log(f"Successfully executed command: {single_command}")
+            return True
+
+    def execute_template_command(self, single_command, step_name, template, name, output_directory, options=None):
+        if self.template_cache is None or not self.template_cache.enabled:
+            return self.execute_single_command(single_command, step_name)
+
+        def generate(placeholder_name, directory):
+            option_arguments = [argument for option, value in (options or {}).items() for argument in (f'--{option}', value)]
+            return self.execute_single_command(dotnet('new', template, '-n', placeholder_name, '-o', directory, *option_arguments), step_name)
+
+        result = self.template_cache.instantiate(template, name, output_directory, generate, options)
+        if result == 'hit':
+            self.log(f"Created from template cache: {single_command}")
+        return result is not None
+
+    def create_solution(self, single_command):
+        if os.path.exists(self.solution_path):
+            self.log(f"Keeping existing solution {self.solution_path}")
             return True
+        if not self.native_templates:
+            return self.execute_template_command(single_command, 'new_sln', 'sln', self.project_name, self.project_directory_path)
+        SolutionFile.create(self.solution_path).save()
+        self.log(f"Created solution {self.solution_path}")
+        return True
+
+    def create_project(self, single_command, output_directory, project_type=None, project_name=None, framework=None,
+                       step_name='new_project'):
+        project_type = project_type or self.project_type
+        project_name = project_name or self.project_name
+        framework = framework or self.framework
+        csproj_path = os.path.join(output_directory, f"{project_name}.csproj")
+        if os.path.exists(csproj_path):
+            # The project may have been edited since it was created (e.g. to fix a build error).
+            self.log(f"Keeping existing project {csproj_path}")
+            return True
+        if self.native_templates and is_builtin_template(project_type):
+            native_framework = framework or framework_for_sdk(self.sdk_version())
+            if is_native_framework(native_framework):
+                generate_project(project_type, project_name, output_directory, native_framework)
+                self.log(f"Created {project_type} project {csproj_path} ({native_framework})")
+                return True
+            self.log(f"The built-in {project_type} template needs .NET {MINIMUM_NATIVE_VERSION} or newer; using `dotnet new` for {native_framework}.")
+        options = {'framework': framework} if framework else None
+        return self.execute_template_command(single_command, step_name, project_type, project_name, output_directory, options)
+
+    def add_to_solution(self, single_command):
+        if not self.native_sln:
+            return self.execute_single_command(single_command, 'sln_add')
+        try:
+            add_projects_to_solution(self.solution_path, [self.csproj_path])
+        except (SolutionFileError, OSError, UnicodeDecodeError) as e:
+            self.log(f"Could not edit {self.solution_path} directly ({e}); using the .NET CLI instead.")
+            return self.execute_single_command(single_command, 'sln_add')
+        self.log(f"Added {self.csproj_path} to {self.solution_path}")
+        return True
+
+    def command_step_action(self, single_command, step_name, asynchronous=False, ready_pattern=None):
+        if asynchronous:
+            async def action():
+                return await self.execute_single_command_async(single_command, step_name, ready_pattern)
+            return action
+        return lambda: self.execute_single_command(single_command, step_name, ready_pattern)
+
+    def step_files(self, step_name):
+        solution_file = os.path.basename(self.solution_path)
+        project_directory = self.project_name
+        project_file = os.path.join(project_directory, os.path.basename(self.csproj_path))
+        files = {
+            'new_sln': ((), (solution_file,)),
+            'new_project': ((), (project_file,)),
+            'sln_add': ((project_file,), (solution_file,)),
+            'restore': ((project_file,), (os.path.join(project_directory, 'obj', 'project.assets.json'),)),
+            'build': ((project_directory,), (os.path.join(project_directory, 'bin'),)),
+        }
+        return files.get(step_name, ((), ()))
+
+    def step_up_to_date(self, step_name, single_command):
+        if not self.resume or self.manifest is None:
+            return False
+        inputs, outputs = self.step_files(step_name)
+        if not self.manifest.is_up_to_date(step_name, single_command, inputs, outputs):
+            return step_name == 'build' and self.restore_build_output(single_command)
+        self.log(f"Up to date, skipping: {single_command}")
+        return True
+
+    def build_cache_directories(self):
+        return [self.project_name]
+
+    def restore_build_output(self, single_command):
+        if self.build_cache is None:
+            return False
+        key = self.build_cache.cache_key(self.project_directory_path, self.build_cache_directories(), single_command)
+        if not self.build_cache.restore(key, self.project_directory_path, self.build_cache_directories()):
+            return False
+        self.log(f"Restored the output of an identical build from the build cache, skipping: {single_command}")
+        return True
 
-    def execute_dotnet_commands(self):
-        os.makedirs(self.project_name, exist_ok=True)
+    def cached_build_action(self, action, single_command, asynchronous=False):
+        # The key is taken before the build, from the same inputs restore_build_output hashes.
+        def store(key):
+            try:
+                self.build_cache.store(key, self.project_directory_path, self.build_cache_directories())
+            except OSError as e:
+                self.log(f"Could not add the build output to the build cache ({e}).")
+
+        if asynchronous:
+            async def cached_action():
+                key = self.build_cache.cache_key(self.project_directory_path, self.build_cache_directories(), single_command)
+                succeeded = await action()
+                if succeeded:
+                    store(key)
+                return succeeded
+            return cached_action
+
+        def cached_action():
+            key = self.build_cache.cache_key(self.project_directory_path, self.build_cache_directories(), single_command)
+            succeeded = action()
+            if succeeded:
+                store(key)
+            return succeeded
+        return cached_action
+
+    def update_manifest(self, steps):
+        # Outputs are re-hashed for every completed step, not only the ones that ran, because a
+        # later step can change an earlier step's output (sln_add edits the new_sln output).
+        for step in steps:
+            if step.name == 'run':
+                continue
+            if step.status in COMPLETED:
+                inputs, outputs = self.step_files(step.name)
+                self.manifest.record(step.name, step.command, inputs, outputs)
+            elif step.status == FAILED:
+                self.manifest.forget(step.name)
+        try:
+            self.manifest.save()
+        except OSError as e:
+            self.log(f"Could not save {self.manifest_path} ({e}); the next run will repeat every step.")
+
+    def build_step_graph(self, asynchronous=False):
+        # "new sln" and "new <type>" are independent; "sln add" needs both, while
+        # "build" only needs the project and can overlap with "sln add".
+        graph = StepGraph()
+        new_project_directory = os.path.join(self.project_directory_path, self.project_name)
+        framework_arguments = ('--framework', self.framework) if self.framework else ()
+        new_sln_command = dotnet('new', 'sln', '-n', self.project_name, '-o', self.project_directory_path)
+        new_project_command = dotnet('new', self.project_type, '-o', new_project_directory, *framework_arguments)
+        graph.add_step('new_sln', lambda: self.create_solution(new_sln_command), command=new_sln_command,
+                       up_to_date=lambda: self.step_up_to_date('new_sln', new_sln_command))
+        graph.add_step('new_project', lambda: self.create_project(new_project_command, new_project_directory), command=new_project_command,
+                       up_to_date=lambda: self.step_up_to_date('new_project', new_project_command))
+
+        sln_add_command = dotnet('sln', self.solution_path, 'add', self.csproj_path)
+        graph.add_step('sln_add', lambda: self.add_to_solution(sln_add_command), ('new_sln', 'new_project'), command=sln_add_command,
+                       up_to_date=lambda: self.step_up_to_date('sln_add', sln_add_command))
+
+        dotnet_steps = [DotNetStep('build', 'build', self.csproj_path, ('new_project',))]
+        if self.run_mode != 'skip':
+            dotnet_steps.append(DotNetStep('run', 'run', self.csproj_path, ('build', 'sln_add')))
+        # Every solution created here holds a single project, so restoring the project is
+        # restoring the solution, and it can overlap with sln_add.
+        self.add_dotnet_steps(graph, dotnet_steps, self.csproj_path, ('new_project',), asynchronous)
+        return graph
+
+    def add_dotnet_steps(self, graph, dotnet_steps, restore_target, restore_depends_on, asynchronous=False):
+        if self.environment is not None and self.framework and not self.environment.has_runtime_for(self.framework):
+            if any(dotnet_step.verb in ('run', 'test') for dotnet_step in dotnet_steps):
+                self.log(f"Warning: no .NET runtime for {self.framework} is installed, so the project cannot be run. "
+                         f"Installed runtimes: {', '.join(self.environment.runtime_versions()) or 'none'}.")
+        self.plan = None
+        if self.plan_steps:
+            self.plan = plan_dotnet_steps(dotnet_steps, restore_target, restore_depends_on)
+            dotnet_steps = self.plan.steps
+        for dotnet_step in dotnet_steps:
+            name, cmd = dotnet_step.name, dotnet_step.command
+            ready_pattern = READY_PATTERN if name == 'run' and self.run_mode == 'ready' else None
+            action = self.command_step_action(cmd, name, asynchronous, ready_pattern)
+            if name == 'build' and self.build_cache is not None:
+                action = self.cached_build_action(action, cmd, asynchronous)
+            # Running the project leaves no output to compare, so it is never up to date.
+            up_to_date = None if name == 'run' else lambda name=name, cmd=cmd: self.step_up_to_date(name, cmd)
+            graph.add_step(name, action, dotnet_step.depends_on, command=cmd, up_to_date=up_to_date)
+
+    def prepare_run(self):
+        self.from_pool = False
+        self.publish_error = None
+        if self.project_pool is not None and not os.path.exists(self.project_directory_path):
+            self.from_pool = self.project_pool.take(self.project_type, self.framework, self.project_name, self.project_directory_path)
+            if self.from_pool:
+                self.log(f"Took a restored and built {self.project_type} project from the pool for {self.project_name}.")
+            self.project_pool.start_fill(self.project_type, self.framework)
+        if self.stage_root is not None and not self.from_pool:
+            self.start_staging()
         os.makedirs(self.project_directory_path, exist_ok=True)
+        self.process_metrics = {}
+        self.manifest = StepManifest.load(self.manifest_path, self.project_directory_path)
+        if self.manifest.steps and self.resume:
+            self.log(f"Found earlier work in {self.project_directory_path}; steps whose files are unchanged will be skipped.")
 
-        dotnet_commands = [
-            f'dotnet new sln -n {self.project_name} -o "{self.project_directory_path}"',
-            f'dotnet new {self.project_type} -o "{os.path.join(self.project_directory_path, self.project_name)}"',
-            f'dotnet sln "{os.path.join(self.project_directory_path, f"{self.project_name}.sln")}" add "{os.path.join(self.project_directory_path, self.project_name, f"{self.project_name}.csproj")}"',
-            f'dotnet build "{os.path.join(self.project_directory_path, self.project_name, f"{self.project_name}.csproj")}"',
-            f'dotnet run --project "{os.path.join(self.project_directory_path, self.project_name, f"{self.project_name}.csproj")}"'
-        ]
+    def adopt_pooled_steps(self, graph):
+        # The scaffold was created and restored under the placeholder name; its files now carry
+        # this project's name and paths, so the same steps for this project are already done.
+        if not self.from_pool:
+            return
+        for step_name in pooled_steps:
+            step = graph.steps.get(step_name)
+            if step is not None:
+                inputs, outputs = self.step_files(step_name)
+                self.manifest.record(step_name, step.command, inputs, outputs)
 
-        failed_commands = [cmd for cmd in dotnet_commands if not self.execute_single_command(cmd)]
+    def start_staging(self):
+        from staging import StagedDirectory, inherited_build_files
+        self.staged_directory = None
+        if os.path.exists(self.project_directory_path):
+            self.log(f"Building in place: {self.project_directory_path} already exists.")
+            return
+        inherited_files = inherited_build_files(self.project_directory_path)
+        if inherited_files:
+            self.log(f"Building in place: a staged build would not see {', '.join(inherited_files)}.")
+            return
+        self.staged_directory = StagedDirectory(self.project_directory_path, self.stage_root)
+        self.set_project_directory(self.staged_directory.staging_directory)
+        self.log(f"Staging {self.project_name} in {self.project_directory_path}.")
+
+    def finish_staging(self, steps):
+        from staging import retarget_command
+        staged_directory, self.staged_directory = self.staged_directory, None
+        self.set_project_directory(staged_directory.destination)
+        if not all(step.status in COMPLETED for step in steps):
+            # Only the step logs are kept, moved out of the scratch directory.
+            staged_logs = os.path.join(staged_directory.staging_directory, '.startdotnet', 'logs')
+            kept_logs = staged_directory.discard(keep=staged_logs)
+            self.log(f"Discarded the staged project; nothing was written to {staged_directory.destination}.")
+            if kept_logs is not None:
+                self.log(f"Step logs kept in {kept_logs}")
+            return False
+        try:
+            method = staged_directory.publish()
+        except OSError as e:
+            staged_directory.discard()
+            self.publish_error = f"publish to {staged_directory.destination} ({e})"
+            self.log(f"Could not publish the staged project to {staged_directory.destination} ({e}); it was discarded.")
+            return False
+        # Reports and the manifest show the commands as they would run in the destination.
+        for step in steps:
+            step.command = retarget_command(step.command, staged_directory.staging_directory, staged_directory.destination)
+        self.manifest.path, self.manifest.base_directory = self.manifest_path, self.project_directory_path
+        self.log(f"Published {self.project_name} to {staged_directory.destination} ({'renamed' if method == 'rename' else 'copied'} from {staged_directory.stage_root}).")
+        return True
+
+    def finish_run(self, steps):
+        self.collect_metrics(steps)
+        self.skipped_commands = [step.command for step in steps if step.status == SKIPPED]
+        self.up_to_date_commands = [step.command for step in steps if step.status == UP_TO_DATE]
+        if self.plan is not None:
+            self.eliminated_work = self.plan.eliminated_by([step.name for step in steps if step.status in (SUCCEEDED, FAILED)])
+            self.estimated_savings = estimate_savings(self.eliminated_work, self.measured_durations())
+        failed_commands = [step.command for step in steps if step.status == FAILED]
+        # Native steps (file writes, .sln edits) fail by raising; their output is the exception.
+        self.step_errors = {step.command: step.error for step in steps if step.status == FAILED and step.error}
+        for command, error in self.step_errors.items():
+            self.log(f"Failed: {command}\nError: {error}")
+        return failed_commands + [self.publish_error] if self.publish_error else failed_commands
+
+    def run_dotnet_commands(self):
+        self.prepare_run()
+        graph = self.build_step_graph()
+        self.adopt_pooled_steps(graph)
+        try:
+            steps = graph.run(self.max_workers)
+        finally:
+            if self.staged_directory is None or self.finish_staging(graph.steps.values()):
+                self.update_manifest(graph.steps.values())
+        return self.finish_run(steps)
+
+    async def run_dotnet_commands_async(self):
+        self.prepare_run()
+        graph = self.build_step_graph(asynchronous=True)
+        self.adopt_pooled_steps(graph)
+        try:
+            steps = await graph.run_async()
+        finally:
+            if self.staged_directory is None or self.finish_staging(graph.steps.values()):
+                self.update_manifest(graph.steps.values())
+        return self.finish_run(steps)
+
+    def execute_dotnet_commands(self, json_report_path=None):
+        report = MetricsReport()
+        failed_commands = self.run_dotnet_commands()
+        report.add(self.metrics)
+        report.finish()
+        print("\nStep timings:")
+        print(report.format_table())
+        if self.eliminated_work:
+            print(describe_eliminated(self.eliminated_work, report.mean_wall_times()))
+        if self.build_cache is not None:
+            print(self.build_cache.describe())
+        if json_report_path:
+            report.write_json(json_report_path)
+            print(f"Timing report written to {json_report_path}")
 
         if failed_commands:
             print("The following commands failed:")
             for cmd in failed_commands:
-                print(cmd)
+                if cmd in self.timed_out_commands:
+                    print(f"{cmd} (timed out)")
+                elif cmd in self.step_errors:
+                    print(f"{cmd} (error: {self.step_errors[cmd]})")
+                else:
+                    print(cmd)
+            if self.skipped_commands:
+                print("The following commands were skipped because a step they depend on failed:")
+                for cmd in self.skipped_commands:
+                    print(cmd)
             sys.exit(1)
 
+class MultiProjectSolution(DotNetProject):
+    """
+    The MultiProjectSolution class sets up a solution with several projects, described by a
+    SolutionManifest. Every project is created at the same time; the project references and the
+    solution entries are then added in one step each, and the solution is restored, built and
+    optionally run once, so a large solution takes about as long as its slowest project rather
+    than the sum of all of them.
 
-def main():
-    ui = UserInterface()
-    ui.greeting()
+    Attributes:
+        solution_manifest (SolutionManifest): The projects to create and the references between them.
+        project_paths (dict): The .csproj path of every project, keyed by project name.
+
+    Methods:
+        set_project_directory: Points the solution directory and the path of every project at a directory.
+        project_directory: Returns the directory a project is created in.
+        references_command: Returns the `dotnet add reference` commands that add every reference in the manifest.
+        sln_add_command: Returns the `dotnet sln add` commands that add every project, one per solution folder.
+        add_references: Adds every project reference in the manifest to the project files.
+        add_projects_to_solution: Adds every project to the solution, under its solution folder.
+        build_cache_directories: Returns the directories of every project, relative to the solution directory.
+        step_files: Returns the files a step reads and writes, relative to the solution directory.
+        build_step_graph: Builds the graph of steps for the whole solution.
+    """
+
+    def __init__(self, solution_manifest, max_workers=None, **project_options):
+        run_spec = solution_manifest.get_project(solution_manifest.run_project) if solution_manifest.run_project else None
+        project_options['framework'] = project_options.get('framework') or solution_manifest.framework
+        if run_spec is None:
+            project_options['run_mode'] = 'skip'
+        self.solution_manifest = solution_manifest  # Needed by set_project_directory.
+        super().__init__(solution_manifest.solution_name, run_spec.project_type if run_spec else 'classlib', **project_options)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.project_pool = None  # Pooled scaffolds hold a single project.
+
+    def set_project_directory(self, project_directory_path):
+        super().set_project_directory(project_directory_path)
+        self.project_paths = {spec.name: os.path.join(self.project_directory_path, spec.relative_csproj_path())
+                              for spec in self.solution_manifest.projects}
+        run_project = self.solution_manifest.run_project
+        self.csproj_path = self.project_paths[run_project] if run_project else None
+
+    def project_directory(self, spec):
+        return os.path.join(self.project_directory_path, spec.relative_directory())
+
+    def references_command(self):
+        return join_commands(dotnet('add', self.project_paths[spec.name], 'reference',
+                                    *(self.project_paths[reference] for reference in spec.references))
+                             for spec in self.solution_manifest.projects if spec.references)
+
+    def sln_add_command(self):
+        folders = {}
+        for spec in self.solution_manifest.projects:
+            folders.setdefault(spec.folder, []).append(self.project_paths[spec.name])
+        return join_commands(dotnet('sln', self.solution_path, 'add', *(('--solution-folder', folder) if folder else ()), *paths)
+                             for folder, paths in folders.items())
 
+    def add_references(self, single_command):
+        if not self.native_sln:
+            return self.execute_single_command(single_command, 'references')
+        for spec in self.solution_manifest.projects:
+            if spec.references:
+                added = add_project_references(self.project_paths[spec.name], [self.project_paths[name] for name in spec.references])
+                if added:
+                    self.log(f"Added references to {spec.name}: {', '.join(spec.references)}")
+        return True
+
+    def add_projects_to_solution(self, single_command):
+        if not self.native_sln:
+            return self.execute_single_command(single_command, 'sln_add')
+        try:
+            solution = SolutionFile.load(self.solution_path)
+            configurations = solution.configurations()
+            for spec in self.solution_manifest.projects:
+                solution.add_project(self.project_paths[spec.name], solution_folder=spec.folder, configurations=configurations)
+            solution.save()
+        except (SolutionFileError, OSError, UnicodeDecodeError) as e:
+            self.log(f"Could not edit {self.solution_path} directly ({e}); using the .NET CLI instead.")
+            return self.execute_single_command(single_command, 'sln_add')
+        self.log(f"Added {len(self.solution_manifest.projects)} projects to {self.solution_path}")
+        return True
+
+    def build_cache_directories(self):
+        return [spec.relative_directory() for spec in self.solution_manifest.projects]
+
+    def step_files(self, step_name):
+        projects = self.solution_manifest.projects
+        solution_file = os.path.basename(self.solution_path)
+        project_files = tuple(spec.relative_csproj_path() for spec in projects)
+        project_directories = tuple(spec.relative_directory() for spec in projects)
+        kind, _, project_name = step_name.partition(':')
+        if kind == 'new_project':
+            return (), (self.solution_manifest.get_project(project_name).relative_csproj_path(),)
+        files = {
+            'new_sln': ((), (solution_file,)),
+            'references': ((), tuple(spec.relative_csproj_path() for spec in projects if spec.references)),
+            'sln_add': (project_files, (solution_file,)),
+            'restore': (project_files, tuple(os.path.join(directory, 'obj', 'project.assets.json') for directory in project_directories)),
+            'build': (project_directories, tuple(os.path.join(directory, 'bin') for directory in project_directories)),
+        }
+        return files.get(kind, ((), ()))
+
+    def build_step_graph(self, asynchronous=False):
+        # Projects are created in parallel; references and solution entries need every project
+        # and are each added in a single pass; the solution is then restored and built once.
+        graph = StepGraph()
+        new_sln_command = dotnet('new', 'sln', '-n', self.project_name, '-o', self.project_directory_path)
+        graph.add_step('new_sln', lambda: self.create_solution(new_sln_command), command=new_sln_command,
+                       up_to_date=lambda: self.step_up_to_date('new_sln', new_sln_command))
+
+        new_project_steps = []
+        for spec in self.solution_manifest.projects:
+            step_name = f"new_project:{spec.name}"
+            directory = self.project_directory(spec)
+            framework = spec.framework or self.framework
+            framework_arguments = ('--framework', framework) if framework else ()
+            command = dotnet('new', spec.project_type, '-n', spec.name, '-o', directory, *framework_arguments)
+            graph.add_step(step_name, lambda spec=spec, command=command, directory=directory, framework=framework, step_name=step_name:
+                           self.create_project(command, directory, spec.project_type, spec.name, framework, step_name),
+                           command=command, up_to_date=lambda step_name=step_name, command=command: self.step_up_to_date(step_name, command))
+            new_project_steps.append(step_name)
+
+        sln_add_command = self.sln_add_command()
+        graph.add_step('sln_add', lambda: self.add_projects_to_solution(sln_add_command), ['new_sln'] + new_project_steps,
+                       command=sln_add_command, up_to_date=lambda: self.step_up_to_date('sln_add', sln_add_command))
+        build_depends_on = ('sln_add',)
+        references_command = self.references_command()
+        if references_command:
+            graph.add_step('references', lambda: self.add_references(references_command), new_project_steps,
+                           command=references_command, up_to_date=lambda: self.step_up_to_date('references', references_command))
+            build_depends_on = ('sln_add', 'references')
+
+        dotnet_steps = [DotNetStep('build', 'build', self.solution_path, build_depends_on, covers=self.project_paths.values())]
+        if self.run_mode != 'skip':
+            dotnet_steps.append(DotNetStep('run', 'run', self.csproj_path, ('build',)))
+        self.add_dotnet_steps(graph, dotnet_steps, self.solution_path, build_depends_on, asynchronous)
+        return graph
+
+class ProjectResult:
+    """
+    The outcome of scaffolding one project as part of a batch.
+
+    Attributes:
+        project_name (str): The name of the project.
+        project_type (str): The type of the project.
+        failed_commands (list): The commands that failed; empty when the project succeeded.
+        error (str): An unexpected exception raised while scaffolding, if any.
+        skipped_commands (list): The commands skipped because a step they depend on failed.
+        timed_out_commands (list): The failed commands that were stopped because they ran past their timeout.
+        step_errors (dict): The exceptions that made steps fail, keyed by command.
+        metrics (list): StepMetrics for every step of the project.
+        up_to_date_commands (list): The commands not run because their outputs were unchanged.
+        eliminated_work (list): The (step_name, work) restores and builds the planner removed from the steps that ran.
+        estimated_savings (float): Seconds the eliminated work would have taken, going by the measured restore and build steps.
+        duration (float): Wall-clock seconds spent on the project.
+    """
+
+    def __init__(self, project_name, project_type, failed_commands=None, error=None, duration=0.0, skipped_commands=None,
+                 timed_out_commands=None, metrics=None, up_to_date_commands=None, eliminated_work=None, estimated_savings=0.0, step_errors=None):
+        self.project_name = project_name
+        self.project_type = project_type
+        self.failed_commands = failed_commands or []
+        self.skipped_commands = skipped_commands or []
+        self.timed_out_commands = timed_out_commands or []
+        self.step_errors = step_errors or {}
+        self.metrics = metrics or []
+        self.up_to_date_commands = up_to_date_commands or []
+        self.eliminated_work = eliminated_work or []
+        self.estimated_savings = estimated_savings
+        self.error = error
+        self.duration = duration
+
+    @property
+    def succeeded(self):
+        return not self.failed_commands and self.error is None
+
+class BatchScaffolder:
+    """
+    The BatchScaffolder class sets up many .NET projects at once on a bounded pool of worker threads.
+    Each project runs its own command sequence; a failure in one project is recorded in its result
+    and does not stop the others.
+
+    Attributes:
+        project_specs (list): (project_name, project_type) pairs to scaffold.
+        max_workers (int): The number of projects scaffolded at the same time (defaults to the CPU count).
+        project_options (dict): Extra keyword arguments passed to every DotNetProject.
+
+    Methods:
+        parse_project_spec: Turns a "name[:type]" string into a (project_name, project_type) pair.
+        parse_project_specs: Parses the specs of a batch, rejecting project names used twice.
+        scaffold_project: Scaffolds a single project and returns its ProjectResult.
+        run: Scaffolds every project and returns the results in submission order.
+        run_async: Scaffolds every project on the running event loop, with max_workers limiting concurrent dotnet processes.
+        print_summary: Prints one line per project with its status and duration.
+        build_report: Collects the step metrics of every project into a MetricsReport.
+    """
+
+    def __init__(self, project_specs, max_workers=None, **project_options):
+        self.project_specs = list(project_specs)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.project_options = project_options
+
+    @staticmethod
+    def parse_project_spec(spec, default_type='console'):
+        project_name, _, project_type = spec.partition(':')
+        project_type = project_type or default_type
+        if not re.match("^[A-Za-z0-9_]+$", project_name):
+            raise ValueError(f"Invalid project name '{project_name}'. Project name must be non-empty and can only contain alphanumeric characters and underscores.")
+        if project_type not in project_types:
+            raise ValueError(f"Invalid project type '{project_type}'. Please use one of: {', '.join(project_types)}.")
+        return project_name, project_type
+
+    @staticmethod
+    def parse_project_specs(specs, default_type='console'):
+        project_specs = [BatchScaffolder.parse_project_spec(spec, default_type) for spec in specs]
+        seen = set()
+        for project_name, _ in project_specs:
+            # Compared without case: on Windows and macOS both would be created in the same directory.
+            if project_name.lower() in seen:
+                raise ValueError(f"The project name '{project_name}' is used more than once in the batch.")
+            seen.add(project_name.lower())
+        return project_specs
+
+    def scaffold_project(self, project_name, project_type):
+        start_time = time.perf_counter()
+        project = DotNetProject(project_name, project_type, output_prefix=f"[{project_name}] ", **self.project_options)
+        try:
+            failed_commands = project.run_dotnet_commands()
+            return ProjectResult(project_name, project_type, failed_commands, duration=time.perf_counter() - start_time,
+                                 skipped_commands=project.skipped_commands, timed_out_commands=project.timed_out_commands,
+                                 step_errors=project.step_errors,
+                                 metrics=project.metrics, up_to_date_commands=project.up_to_date_commands,
+                                 eliminated_work=project.eliminated_work, estimated_savings=project.estimated_savings)
+        except Exception as e:
+            return ProjectResult(project_name, project_type, error=str(e), duration=time.perf_counter() - start_time)
+
+    def run(self):
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.scaffold_project, name, project_type): index
+                       for index, (name, project_type) in enumerate(self.project_specs)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return [results[index] for index in range(len(self.project_specs))]
+
+    async def run_async(self):
+        import asyncio
+        import async_runner
+        async_runner.set_max_concurrent_processes(self.max_workers)
+        projects = [DotNetProject(name, project_type, output_prefix=f"[{name}] ", **self.project_options)
+                    for name, project_type in self.project_specs]
+
+        async def scaffold(project):
+            start_time = time.perf_counter()
+            try:
+                failed_commands = await project.run_dotnet_commands_async()
+                return ProjectResult(project.project_name, project.project_type, failed_commands,
+                                     duration=time.perf_counter() - start_time, skipped_commands=project.skipped_commands,
+                                     timed_out_commands=project.timed_out_commands, step_errors=project.step_errors, metrics=project.metrics,
+                                     up_to_date_commands=project.up_to_date_commands,
+                                     eliminated_work=project.eliminated_work, estimated_savings=project.estimated_savings)
+            except Exception as e:
+                return ProjectResult(project.project_name, project.project_type, error=str(e), duration=time.perf_counter() - start_time)
+
+        return await asyncio.gather(*(scaffold(project) for project in projects))
+
+    def print_summary(self, results):
+        print("\nBatch summary:")
+        for result in results:
+            status = "OK" if result.succeeded else "FAILED"
+            up_to_date = f", {len(result.up_to_date_commands)} steps up to date" if result.up_to_date_commands else ""
+            print(f"  {status:<7} {result.project_name} ({result.project_type}) in {result.duration:.1f}s{up_to_date}")
+            for cmd in result.failed_commands:
+                print(f"          {'timed out' if cmd in result.timed_out_commands else 'failed'}: {cmd}")
+                if cmd in result.step_errors:
+                    print(f"            error: {result.step_errors[cmd]}")
+            for cmd in result.skipped_commands:
+                print(f"          skipped: {cmd}")
+            if result.error:
+                print(f"          error: {result.error}")
+        succeeded = sum(1 for result in results if result.succeeded)
+        print(f"{succeeded} of {len(results)} projects created successfully.")
+        eliminated_work = [work for result in results for work in result.eliminated_work]
+        if eliminated_work:
+            print(describe_eliminated(eliminated_work, self.build_report(results).mean_wall_times()))
+
+    def build_report(self, results, report=None):
+        report = report or MetricsReport()
+        for result in results:
+            report.add(result.metrics)
+        return report
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid number '{value}'.")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number.")
+    return number
+
+def parse_step_timeout(spec):
+    step_name, _, seconds = spec.partition('=')
+    try:
+        return step_name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid step timeout '{spec}'. Use STEP=SECONDS, e.g. build=600.")
+
+def create_served_project(request, output_callback, project_options):
+    # Builds the project for a request received by --serve. Requests may override the options
+    # that describe the project; everything else comes from the server's command line.
+    from solution_manifest import SolutionManifest
+    directory = request.get('directory')
+    if not isinstance(directory, str) or not os.path.isabs(directory) or not os.path.isdir(directory):
+        raise ValueError(f"The directory {directory} does not exist or is not an absolute path.")
+    options = dict(project_options, directory=directory, output_callback=output_callback)
+    for key in ('framework', 'run_mode'):
+        if request.get(key) is not None:
+            options[key] = str(request[key])
+    if options['run_mode'] not in run_modes:
+        raise ValueError(f"Invalid run mode '{options['run_mode']}'. Please use one of: {', '.join(run_modes)}.")
+    if request.get('timeout') is not None:
+        options['timeout'] = float(request['timeout'])
+    if request.get('step_timeouts') is not None:
+        options['step_timeouts'] = {str(step_name): float(seconds) for step_name, seconds in dict(request['step_timeouts']).items()}
+    if request.get('force'):
+        options['resume'] = False
+    if request.get('manifest'):
+        solution_manifest = SolutionManifest.load(os.path.join(directory, request['manifest']), project_types)
+        return MultiProjectSolution(solution_manifest, **options)
+    project_name, project_type = BatchScaffolder.parse_project_spec(f"{request.get('name') or ''}:{request.get('type') or ''}")
+    return DotNetProject(project_name, project_type, **options)
+
+def build_pool_scaffold(project_type, framework, directory, project_options):
+    # Creates, restores and builds a project under the placeholder name for the project pool.
+    options = dict(project_options, directory=directory, framework=framework, run_mode='skip', resume=False,
+                   output_callback=lambda message: None, project_pool=None, build_cache=None, cancel_token=None, stage_root=None)
+    return not DotNetProject(PLACEHOLDER_NAME, project_type, **options).run_dotnet_commands()
+
+def pool_fill_starter(args):
+    # Refills the pool in a detached StartDotNet process, so this one can exit as soon as the
+    # project is ready.
+    command = [sys.executable] if getattr(sys, 'frozen', False) else [sys.executable, script_path]
+    command += ['--fill-pool', '--pool', str(args.pool)]
+    if args.pool_dir:
+        command += ['--pool-dir', os.path.abspath(args.pool_dir)]
+    if args.template_cache_dir:
+        command += ['--template-cache-dir', os.path.abspath(args.template_cache_dir)]
+    for flag in ('no_template_cache', 'dotnet_sln', 'dotnet_new', 'no_planner'):
+        if getattr(args, flag):
+            command.append('--' + flag.replace('_', '-'))
+
+    def start_fill(project_type, framework):
+        try:
+            subprocess.Popen(command + ['-t', project_type] + (['-f', framework] if framework else []), stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **process_group_kwargs())
+        except OSError:
+            pass  # The pool is an optimisation; the next run tries again.
+
+    return start_fill
+
+def export_replay_script(args, solution_manifest, project_options):
+    # Compiles the step graphs of the project, batch or manifest into a script (see replay_script).
+    import shlex
+    from replay_script import SCRIPT_EXTENSIONS, export_script, replay_steps
+    options = dict(project_options, output_callback=lambda message: None)
+    if solution_manifest is not None:
+        projects = [MultiProjectSolution(solution_manifest, args.jobs, **options)]
+        name = solution_manifest.solution_name
+    elif args.batch:
+        projects = [DotNetProject(project_name, project_type, **options)
+                    for project_name, project_type in BatchScaffolder.parse_project_specs(args.batch, args.type)]
+        name = "Batch"
+    else:
+        projects = [DotNetProject(args.project_name, args.type, **options)]
+        name = args.project_name
+    shell = args.script_shell
+    if shell is None:
+        shell = 'powershell' if (args.export_script or '').lower().endswith('.ps1') or os.name == 'nt' else 'bash'
+    path = args.export_script or f"{name} - Run in Terminal to create{SCRIPT_EXTENSIONS[shell]}"
+
+    steps = []
+    for project in projects:
+        if project.run_mode == 'ready':
+            # A replay script cannot tell when a server is ready, so it would wait for it forever.
+            project.run_mode = 'skip'
+        steps += replay_steps(project.build_step_graph(), f"{project.project_name}:" if len(projects) > 1 else '')
+    description = "Replays: StartDotNet-v2.1.py " + ' '.join(shlex.quote(argument) for argument in sys.argv[1:])
+    export_script(path, steps, os.getcwd(), shell, args.jobs, description)
+    print(f"Wrote {path}: {len(steps)} steps for {len(projects)} project{'s' if len(projects) != 1 else ''}.")
+    if shell == 'bash':
+        print(f"Run it with: bash {shlex.quote(path)} [DIRECTORY]")
+    else:
+        print(f"Run it with: & '{path if os.path.isabs(path) else os.path.join('.', path)}' [-Root DIRECTORY]")
+
+def install_cancel_handler(cancel_token):
+    # The first Ctrl+C kills every running dotnet process tree (they run in their own process
+    # groups, so they do not see the signal themselves); a second Ctrl+C exits immediately.
+    def handle_interrupt(signum, frame):
+        print("\nCancelling... press Ctrl+C again to exit immediately.", file=sys.stderr)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        cancel_token.cancel()
+
+    signal.signal(signal.SIGINT, handle_interrupt)
+
+def main():
     parser = argparse.ArgumentParser(description="Set up a new .NET project.")
     parser.add_argument("project_name", nargs='?', default=None, help="The name of the project to create.")
     parser.add_argument("-d", "--directory", help="The directory where the project should be created.")
-    parser.add_argument("-t", "--type", choices=['console', 'webapi', 'mvc'], default='console', help="The type of .NET project to create.")
+    parser.add_argument("-t", "--type", choices=project_types, default='console', help="The type of .NET project to create.")
+    parser.add_argument("-m", "--manifest", metavar="PATH", help="Create a solution with several projects and the references between them, described by a .json or .toml manifest.")
+    parser.add_argument("-b", "--batch", nargs='+', metavar="NAME[:TYPE]", help="Create several projects at once, e.g. Api:webapi Core:classlib Tests:xunit. Projects without a type use --type.")
+    parser.add_argument("--prefix-output", action="store_true", help="Prefix every line of command output with the step that produced it.")
+    parser.add_argument("--tail-lines", type=int, default=DEFAULT_TAIL_LINES, help="How many of the last output lines to show when a command fails; the full output is saved to a log file.")
+    parser.add_argument("--no-template-cache", action="store_true", help="Always run `dotnet new` instead of reusing cached template output.")
+    parser.add_argument("--template-cache-dir", default=None, help="Where cached template output is stored (defaults to ~/.startdotnet/template-cache).")
+    parser.add_argument("--dotnet-sln", action="store_true", help="Add the project to the solution with `dotnet sln add` instead of editing the .sln file directly.")
+    parser.add_argument("-f", "--framework", default=None, help="The target framework, e.g. net8.0 (defaults to the installed SDK's framework).")
+    parser.add_argument("--dotnet-new", action="store_true", help="Create the solution and project with `dotnet new` instead of the built-in templates.")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=None, help="The number of projects to create at the same time in batch mode (defaults to the number of CPU cores).")
+    parser.add_argument("--asyncio", action="store_true", help="Run batch mode on an asyncio event loop instead of a thread pool; --jobs then limits the number of dotnet processes running at once.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds any single step may run before it and every process it started are killed.")
+    parser.add_argument("--step-timeout", type=parse_step_timeout, action="append", default=[], metavar="STEP=SECONDS",
+                        help="Timeout for one step (new_sln, new_project, sln_add, restore, build, run); may be repeated.")
+    parser.add_argument("--run-mode", choices=run_modes, default='auto',
+                        help="wait: run the app until it exits; ready: stop it cleanly once it reports it is listening; skip: do not run it; auto (default): ready for web projects, wait otherwise.")
+    parser.add_argument("--no-planner", action="store_true", help="Run `dotnet build` and `dotnet run` as they are, each restoring and building again, instead of restoring once and running with --no-build.")
+    parser.add_argument("--force", action="store_true", help="Run every step again, even steps whose files are unchanged since they last completed.")
+    parser.add_argument("--refresh-environment", action="store_true", help="Probe the installed .NET SDKs, runtimes and template packs again instead of using the cached result.")
+    parser.add_argument("--json-report", metavar="PATH", help="Write the wall time, CPU time and peak memory of every step to a JSON file.")
+    parser.add_argument("--no-build-cache", action="store_true", help="Always run `dotnet build` instead of reusing the output of an identical earlier build.")
+    parser.add_argument("--build-cache-dir", default=None, help="Where cached build output is stored (defaults to ~/.startdotnet/build-cache).")
+    parser.add_argument("--build-cache-size", type=int, default=1024, metavar="MB", help="The most disk space the build cache may use before the least recently used output is removed (default 1024).")
+    parser.add_argument("--pool", type=int, default=0, metavar="N", help="Keep N restored and built projects of each type ready and hand one out for each new project (default 0, off).")
+    parser.add_argument("--pool-dir", default=None, help="Where the project pool is kept (defaults to ~/.startdotnet/pool).")
+    parser.add_argument("--fill-pool", action="store_true", help="Fill the project pool for --type and --framework up to --pool projects, then exit.")
+    parser.add_argument("--serve", action="store_true", help="Keep running and create projects requested over a Unix socket (see startdotnet_client.py); --jobs limits how many run at once.")
+    parser.add_argument("--socket", default=None, help="The socket --serve listens on (defaults to ~/.startdotnet/startdotnet.sock).")
+    parser.add_argument("--stage", action="store_true", help="Create, restore and build new projects in a local scratch directory and move each into place once all its steps have succeeded; failed projects leave nothing behind.")
+    parser.add_argument("--stage-dir", default=None, help="The scratch directory --stage builds in (defaults to /dev/shm when it exists, otherwise the temporary directory).")
+    parser.add_argument("--export-script", nargs='?', const='', default=None, metavar="PATH",
+                        help="Instead of creating the project, batch or manifest, write a bash or PowerShell script that creates it without Python, running independent steps at the same time (defaults to '<name> - Run in Terminal to create.sh', or .ps1).")
+    parser.add_argument("--script-shell", choices=['bash', 'powershell'], default=None,
+                        help="The language of --export-script (defaults to powershell for a .ps1 path or on Windows, bash otherwise).")
+    parser.add_argument("--jsonl", action="store_true", help="Read one JSON project request per line from stdin and write one JSON result line per project to stdout as each finishes; --jobs limits how many run at once.")
     args = parser.parse_args()
 
-    if args.project_name is None:
+    environment = load_environment(refresh=args.refresh_environment)
+    # A replay script can be written for a machine with the SDK from one without it.
+    if not environment.sdk_found and args.export_script is None:
+        print("Error: The .NET SDK was not found. Install it from https://dotnet.microsoft.com/download and make sure `dotnet` is on your PATH.")
+        sys.exit(1)
+
+    if args.manifest and args.batch:
+        parser.error("--manifest and --batch cannot be used together.")
+    if args.manifest:
+        from solution_manifest import SolutionManifest, SolutionManifestError
+        try:
+            solution_manifest = SolutionManifest.load(os.path.abspath(args.manifest), project_types)
+        except SolutionManifestError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    if args.serve and (args.manifest or args.batch or args.project_name):
+        parser.error("--serve takes its projects from clients; do not give a project name, --batch or --manifest.")
+    if args.jsonl and (args.serve or args.manifest or args.batch or args.project_name):
+        parser.error("--jsonl reads its projects from stdin; do not give a project name, --batch, --manifest or --serve.")
+    if args.export_script is not None and (args.serve or args.jsonl or args.fill_pool):
+        parser.error("--export-script writes a script for a project name, --batch or --manifest; it cannot be used with --serve, --jsonl or --fill-pool.")
+    if args.fill_pool and args.pool < 1:
+        parser.error("--fill-pool needs --pool N with N of at least 1.")
+    if args.project_name is None and not args.batch and not args.manifest and not args.serve and not args.fill_pool and not args.jsonl:
+        # The greeting is only for people running StartDotNet by hand; scripts name their project.
+        ui = UserInterface()
+        ui.greeting()
         args.project_name = ui.get_project_name()
 
     if args.directory:
@@ -212,8 +1229,104 @@ def main():
             print(f"Error: The directory {args.directory} does not exist.")
             sys.exit(1)
 
-    project = DotNetProject(args.project_name, args.type)
-    project.execute_dotnet_commands()
+    template_cache = None
+    if not args.no_template_cache:
+        template_cache = TemplateCache(args.template_cache_dir, sdk_version=environment.sdk_version, pack_fingerprint=environment.pack_fingerprint)
+    build_cache = None
+    if not args.no_build_cache:
+        build_cache = BuildCache(args.build_cache_dir, max_bytes=args.build_cache_size * 1024 * 1024, sdk_version=environment.sdk_version)
+    project_options = dict(prefix_commands=args.prefix_output, tail_lines=args.tail_lines, template_cache=template_cache, build_cache=build_cache,
+                           native_sln=not args.dotnet_sln, native_templates=not args.dotnet_new, framework=args.framework,
+                           timeout=args.timeout, step_timeouts=dict(args.step_timeout), run_mode=args.run_mode,
+                           resume=not args.force, plan_steps=not args.no_planner, environment=environment)
+    if args.stage:
+        from staging import default_stage_root
+        project_options['stage_root'] = os.path.abspath(args.stage_dir) if args.stage_dir else default_stage_root()
+    if args.export_script is not None:
+        try:
+            export_replay_script(args, solution_manifest if args.manifest else None, project_options)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if args.pool > 0:
+        from project_pool import ProjectPool
+        # --serve refills on its own background threads; other modes hand the refill to a separate process.
+        fill_in_background = None if args.serve or args.fill_pool else pool_fill_starter(args)
+        project_pool = ProjectPool(lambda project_type, framework, directory: build_pool_scaffold(project_type, framework, directory, project_options),
+                                   args.pool_dir, args.pool, sdk_version=environment.sdk_version, pack_fingerprint=environment.pack_fingerprint,
+                                   options={'native_templates': not args.dotnet_new}, fill_in_background=fill_in_background)
+        project_options['project_pool'] = project_pool
+
+    if args.fill_pool:
+        built = project_options['project_pool'].fill(args.type, args.framework)
+        print(f"Added {built} {args.type} project{'s' if built != 1 else ''} to the pool.")
+        return
+
+    if args.serve:
+        from scaffold_server import ScaffoldServer, ScaffoldServerError
+        # Every request gets its own cancellation token, so a client that disconnects only
+        # cancels its own projects; Ctrl+C or SIGTERM stops the server and cancels them all.
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        server = ScaffoldServer(lambda request, output_callback: create_served_project(request, output_callback, project_options),
+                                args.socket, args.jobs)
+        try:
+            server.serve_forever()
+        except ScaffoldServerError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        except KeyboardInterrupt:
+            print(f"\nServer stopped after {server.requests_served} request{'s' if server.requests_served != 1 else ''}.")
+        return
+
+    cancel_token = CancellationToken()
+    install_cancel_handler(cancel_token)
+    project_options['cancel_token'] = cancel_token
+
+    if args.jsonl:
+        from jsonl_batch import run_jsonl_batch
+
+        def create_project(request, output_callback):
+            # Relative directories are relative to --directory (or the current directory).
+            request = dict(request, directory=os.path.abspath(request.get('directory') or os.getcwd()))
+            return create_served_project(request, output_callback, project_options)
+
+        succeeded, failed = run_jsonl_batch(create_project, sys.stdin, sys.stdout, args.jobs)
+        print(f"{succeeded} project{'s' if succeeded != 1 else ''} succeeded, {failed} failed.", file=sys.stderr)
+        sys.exit(0 if not failed else 1)
+
+    if args.batch:
+        try:
+            project_specs = BatchScaffolder.parse_project_specs(args.batch, args.type)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        scaffolder = BatchScaffolder(project_specs, args.jobs, **project_options)
+        report = MetricsReport()
+        if args.asyncio:
+            import asyncio
+            results = asyncio.run(scaffolder.run_async())
+        else:
+            results = scaffolder.run()
+        scaffolder.build_report(results, report).finish()
+        scaffolder.print_summary(results)
+        if build_cache is not None:
+            print(build_cache.describe())
+        print("\nStep timings (all projects):")
+        print(report.format_table())
+        if args.json_report:
+            report.write_json(args.json_report)
+            print(f"Timing report written to {args.json_report}")
+        sys.exit(0 if all(result.succeeded for result in results) else 1)
+
+    if args.manifest:
+        solution = MultiProjectSolution(solution_manifest, args.jobs, **project_options)
+        solution.execute_dotnet_commands(args.json_report)
+        return
+
+    project = DotNetProject(args.project_name, args.type, **project_options)
+    project.execute_dotnet_commands(args.json_report)
 
 #=====================================================================
 
@@ -0,0 +1,153 @@
+"""
+asyncio command runner for StartDotNet.
+
+execute_single_command starts a command with asyncio's subprocess support and streams its
+output line by line, like output_stream.run_streaming, but without a thread per process. All
+commands started through this module share one semaphore per event loop, which caps how many
+dotnet processes run at the same time no matter how many projects are being scaffolded.
+
+run_projects is the pipeline entry point for tools that embed StartDotNet in their own event
+loop: it scaffolds several DotNetProject instances concurrently on the caller's loop.
+
+Cancelling the task that awaits execute_single_command kills the command's whole process tree.
+The event loop reaps child processes itself, so commands run here report wall time but no CPU
+or memory usage.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import time
+import weakref
+from collections import deque
+
+from output_stream import CommandOutput, DEFAULT_TAIL_LINES, READER_JOIN_TIMEOUT
+from process_control import DEFAULT_GRACE_PERIOD, kill_process_tree, process_group_kwargs, send_terminate
+
+max_concurrent_processes = os.cpu_count() or 1
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_max_concurrent_processes(limit):
+    """
+    Sets how many commands may run at the same time. Takes effect for event loops that have not
+    started a command yet.
+    """
+    global max_concurrent_processes
+    max_concurrent_processes = max(1, int(limit))
+
+
+def get_process_semaphore():
+    """
+    Returns the semaphore limiting concurrent commands on the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(max_concurrent_processes)
+    return _semaphores[loop]
+
+
+async def stop_process_tree(process, grace_period=DEFAULT_GRACE_PERIOD):
+    """
+    Asks an asyncio process tree to shut down, killing it if it is still running after grace_period seconds.
+    """
+    send_terminate(process)
+    try:
+        return await asyncio.wait_for(process.wait(), grace_period)
+    except asyncio.TimeoutError:
+        kill_process_tree(process)
+        return await process.wait()
+
+
+async def execute_single_command(command, line_callback=None, log_path=None, tail_lines=DEFAULT_TAIL_LINES, timeout=None,
+                                 cancel_token=None, ready_pattern=None, grace_period=DEFAULT_GRACE_PERIOD, log_mode='w'):
+    """
+    Runs a command (a shell string or an argument list) and returns its CommandOutput.
+
+    line_callback is called with ("stdout" or "stderr", line) for each line as it arrives.
+    timeout, cancel_token, ready_pattern, grace_period and log_mode behave as in output_stream.run_streaming.
+    """
+    ready_regex = re.compile(ready_pattern) if ready_pattern else None
+    ready_event = asyncio.Event()
+    tails = {'stdout': deque(maxlen=tail_lines), 'stderr': deque(maxlen=tail_lines)}
+    log_file = None
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        log_file = open(log_path, log_mode, encoding='utf-8')
+
+    async def pump(stream_name, stream):
+        while True:
+            raw_line = await stream.readline()
+            if not raw_line:
+                break
+            line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+            tails[stream_name].append(line)
+            if log_file:
+                log_file.write(line + '\n')
+            if line_callback:
+                line_callback(stream_name, line)
+            if ready_regex and ready_regex.search(line):
+                ready_event.set()
+
+    timed_out = ready = False
+    pipe_kwargs = dict(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **process_group_kwargs())
+    try:
+        async with get_process_semaphore():
+            start_time = time.perf_counter()
+            if isinstance(command, str):
+                if sys.platform == 'win32':
+                    process = await asyncio.create_subprocess_shell(command, **pipe_kwargs)
+                else:
+                    process = await asyncio.create_subprocess_exec('/bin/sh', '-c', command, **pipe_kwargs)
+            else:
+                try:
+                    process = await asyncio.create_subprocess_exec(*command, **pipe_kwargs)
+                except OSError as e:
+                    return CommandOutput(127, [], [f"Could not start {command[0]}: {e}"], log_path)
+            if cancel_token:
+                cancel_token.register(process)
+            pumps = asyncio.ensure_future(asyncio.gather(pump('stdout', process.stdout), pump('stderr', process.stderr)))
+            exit_task = asyncio.ensure_future(process.wait())
+            ready_task = asyncio.ensure_future(ready_event.wait())
+            try:
+                done, _ = await asyncio.wait({exit_task, ready_task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if exit_task in done:
+                    returncode = exit_task.result()
+                elif ready_task in done:
+                    ready = True
+                    returncode = await stop_process_tree(process, grace_period)
+                else:
+                    timed_out = True
+                    kill_process_tree(process)
+                    returncode = await exit_task
+                wall_time = time.perf_counter() - start_time
+                stopped = ready or timed_out or (cancel_token is not None and cancel_token.cancelled)
+                try:
+                    await asyncio.wait_for(asyncio.shield(pumps), READER_JOIN_TIMEOUT if stopped else None)
+                except asyncio.TimeoutError:
+                    pumps.cancel()
+            except asyncio.CancelledError:
+                kill_process_tree(process)
+                pumps.cancel()
+                raise
+            finally:
+                ready_task.cancel()
+                if cancel_token:
+                    cancel_token.unregister(process)
+    finally:
+        if log_file:
+            log_file.close()
+
+    cancelled = cancel_token is not None and cancel_token.cancelled and not ready and returncode != 0
+    return CommandOutput(returncode, list(tails['stdout']), list(tails['stderr']), log_path,
+                         timed_out=timed_out, cancelled=cancelled, ready=ready, wall_time=wall_time)
+
+
+async def run_projects(projects):
+    """
+    Scaffolds DotNetProject instances concurrently and returns, for each project, the commands
+    that failed (an empty list means the project succeeded). Raised exceptions are returned in
+    place of the list so one broken project does not cancel the others.
+    """
+    return await asyncio.gather(*(project.run_dotnet_commands_async() for project in projects), return_exceptions=True)
@@ -0,0 +1,97 @@
+"""
+Clone benchmarks for StartDotNet.
+
+Compares the ways file_clone can copy a project tree: reflinks, hardlinks and plain copies,
+clone_tree's automatic choice, and shutil.copytree as the baseline. The tree imitates a built
+project: a few source files plus bin and obj folders with larger binaries.
+
+    python benchmarks/bench_clone.py --files 200 --file-size 262144 --directory /mnt/btrfs/tmp
+
+Reflinks need a file system that supports them (Btrfs, XFS, APFS and others); on any other the
+reflink case is reported as unsupported. --directory picks the file system to test.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from bench_common import load_results, measure, print_results, save_results
+
+import file_clone
+
+
+def create_tree(directory, file_count, file_size):
+    """
+    Writes a project-like tree: small source files, and file_count build outputs of file_size bytes.
+    """
+    for index in range(10):
+        path = os.path.join(directory, 'src', f"File{index}.cs")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(f"namespace Bench;\n\npublic class File{index} {{ }}\n")
+    for index in range(file_count):
+        folder = 'bin' if index % 2 else 'obj'
+        path = os.path.join(directory, folder, 'Debug', 'net8.0', f"Output{index}.dll")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(os.urandom(file_size))
+
+
+def method_supported(source_directory, method):
+    probe = os.path.join(os.path.dirname(source_directory), f"probe-{method}")
+    try:
+        file_clone.clone_file(os.path.join(source_directory, 'src', 'File0.cs'), probe, method)
+        return True
+    except OSError:
+        return False
+    finally:
+        if os.path.exists(probe):
+            os.remove(probe)
+
+
+def bench_clone(source_directory, repeat):
+    destination = os.path.join(os.path.dirname(source_directory), 'destination')
+
+    def remove_destination():
+        shutil.rmtree(destination, ignore_errors=True)
+
+    results = {'clone[shutil.copytree]': measure(lambda: shutil.copytree(source_directory, destination), repeat, remove_destination)}
+    for method in file_clone.METHODS:
+        if method_supported(source_directory, method):
+            results[f"clone[{method}]"] = measure(lambda: file_clone.clone_tree(source_directory, destination, method),
+                                                  repeat, remove_destination)
+        else:
+            print(f"clone[{method}]: not supported on this file system")
+    results['clone[automatic]'] = measure(lambda: file_clone.clone_tree(source_directory, destination), repeat, remove_destination)
+    remove_destination()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reflink, hardlink and copy cloning of project trees.")
+    parser.add_argument("--files", type=int, default=200, help="The number of build output files in the tree.")
+    parser.add_argument("--file-size", type=int, default=256 * 1024, help="The size of each build output file in bytes.")
+    parser.add_argument("--directory", default=None, help="Where the trees are created, which decides the file system tested (defaults to the temporary directory).")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times each case runs.")
+    parser.add_argument("--label", default='v2.1', help="The name stored with the results, e.g. a version or commit.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results to a JSON file.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with results saved by an earlier run.")
+    args = parser.parse_args()
+
+    settings = {'files': args.files, 'file_size': args.file_size, 'repeat': args.repeat}
+    with tempfile.TemporaryDirectory(prefix='startdotnet-bench-clone-', dir=args.directory) as work_directory:
+        source_directory = os.path.join(work_directory, 'source')
+        create_tree(source_directory, args.files, args.file_size)
+        results = bench_clone(source_directory, args.repeat)
+
+    baseline = load_results(args.compare) if args.compare else None
+    print_results(results, baseline)
+    if args.save:
+        save_results(args.save, args.label, settings, results)
+        print(f"Results saved to {args.save}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Shared helpers for the StartDotNet benchmarks.
+
+The benchmarks run offline: fake_dotnet.py is installed as `dotnet` in a temporary directory
+that is put first on PATH, so StartDotNet's own overhead can be measured without the .NET SDK.
+Results are saved as JSON and can be compared with the results of an earlier version.
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import stat
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIRECTORY = os.path.dirname(BENCHMARK_DIRECTORY)
+SCRIPT_PATH = os.path.join(SOURCE_DIRECTORY, 'StartDotNet-v2.1.py')
+
+if SOURCE_DIRECTORY not in sys.path:
+    sys.path.insert(0, SOURCE_DIRECTORY)
+
+
+def load_startdotnet():
+    """
+    Imports StartDotNet-v2.1.py, whose file name is not a valid module name.
+    """
+    spec = importlib.util.spec_from_file_location('startdotnet', SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def install_fake_dotnet(directory):
+    """
+    Installs fake_dotnet.py as an executable named dotnet in directory and returns its path.
+    """
+    if sys.platform == 'win32':
+        path = os.path.join(directory, 'dotnet.cmd')
+        with open(path, 'w') as file:
+            file.write(f'@"{sys.executable}" "{os.path.join(BENCHMARK_DIRECTORY, "fake_dotnet.py")}" %*\n')
+        return path
+    path = os.path.join(directory, 'dotnet')
+    with open(os.path.join(BENCHMARK_DIRECTORY, 'fake_dotnet.py')) as source, open(path, 'w') as target:
+        target.write(f"#!{sys.executable}\n")
+        target.write(source.read().split('\n', 1)[1])
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+@contextlib.contextmanager
+def fake_dotnet_environment(**settings):
+    """
+    Puts the fake dotnet first on PATH, applies FAKE_DOTNET_* settings (e.g. latency=0.1 sets
+    FAKE_DOTNET_LATENCY) and runs the block in a fresh working directory.
+    """
+    saved_environment = dict(os.environ)
+    saved_directory = os.getcwd()
+    bin_directory = tempfile.mkdtemp(prefix='startdotnet-fake-dotnet-')
+    work_directory = tempfile.mkdtemp(prefix='startdotnet-bench-')
+    try:
+        install_fake_dotnet(bin_directory)
+        os.environ['PATH'] = bin_directory + os.pathsep + os.environ.get('PATH', '')
+        for name, value in settings.items():
+            os.environ[f"FAKE_DOTNET_{name.upper()}"] = str(value)
+        os.chdir(work_directory)
+        yield work_directory
+    finally:
+        os.chdir(saved_directory)
+        os.environ.clear()
+        os.environ.update(saved_environment)
+        shutil.rmtree(bin_directory, ignore_errors=True)
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Discards everything printed inside the block.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def measure(function, repeat=3, setup=None):
+    """
+    Calls function repeat times (after setup, which is not timed) and returns timing statistics.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return {
+        'runs': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'max': max(timings),
+        'timings': timings,
+    }
+
+
+def save_results(path, label, settings, results):
+    data = {
+        'label': label,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': settings,
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2)
+
+
+def print_results(results, baseline=None):
+    """
+    Prints one line per benchmark case, with the change against a baseline results file if given.
+    """
+    baseline_results = baseline['results'] if baseline else {}
+    header = f"{'Case':<44} {'Median':>10} {'Min':>10}"
+    if baseline:
+        header += f" {baseline['label'] + ' median':>20} {'Change':>8}"
+    print(header)
+    for case, result in results.items():
+        line = f"{case:<44} {result['median'] * 1000:>8.1f}ms {result['min'] * 1000:>8.1f}ms"
+        previous = baseline_results.get(case)
+        if previous:
+            change = (result['median'] - previous['median']) / previous['median'] * 100 if previous['median'] else 0.0
+            line += f" {previous['median'] * 1000:>18.1f}ms {change:>+7.1f}%"
+        print(line)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
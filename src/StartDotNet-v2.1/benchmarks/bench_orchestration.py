@@ -0,0 +1,139 @@
+"""
+Orchestration benchmarks for StartDotNet.
+
+Measures how long StartDotNet itself takes around the dotnet CLI, using the fake dotnet from
+fake_dotnet.py so the numbers do not depend on the SDK:
+
+    pipeline    DotNetProject.execute_dotnet_commands for one project.
+    batch       BatchScaffolder.run (thread pool) and run_async (asyncio) for several projects.
+    output      Streaming a command's output at different output sizes.
+    stub        One call of the fake dotnet, the floor every command pays.
+
+Example:
+    python benchmarks/bench_orchestration.py --projects 1 8 32 --output-lines 100 10000 100000 \\
+        --latency 0.05 --save results/v2.1.json --compare results/v2.0.json
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from bench_common import fake_dotnet_environment, load_results, load_startdotnet, measure, print_results, quiet, save_results
+
+
+def clean_directory(directory):
+    def clean():
+        for entry in os.listdir(directory):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return clean
+
+
+def bench_stub(repeat):
+    return measure(lambda: subprocess.run(['dotnet', '--version'], stdout=subprocess.DEVNULL), repeat)
+
+
+def bench_pipeline(startdotnet, work_directory, repeat, cases):
+    results = {}
+    for label, options in cases:
+        def scaffold():
+            project = startdotnet.DotNetProject('BenchProject', 'console', **options)
+            with quiet():
+                try:
+                    project.execute_dotnet_commands()
+                except SystemExit:
+                    pass  # Simulated failures (--fail-rate) end the pipeline the same way a real failure does.
+        results[f"pipeline[{label}]"] = measure(scaffold, repeat, clean_directory(work_directory))
+    return results
+
+
+def bench_batch(startdotnet, work_directory, repeat, project_counts, jobs, options):
+    results = {}
+    for count in project_counts:
+        specs = [(f"Project{index}", 'console') for index in range(count)]
+
+        def run_threads():
+            scaffolder = startdotnet.BatchScaffolder(specs, jobs, **options)
+            with quiet():
+                scaffolder.run()
+
+        def run_asyncio():
+            scaffolder = startdotnet.BatchScaffolder(specs, jobs, **options)
+            with quiet():
+                asyncio.run(scaffolder.run_async())
+
+        results[f"batch[threads, {count} projects]"] = measure(run_threads, repeat, clean_directory(work_directory))
+        results[f"batch[asyncio, {count} projects]"] = measure(run_asyncio, repeat, clean_directory(work_directory))
+    return results
+
+
+def bench_output(work_directory, repeat, output_line_counts, tail_lines):
+    from output_stream import run_streaming
+
+    results = {}
+    log_path = os.path.join(work_directory, 'output.log')
+    for line_count in output_line_counts:
+        os.environ['FAKE_DOTNET_OUTPUT_LINES'] = str(line_count)
+        sink = open(os.devnull, 'w')
+
+        def stream():
+            run_streaming('dotnet build', lambda stream_name, line: sink.write(line + '\n'), log_path=log_path,
+                          tail_lines=tail_lines, shell=True)
+
+        def buffered():
+            subprocess.run('dotnet build', shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        results[f"output[streaming, {line_count} lines]"] = measure(stream, repeat)
+        results[f"output[buffered run(), {line_count} lines]"] = measure(buffered, repeat)
+        sink.close()
+    os.environ.pop('FAKE_DOTNET_OUTPUT_LINES', None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StartDotNet's orchestration overhead with a fake dotnet.")
+    parser.add_argument("--projects", type=int, nargs='+', default=[1, 8, 32], help="Project counts for the batch benchmarks.")
+    parser.add_argument("--output-lines", type=int, nargs='+', default=[100, 10000, 100000], help="Output sizes for the output benchmark.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds every fake dotnet command takes.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Probability that a fake dotnet command fails.")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker count for the batch benchmarks (defaults to the CPU count).")
+    parser.add_argument("--repeat", type=int, default=3, help="How many times each case runs.")
+    parser.add_argument("--only", choices=['stub', 'pipeline', 'batch', 'output'], nargs='+', help="Run only these benchmarks.")
+    parser.add_argument("--label", default='v2.1', help="The name stored with the results, e.g. a version or commit.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results to a JSON file.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with results saved by an earlier run.")
+    args = parser.parse_args()
+
+    selected = set(args.only or ['stub', 'pipeline', 'batch', 'output'])
+    settings = {'latency': args.latency, 'fail_rate': args.fail_rate, 'jobs': args.jobs, 'repeat': args.repeat}
+    results = {}
+    with fake_dotnet_environment(latency=args.latency, fail_rate=args.fail_rate, output_lines=5) as work_directory, \
+            tempfile.TemporaryDirectory(prefix='startdotnet-bench-cache-') as cache_directory:
+        startdotnet = load_startdotnet()
+        options = {'template_cache': None, 'run_mode': 'wait'}
+        if 'stub' in selected:
+            results['stub[dotnet --version]'] = bench_stub(args.repeat)
+        if 'pipeline' in selected:
+            results.update(bench_pipeline(startdotnet, work_directory, args.repeat, [
+                ('native', options),
+                ('template cache', dict(options, native_templates=False, native_sln=False,
+                                        template_cache=startdotnet.TemplateCache(cache_directory))),
+                ('dotnet cli', dict(options, native_templates=False, native_sln=False)),
+            ]))
+        if 'batch' in selected:
+            results.update(bench_batch(startdotnet, work_directory, args.repeat, args.projects, args.jobs, options))
+        if 'output' in selected:
+            results.update(bench_output(work_directory, args.repeat, args.output_lines, startdotnet.DEFAULT_TAIL_LINES))
+
+    baseline = load_results(args.compare) if args.compare else None
+    print_results(results, baseline)
+    if args.save:
+        save_results(args.save, args.label, settings, results)
+        print(f"Results saved to {args.save}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Spawn benchmarks for StartDotNet.
+
+Measures what starting a command costs StartDotNet, apart from the command itself, by starting a
+trivial program many times, as a batch of hundreds of projects does with its dotnet calls:
+
+    shell           A command string through `/bin/sh -c` (shell=True), as every step ran before.
+    popen           An argument vector through subprocess.Popen in a new session (vfork on
+                    Linux since Python 3.10, fork elsewhere).
+    posix_spawn     An argument vector through process_control.posix_spawn_process.
+    run_streaming   output_stream.run_streaming, with its reader threads, given a string with
+                    shell=True and given an argument vector (process_control.spawn_process
+                    picks Popen or posix_spawn for the platform).
+
+    python benchmarks/bench_spawn.py --commands 500
+    python benchmarks/bench_spawn.py --commands 200 --command dotnet --version
+
+--command picks the program (defaults to `true`); with a real dotnet the saving per call is the
+same but a smaller share of it.
+"""
+
+import argparse
+import shlex
+import subprocess
+import sys
+
+from bench_common import load_results, measure, print_results, save_results
+
+import output_stream
+import process_control
+
+
+def drain(process):
+    with process.stdout, process.stderr:
+        process.stdout.read()
+        process.stderr.read()
+    return process.wait()
+
+
+def spawn_shell(command_string):
+    return drain(subprocess.Popen(command_string, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  **process_control.process_group_kwargs()))
+
+
+def spawn_popen(argv):
+    return drain(subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **process_control.process_group_kwargs()))
+
+
+def spawn_posix(argv):
+    return drain(process_control.posix_spawn_process(argv))
+
+
+def bench_spawn(argv, commands, repeat):
+    command_string = shlex.join(argv)
+    # Resolved once, as spawn_process does, so every case searches PATH the same number of times.
+    resolved_argv = [process_control.resolve_executable(argv[0])] + argv[1:]
+    cases = {
+        'spawn[shell]': lambda: spawn_shell(command_string),
+        'spawn[popen]': lambda: spawn_popen(resolved_argv),
+        'spawn[posix_spawn]': lambda: spawn_posix(resolved_argv),
+        'run_streaming[shell]': lambda: output_stream.run_streaming(command_string, shell=True),
+        'run_streaming[argv]': lambda: output_stream.run_streaming(resolved_argv),
+    }
+    results = {}
+    for case, spawn in cases.items():
+        def run_all(spawn=spawn):
+            for _ in range(commands):
+                spawn()
+        results[f"{case} x{commands}"] = measure(run_all, repeat)
+    return results
+
+
+def print_per_command(results, commands):
+    print(f"\nPer command ({commands} commands):")
+    baseline = next(iter(results.values()))['median'] / commands
+    for case, result in results.items():
+        per_command = result['median'] / commands
+        print(f"  {case:<40} {per_command * 1000:>7.3f}ms  ({(per_command - baseline) * 1000:+.3f}ms against the shell)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark starting commands through a shell, Popen and posix_spawn.")
+    parser.add_argument("--commands", type=int, default=200, help="How many commands each case starts.")
+    parser.add_argument("--command", nargs=argparse.REMAINDER, default=['true'], help="The program and arguments to start (defaults to true).")
+    parser.add_argument("--repeat", type=int, default=3, help="How many times each case runs.")
+    parser.add_argument("--label", default='v2.1', help="The name stored with the results, e.g. a version or commit.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results to a JSON file.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with results saved by an earlier run.")
+    args = parser.parse_args()
+    if sys.platform == 'win32':
+        parser.error("This benchmark compares POSIX spawning methods.")
+
+    settings = {'commands': args.commands, 'command': args.command, 'repeat': args.repeat}
+    results = bench_spawn(args.command, args.commands, args.repeat)
+    baseline = load_results(args.compare) if args.compare else None
+    print_results(results, baseline)
+    print_per_command({case: result for case, result in results.items() if case.startswith('spawn[')}, args.commands)
+    print_per_command({case: result for case, result in results.items() if case.startswith('run_streaming[')}, args.commands)
+    if args.save:
+        save_results(args.save, args.label, settings, results)
+        print(f"Results saved to {args.save}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Startup benchmarks for StartDotNet.
+
+On CI agents StartDotNet is started thousands of times a day, so the time before its first
+dotnet command matters as much as the commands themselves. This benchmark measures:
+
+    imports         The modules loaded by `python -X importtime <script> --help`: their total
+                    import time and the slowest top-level imports.
+    first_command   Wall time from starting the script until the fake dotnet (see
+                    fake_dotnet.py) is first called, less the fake dotnet's own start-up.
+
+for StartDotNet-v2.1.py and for the command-line path of CARPS v6.0.
+
+    python benchmarks/bench_startup.py --repeat 20 --save startup.json
+    python benchmarks/bench_startup.py --repeat 20 --compare startup.json
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from bench_common import SCRIPT_PATH, SOURCE_DIRECTORY, fake_dotnet_environment, load_results, print_results, save_results
+
+CARPS_PATH = os.path.join(os.path.dirname(SOURCE_DIRECTORY), 'Older Releases', 'v1.0 CARPS', 'v6.0 Unstable', 'CARPS.py')
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """
+    Returns the total import time in seconds and (cumulative seconds, module) for every
+    top-level import, slowest first.
+    """
+    total = 0
+    top_level = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total += int(self_us)
+        if len(indent) == 1:
+            top_level.append((int(cumulative_us) / 1e6, module))
+    return total / 1e6, sorted(top_level, reverse=True)
+
+
+def bench_imports(script_path, repeat):
+    totals = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', script_path, '--help'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        total, top_level = parse_importtime(completed.stderr)
+        totals.append(total)
+    return timing_result(totals), top_level
+
+
+def first_stamp(stamp_path):
+    with open(stamp_path) as file:
+        return min(float(line.split(' ', 1)[0]) for line in file if line.strip())
+
+
+def time_to_first_command(command, stamp_path, work_directory):
+    if os.path.exists(stamp_path):
+        os.remove(stamp_path)
+    start_time = time.time()
+    subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=work_directory)
+    elapsed = first_stamp(stamp_path) - start_time
+    for entry in os.listdir(work_directory):
+        shutil.rmtree(os.path.join(work_directory, entry), ignore_errors=True)
+    return elapsed
+
+
+def timing_result(timings):
+    return {'runs': len(timings), 'min': min(timings), 'median': statistics.median(timings), 'max': max(timings), 'timings': timings}
+
+
+def bench_first_command(scripts, repeat):
+    results = {}
+    with fake_dotnet_environment(latency=0) as work_directory:
+        stamp_path = os.path.join(os.path.dirname(work_directory), f"startdotnet-stamp-{os.getpid()}")
+        os.environ['FAKE_DOTNET_STAMP'] = stamp_path
+        os.environ['HOME'] = os.path.join(work_directory, 'home')  # Keeps the caches out of the real home directory.
+        project_directory = os.path.join(work_directory, 'projects')
+        os.makedirs(project_directory)
+        try:
+            # The fake dotnet is a Python script; its own start-up is not StartDotNet's.
+            dotnet_path = shutil.which('dotnet')
+            stub = timing_result([time_to_first_command([dotnet_path, '--version'], stamp_path, project_directory) for _ in range(repeat)])
+            for label, command in scripts.items():
+                time_to_first_command(command, stamp_path, project_directory)  # Warms the environment cache.
+                timings = [time_to_first_command(command, stamp_path, project_directory) - stub['median'] for _ in range(repeat)]
+                results[f"first_command[{label}]"] = timing_result(timings)
+        finally:
+            if os.path.exists(stamp_path):
+                os.remove(stamp_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StartDotNet's import time and time to its first dotnet command.")
+    parser.add_argument("--repeat", type=int, default=10, help="How many times each case runs.")
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list.")
+    parser.add_argument("--label", default='v2.1', help="The name stored with the results, e.g. a version or commit.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results to a JSON file.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with results saved by an earlier run.")
+    args = parser.parse_args()
+
+    scripts = {'startdotnet': [sys.executable, SCRIPT_PATH, 'BenchProject', '--run-mode', 'skip']}
+    script_paths = {'startdotnet': SCRIPT_PATH}
+    if os.path.exists(CARPS_PATH):
+        scripts['carps'] = [sys.executable, CARPS_PATH, 'BenchProject']
+        script_paths['carps'] = CARPS_PATH
+
+    results = {}
+    slowest_imports = {}
+    for label, script_path in script_paths.items():
+        results[f"imports[{label}]"], slowest_imports[label] = bench_imports(script_path, args.repeat)
+    results.update(bench_first_command(scripts, args.repeat))
+
+    baseline = load_results(args.compare) if args.compare else None
+    print_results(results, baseline)
+    for label, top_level in slowest_imports.items():
+        print(f"\nSlowest imports ({label}):")
+        for seconds, module in top_level[:args.top]:
+            print(f"  {module:<40} {seconds * 1000:>7.1f}ms")
+    if args.save:
+        save_results(args.save, args.label, {'repeat': args.repeat}, results)
+        print(f"Results saved to {args.save}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
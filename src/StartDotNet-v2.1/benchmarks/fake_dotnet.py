@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+A stand-in for the `dotnet` executable, used by the StartDotNet benchmarks.
+
+It understands the commands StartDotNet runs (new, sln, restore, build, run, --version,
+--list-sdks, --list-runtimes), creates the files `dotnet new`, `dotnet restore` and
+`dotnet build` would create, and is configured through environment variables:
+
+    FAKE_DOTNET_LATENCY          Seconds every command sleeps (default 0.05).
+    FAKE_DOTNET_LATENCY_<CMD>    Latency for one command, e.g. FAKE_DOTNET_LATENCY_BUILD=0.5.
+    FAKE_DOTNET_OUTPUT_LINES     Lines every command prints (default 5).
+    FAKE_DOTNET_OUTPUT_LINES_<CMD>  Lines printed by one command.
+    FAKE_DOTNET_LINE_LENGTH      Characters per output line (default 80).
+    FAKE_DOTNET_FAIL             Comma-separated commands that exit with code 1, e.g. build,run.
+    FAKE_DOTNET_FAIL_RATE        Probability (0-1) that any command fails.
+    FAKE_DOTNET_SDK_VERSION      Version printed by --version (default 8.0.100).
+    FAKE_DOTNET_STAMP            A file every command appends its start time and arguments to.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+
+
+def option(arguments, *flags):
+    for flag in flags:
+        if flag in arguments and arguments.index(flag) + 1 < len(arguments):
+            return arguments[arguments.index(flag) + 1]
+    return None
+
+
+def setting(name, command, default):
+    return os.environ.get(f"FAKE_DOTNET_{name}_{command.upper()}", os.environ.get(f"FAKE_DOTNET_{name}", default))
+
+
+def create_template_output(arguments):
+    template = arguments[1] if len(arguments) > 1 else 'console'
+    output_directory = option(arguments, '-o', '--output') or os.getcwd()
+    name = option(arguments, '-n', '--name') or os.path.basename(os.path.normpath(output_directory))
+    os.makedirs(output_directory, exist_ok=True)
+    if template == 'sln':
+        with open(os.path.join(output_directory, f"{name}.sln"), 'w') as file:
+            file.write("\nMicrosoft Visual Studio Solution File, Format Version 12.00\n"
+                       "Global\n\tGlobalSection(SolutionConfigurationPlatforms) = preSolution\n"
+                       "\t\tDebug|Any CPU = Debug|Any CPU\n\t\tRelease|Any CPU = Release|Any CPU\n"
+                       "\tEndGlobalSection\nEndGlobal\n")
+    else:
+        with open(os.path.join(output_directory, f"{name}.csproj"), 'w') as file:
+            file.write(f'<Project Sdk="Microsoft.NET.Sdk">\n  <PropertyGroup>\n    <RootNamespace>{name}</RootNamespace>\n'
+                       f'    <TargetFramework>net8.0</TargetFramework>\n  </PropertyGroup>\n</Project>\n')
+        with open(os.path.join(output_directory, 'Program.cs'), 'w') as file:
+            file.write('Console.WriteLine("Hello, World!");\n')
+    print(f'The template "{template}" was created successfully.')
+
+
+def project_directory_argument(arguments):
+    project_path = next((argument for argument in arguments[1:] if not argument.startswith('-')), os.getcwd())
+    return project_path if os.path.isdir(project_path) else os.path.dirname(os.path.abspath(project_path))
+
+
+def project_directories_argument(arguments):
+    """
+    Returns the directories of the projects a command works on: the project given, or every
+    project listed in the solution given.
+    """
+    target = next((argument for argument in arguments[1:] if not argument.startswith('-')), None)
+    if target is None or not target.lower().endswith('.sln'):
+        return [project_directory_argument(arguments)]
+    solution_directory = os.path.dirname(os.path.abspath(target))
+    with open(target) as file:
+        project_paths = re.findall(r'^Project\("[^"]*"\) = "[^"]*", "([^"]+\.\w+proj)"', file.read(), re.MULTILINE)
+    return [os.path.dirname(os.path.join(solution_directory, path.replace('\\', os.sep))) for path in project_paths]
+
+
+def create_restore_output(arguments):
+    for project_directory in project_directories_argument(arguments):
+        obj_directory = os.path.join(project_directory, 'obj')
+        os.makedirs(obj_directory, exist_ok=True)
+        # Like the real file, it records the project's absolute path.
+        project_path = os.path.join(os.path.abspath(project_directory), os.path.basename(os.path.normpath(project_directory)) + '.csproj')
+        with open(os.path.join(obj_directory, 'project.assets.json'), 'w') as file:
+            file.write(json.dumps({'version': 3, 'project': {'restore': {'projectPath': project_path}}}) + '\n')
+
+
+def create_build_output(arguments):
+    if '--no-restore' not in arguments:
+        create_restore_output(arguments)
+    for project_directory in project_directories_argument(arguments):
+        output_directory = os.path.join(project_directory, 'bin', 'Debug', 'net8.0')
+        os.makedirs(output_directory, exist_ok=True)
+        with open(os.path.join(output_directory, os.path.basename(os.path.normpath(project_directory)) + '.dll'), 'wb') as file:
+            file.write(b'MZ fake assembly\n')
+
+
+def main(arguments):
+    if os.environ.get('FAKE_DOTNET_STAMP'):
+        with open(os.environ['FAKE_DOTNET_STAMP'], 'a') as file:
+            file.write(f"{time.time()} {' '.join(arguments)}\n")
+    command = arguments[0].lstrip('-').replace('-', '_') if arguments else 'help'
+    time.sleep(float(setting('LATENCY', command, '0.05')))
+
+    failing = [name.strip() for name in os.environ.get('FAKE_DOTNET_FAIL', '').split(',') if name.strip()]
+    if command in failing or random.random() < float(os.environ.get('FAKE_DOTNET_FAIL_RATE', '0')):
+        print(f"error: simulated failure of 'dotnet {' '.join(arguments)}'", file=sys.stderr)
+        return 1
+
+    if command == 'version':
+        print(os.environ.get('FAKE_DOTNET_SDK_VERSION', '8.0.100'))
+        return 0
+    if command == 'list_sdks':
+        print(f"{os.environ.get('FAKE_DOTNET_SDK_VERSION', '8.0.100')} [/usr/share/dotnet/sdk]")
+        return 0
+    if command == 'list_runtimes':
+        runtime_version = os.environ.get('FAKE_DOTNET_SDK_VERSION', '8.0.100').rsplit('.', 1)[0] + '.0'
+        print(f"Microsoft.AspNetCore.App {runtime_version} [/usr/share/dotnet/shared/Microsoft.AspNetCore.App]")
+        print(f"Microsoft.NETCore.App {runtime_version} [/usr/share/dotnet/shared/Microsoft.NETCore.App]")
+        return 0
+    if command == 'new':
+        create_template_output(arguments)
+    elif command == 'restore':
+        create_restore_output(arguments)
+    elif command == 'build':
+        create_build_output(arguments)
+
+    line_length = int(os.environ.get('FAKE_DOTNET_LINE_LENGTH', '80'))
+    filler = ('x' * line_length)
+    out = sys.stdout
+    for index in range(int(setting('OUTPUT_LINES', command, '5'))):
+        out.write(f"{command} {index:>8} {filler}"[:line_length] + "\n")
+    if command == 'run':
+        out.write("Hello, World!\n")
+    out.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,251 @@
+"""
+Content-addressed build output cache for StartDotNet.
+
+Fresh scaffolds are very often identical: every solution gets an Api, a Core and a Tests
+project, from the same templates, with the same packages. The build cache stores the bin and
+obj output of a build under a hash of everything the build reads:
+
+    - the files of every project that is built (sources and project files; bin, obj and
+      launchSettings.json excluded);
+    - each project's restored package graph (obj/project.assets.json), with the solution's path
+      taken out so the same project elsewhere has the same key;
+    - Directory.Build.props, Directory.Build.targets, Directory.Packages.props, global.json and
+      NuGet.config in the solution directory;
+    - the SDK version and the build command.
+
+When a later build has the same key, its output is cloned out of the cache (see file_clone),
+the absolute paths MSBuild wrote into obj are pointed at the new location, and `dotnet build`
+does not run. Files above the solution directory (e.g. a Directory.Build.props in an enclosing
+repository) are not part of the key.
+
+Entries are evicted least-recently-used first once the cache grows past its entry or size cap.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from file_clone import clone_tree
+from step_manifest import IGNORED_DIRECTORIES, hash_path
+from template_cache import get_tree_size
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.startdotnet', 'build-cache')
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_VERSION = 1
+
+ROOT_PLACEHOLDER = '<root>'
+# Project files the build does not read; launchSettings.json gets random ports in every scaffold.
+IGNORED_INPUT_FILES = ('launchSettings.json',)
+SOLUTION_BUILD_FILES = ['Directory.Build.props', 'Directory.Build.targets', 'Directory.Packages.props', 'global.json', 'NuGet.config']
+
+# Files in obj that can hold the absolute path of the project; everything else in obj and bin is
+# copied unchanged.
+TEXT_OUTPUT_EXTENSIONS = ('.json', '.txt', '.props', '.targets', '.cs', '.vb', '.fs', '.editorconfig')
+
+
+def path_variants(path):
+    # Paths appear as they are and, in JSON files, with escaped backslashes.
+    return [path, json.dumps(path)[1:-1]]
+
+
+def retarget_output(directory, old_root, new_root):
+    """
+    Replaces old_root with new_root in the text files below directory.
+    """
+    replacements = list(zip(path_variants(old_root), path_variants(new_root)))
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            if not file_name.endswith(TEXT_OUTPUT_EXTENSIONS):
+                continue
+            path = os.path.join(root, file_name)
+            try:
+                with open(path, 'r', encoding='utf-8', newline='') as file:
+                    content = file.read()
+            except (UnicodeDecodeError, OSError):
+                continue
+            new_content = content
+            for old, new in replacements:
+                new_content = new_content.replace(old, new)
+            if new_content != content:
+                with open(path, 'w', encoding='utf-8', newline='') as file:
+                    file.write(new_content)
+
+
+class BuildCache:
+    """
+    The BuildCache class stores build output (bin and obj) by a hash of the build's inputs and
+    restores it for later builds with the same inputs.
+
+    Attributes:
+        cache_directory (str): Where entries are stored.
+        max_entries (int): The most entries kept before the least recently used are evicted.
+        max_bytes (int): The most bytes kept before the least recently used are evicted.
+        sdk_version (str): The SDK version that is part of every key.
+        hits (int): How many builds were restored from the cache.
+        misses (int): How many builds had to run.
+        stores (int): How many builds were added to the cache.
+
+    Methods:
+        cache_key: Returns the key for building some project directories with a command.
+        lookup: Returns the entry directory for a key, or None.
+        restore: Clones an entry's output into the project directories.
+        store: Saves the output of a build under its key.
+        evict: Removes least recently used entries until the cache fits its caps.
+        describe: Returns a one-line summary of the hits and misses.
+        clear: Removes every entry.
+    """
+
+    def __init__(self, cache_directory=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, sdk_version=None):
+        self.cache_directory = cache_directory or DEFAULT_CACHE_DIRECTORY
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sdk_version = sdk_version
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+
+    def cache_key(self, root, project_directories, command):
+        """
+        Hashes the inputs of building project_directories (relative to the solution directory
+        root) with command.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'version': CACHE_VERSION, 'sdk_version': self.sdk_version,
+                                  'command': command.replace(root, ROOT_PLACEHOLDER)}).encode())
+        for relative_directory in sorted(project_directories):
+            directory = os.path.join(root, relative_directory)
+            directory_hash = hash_path(directory, IGNORED_DIRECTORIES, IGNORED_INPUT_FILES)
+            digest.update(f"\0{relative_directory.replace(os.sep, '/')}\0{directory_hash}\0".encode())
+            assets_path = os.path.join(directory, 'obj', 'project.assets.json')
+            try:
+                with open(assets_path, 'r', encoding='utf-8') as file:
+                    assets = file.read()
+            except (OSError, UnicodeDecodeError):
+                assets = ''
+            for variant in path_variants(root):
+                assets = assets.replace(variant, ROOT_PLACEHOLDER)
+            digest.update(hashlib.sha256(assets.encode()).digest())
+        for file_name in SOLUTION_BUILD_FILES:
+            digest.update(f"\0{file_name}\0{hash_path(os.path.join(root, file_name))}".encode())
+        return digest.hexdigest()[:32]
+
+    def _entry_directory(self, key):
+        return os.path.join(self.cache_directory, key)
+
+    def lookup(self, key):
+        entry_directory = self._entry_directory(key)
+        metadata_path = os.path.join(entry_directory, 'entry.json')
+        if not os.path.isfile(metadata_path):
+            return None
+        os.utime(metadata_path)  # Mark as recently used for LRU eviction.
+        return entry_directory
+
+    def restore(self, key, root, project_directories):
+        """
+        Clones the output stored under key into the project directories below root. Returns
+        True on a hit, False on a miss (or if the entry could not be read).
+        """
+        entry_directory = self.lookup(key)
+        if entry_directory is not None:
+            try:
+                with open(os.path.join(entry_directory, 'entry.json'), 'r', encoding='utf-8') as file:
+                    metadata = json.load(file)
+                for relative_directory in project_directories:
+                    for output_name in ('bin', 'obj'):
+                        source = os.path.join(entry_directory, 'tree', relative_directory, output_name)
+                        if os.path.isdir(source):
+                            target = os.path.join(root, relative_directory, output_name)
+                            clone_tree(source, target, dirs_exist_ok=True)
+                            if output_name == 'obj' and metadata['root'] != root:
+                                retarget_output(target, metadata['root'], root)
+            except (OSError, ValueError, KeyError):
+                entry_directory = None
+        with self._lock:
+            if entry_directory is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry_directory is not None
+
+    def store(self, key, root, project_directories):
+        """
+        Saves bin and the build output in obj (not the restore files beside it) of every project
+        directory under key.
+        """
+        os.makedirs(self.cache_directory, exist_ok=True)
+        staging_directory = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_directory)
+        try:
+            for relative_directory in project_directories:
+                directory = os.path.join(root, relative_directory)
+                tree_directory = os.path.join(staging_directory, 'tree', relative_directory)
+                if os.path.isdir(os.path.join(directory, 'bin')):
+                    clone_tree(os.path.join(directory, 'bin'), os.path.join(tree_directory, 'bin'))
+                obj_directory = os.path.join(directory, 'obj')
+                if os.path.isdir(obj_directory):
+                    for entry in os.scandir(obj_directory):
+                        if entry.is_dir():
+                            clone_tree(entry.path, os.path.join(tree_directory, 'obj', entry.name))
+            metadata = {
+                'root': root,
+                'projects': list(project_directories),
+                'sdk_version': self.sdk_version,
+                'size': get_tree_size(staging_directory),
+                'created': time.time(),
+            }
+            with open(os.path.join(staging_directory, 'entry.json'), 'w', encoding='utf-8') as file:
+                json.dump(metadata, file, indent=2)
+            try:
+                os.rename(staging_directory, self._entry_directory(key))
+            except OSError:
+                shutil.rmtree(staging_directory, ignore_errors=True)  # Another build stored the same output first.
+        except BaseException:
+            shutil.rmtree(staging_directory, ignore_errors=True)
+            raise
+        with self._lock:
+            self.stores += 1
+        self.evict(keep=key)
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_directory):
+            return entries
+        for entry in os.scandir(self.cache_directory):
+            metadata_path = os.path.join(entry.path, 'entry.json')
+            if entry.name.startswith('.') or not os.path.isfile(metadata_path):
+                continue
+            try:
+                with open(metadata_path) as file:
+                    size = json.load(file).get('size', 0)
+            except (OSError, ValueError):
+                size = 0
+            entries.append((os.path.getmtime(metadata_path), size, entry.path))
+        return entries
+
+    def evict(self, keep=None):
+        with self._lock:
+            entries = sorted(self._entries())
+            entry_count = len(entries)
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if entry_count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                if os.path.basename(path) == keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                entry_count -= 1
+                total_bytes -= size
+
+    def describe(self):
+        entries = self._entries()
+        size_mb = sum(size for _, size, _ in entries) / (1024 * 1024)
+        return (f"Build cache: {self.hits} hit{'s' if self.hits != 1 else ''}, {self.misses} miss{'es' if self.misses != 1 else ''}, "
+                f"{self.stores} stored; {len(entries)} entr{'ies' if len(entries) != 1 else 'y'} using {size_mb:.1f} of {self.max_bytes / (1024 * 1024):.0f}MB.")
+
+    def clear(self):
+        shutil.rmtree(self.cache_directory, ignore_errors=True)
@@ -0,0 +1,61 @@
+"""
+Command lines for StartDotNet.
+
+Every dotnet step is described by a CommandLine: the argument vectors it runs, plus the text
+shown in the output, the step manifest and the summaries. Commands are started without a shell
+(see process_control.spawn_process), so a path with spaces or quotes in it is passed to dotnet as
+it is, and no `/bin/sh` is started in front of every dotnet call.
+
+    dotnet('build', csproj_path, '--no-restore')
+    join_commands([dotnet('sln', solution_path, 'add', path) for path in paths])
+"""
+
+import os
+import re
+
+# Arguments made of these characters are shown without quotes.
+PLAIN_ARGUMENT = re.compile(r'^[\w@%+=:,./-]+$')
+
+
+def format_argument(argument):
+    # Absolute paths are always quoted, as the commands were written before they were argument vectors.
+    if PLAIN_ARGUMENT.match(argument) and not os.path.isabs(argument):
+        return argument
+    return '"' + argument.replace('"', '\\"') + '"'
+
+
+def format_argv(argv):
+    return ' '.join(format_argument(argument) for argument in argv)
+
+
+class CommandLine(str):
+    """
+    A command as it is shown, carrying the argument vectors it runs. It is a str, so it can be
+    logged, compared with the commands in a step manifest and written to JSON reports as before.
+
+    Attributes:
+        argvs (tuple): The argument vectors, run one after another until one fails.
+    """
+
+    def __new__(cls, *argvs):
+        argvs = tuple(tuple(str(argument) for argument in argv) for argv in argvs)
+        command = super().__new__(cls, ' && '.join(format_argv(argv) for argv in argvs))
+        command.argvs = argvs
+        return command
+
+    def __reduce__(self):
+        return (CommandLine, self.argvs)
+
+
+def dotnet(*arguments):
+    """
+    Returns the CommandLine that runs the .NET CLI with arguments.
+    """
+    return CommandLine(('dotnet',) + arguments)
+
+
+def join_commands(commands):
+    """
+    Returns a CommandLine that runs commands one after another, stopping at the first that fails.
+    """
+    return CommandLine(*(argv for command in commands for argv in command.argvs))
@@ -0,0 +1,250 @@
+"""
+Cached .NET environment discovery for StartDotNet.
+
+probe_environment finds the dotnet executable, the installed SDKs and runtimes, the installed
+template packs and the operating system. Running `dotnet --list-sdks` and `--list-runtimes`
+costs a few hundred milliseconds, so load_environment keeps the result in
+~/.startdotnet/environment.json and reuses it until it is older than the TTL or the .NET
+installation changes. A change is noticed from the dotnet path and the modification times of the
+install directories (sdk, shared, templates) and the template pack directories, which change
+whenever an SDK, runtime or template pack is installed or removed. Checking them needs a few
+stat calls and no processes.
+"""
+
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+from template_cache import get_template_pack_directories, get_template_pack_fingerprint
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.startdotnet', 'environment.json')
+DEFAULT_TTL = 24 * 60 * 60
+CACHE_VERSION = 1
+
+LIST_PATTERN = re.compile(r'^(?:(\S+)\s+)?(\d+\.\d+\.\d+\S*)\s+\[(.+)\]$')
+
+
+def version_key(version):
+    """
+    Sorts versions numerically, with previews before the release they precede.
+    """
+    release, _, prerelease = version.partition('-')
+    return [int(part) if part.isdigit() else 0 for part in release.split('.')], not prerelease, prerelease
+
+
+def get_dotnet_root(dotnet_path=None):
+    dotnet_path = dotnet_path or shutil.which('dotnet')
+    return os.path.dirname(os.path.realpath(dotnet_path)) if dotnet_path else None
+
+
+def get_install_stamp(dotnet_path=None):
+    """
+    Returns the values that change when SDKs, runtimes or template packs are installed or removed.
+    """
+    dotnet_path = dotnet_path or shutil.which('dotnet')
+    stamp = {'dotnet_path': os.path.realpath(dotnet_path) if dotnet_path else None, 'mtimes': {}}
+    dotnet_root = get_dotnet_root(dotnet_path)
+    if dotnet_root:
+        directories = [dotnet_root] + [os.path.join(dotnet_root, name) for name in ('sdk', 'templates', 'shared')]
+        shared_directory = os.path.join(dotnet_root, 'shared')
+        if os.path.isdir(shared_directory):
+            directories.extend(entry.path for entry in os.scandir(shared_directory) if entry.is_dir())
+        for directory in directories:
+            if os.path.isdir(directory):
+                stamp['mtimes'][directory] = os.stat(directory).st_mtime_ns
+    stamp['packs'] = get_template_pack_fingerprint()
+    return stamp
+
+
+def parse_dotnet_list(output):
+    """
+    Parses `dotnet --list-sdks` ("8.0.100 [path]") or `dotnet --list-runtimes`
+    ("Microsoft.NETCore.App 8.0.0 [path]") output into dictionaries.
+    """
+    entries = []
+    for line in output.splitlines():
+        match = LIST_PATTERN.match(line.strip())
+        if match:
+            name, version, path = match.groups()
+            entry = {'version': version, 'path': path}
+            if name:
+                entry['name'] = name
+            entries.append(entry)
+    return entries
+
+
+def get_template_packs():
+    """
+    Returns the file names of the installed template packages (.nupkg).
+    """
+    packs = set()
+    for directory in get_template_pack_directories():
+        for root, _, file_names in os.walk(directory):
+            packs.update(file_name for file_name in file_names if file_name.endswith('.nupkg'))
+    return sorted(packs)
+
+
+def probe_environment():
+    """
+    Asks the .NET CLI which SDKs and runtimes are installed and returns everything as a dictionary.
+    """
+    dotnet_path = shutil.which('dotnet')
+    environment = {
+        'os': {'system': platform.system(), 'release': platform.release(), 'machine': platform.machine()},
+        'dotnet_path': dotnet_path,
+        'dotnet_root': get_dotnet_root(dotnet_path),
+        'sdks': [],
+        'runtimes': [],
+        'template_packs': get_template_packs(),
+        'pack_fingerprint': get_template_pack_fingerprint(),
+    }
+    if dotnet_path:
+        # Both lists are requested at the same time; each starts the dotnet host once.
+        processes = {}
+        for key, argument in (('sdks', '--list-sdks'), ('runtimes', '--list-runtimes')):
+            try:
+                processes[key] = subprocess.Popen([dotnet_path, argument], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            except OSError:
+                continue
+        for key, process in processes.items():
+            output, _ = process.communicate()
+            if process.returncode == 0:
+                environment[key] = sorted(parse_dotnet_list(output.decode(errors='replace')), key=lambda entry: version_key(entry['version']))
+    return environment
+
+
+def find_global_json(directory):
+    """
+    Returns the SDK version pinned by the nearest global.json at or above directory, or None.
+    """
+    directory = os.path.abspath(directory)
+    while True:
+        path = os.path.join(directory, 'global.json')
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r', encoding='utf-8-sig') as file:
+                    return json.load(file).get('sdk', {}).get('version')
+            except (OSError, ValueError, AttributeError):
+                return None
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+class DotNetEnvironment:
+    """
+    The DotNetEnvironment class gives access to the probed .NET environment.
+
+    Attributes:
+        data (dict): The probe result, as stored in the cache.
+        from_cache (bool): Whether the data was read from the cache instead of probed.
+
+    Methods:
+        sdk_versions: Returns the versions of the installed SDKs, oldest first.
+        runtime_versions: Returns the installed versions of a shared runtime, oldest first.
+        sdk_version_for: Returns the SDK `dotnet` uses in a directory, honouring global.json.
+        has_runtime_for: Whether a runtime for a target framework (e.g. net8.0) is installed.
+    """
+
+    def __init__(self, data, from_cache=False):
+        self.data = data
+        self.from_cache = from_cache
+
+    @property
+    def os_name(self):
+        return self.data['os']['system']
+
+    @property
+    def dotnet_path(self):
+        return self.data.get('dotnet_path')
+
+    @property
+    def template_packs(self):
+        return self.data.get('template_packs', [])
+
+    @property
+    def pack_fingerprint(self):
+        return self.data.get('pack_fingerprint')
+
+    @property
+    def sdk_version(self):
+        return self.sdk_version_for(os.getcwd())
+
+    @property
+    def sdk_found(self):
+        return bool(self.data.get('sdks'))
+
+    def sdk_versions(self):
+        return [sdk['version'] for sdk in self.data.get('sdks', [])]
+
+    def runtime_versions(self, name='Microsoft.NETCore.App'):
+        return [runtime['version'] for runtime in self.data.get('runtimes', []) if runtime.get('name') == name]
+
+    def sdk_version_for(self, directory):
+        versions = self.sdk_versions()
+        if not versions:
+            return None
+        pinned = find_global_json(directory)
+        if pinned in versions:
+            return pinned
+        if pinned:
+            # The default rollForward policy (latestPatch) stays within the pinned feature band.
+            band = pinned[:pinned.rfind('.') + 2] if '.' in pinned else pinned
+            matching = [version for version in versions if version.startswith(band)]
+            if matching:
+                return matching[-1]
+        return versions[-1]
+
+    def has_runtime_for(self, framework):
+        match = re.match(r'^net(\d+)\.(\d+)', framework or '')
+        if not match:
+            return True  # .NET Framework and netstandard targets are not checked.
+        prefix = f"{match.group(1)}.{match.group(2)}."
+        return any(version.startswith(prefix) for version in self.runtime_versions())
+
+
+def load_environment(cache_path=None, ttl=DEFAULT_TTL, refresh=False):
+    """
+    Returns the DotNetEnvironment, from the cache when it is younger than ttl seconds and the
+    .NET installation has not changed since, otherwise by probing (and updating the cache).
+    """
+    cache_path = cache_path or DEFAULT_CACHE_PATH
+    stamp = get_install_stamp()
+    if not refresh:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if (cached.get('version') == CACHE_VERSION and cached.get('stamp') == stamp
+                    and time.time() - cached.get('probed_at', 0) < ttl):
+                return DotNetEnvironment(cached['environment'], from_cache=True)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    environment = probe_environment()
+    # An empty probe is not cached, so installing the SDK is noticed on the next run.
+    if environment['sdks']:
+        try:
+            save_environment(cache_path, stamp, environment)
+        except OSError:
+            pass  # The cache is an optimisation; a read-only home directory just means probing every run.
+    return DotNetEnvironment(environment)
+
+
+def save_environment(cache_path, stamp, environment):
+    directory = os.path.dirname(os.path.abspath(cache_path))
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(prefix='.environment-', dir=directory)
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+            json.dump({'version': CACHE_VERSION, 'probed_at': time.time(), 'stamp': stamp, 'environment': environment}, file, indent=2)
+        os.replace(temporary_path, cache_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
@@ -0,0 +1,184 @@
+"""
+Copy-on-write cloning for StartDotNet.
+
+Scaffolding copies whole project trees: snapshots out of the template cache, and pooled
+scaffolds into place. clone_tree copies a tree file by file with the cheapest method the file
+system allows:
+
+    reflink     A copy-on-write clone (FICLONE on Linux for Btrfs, XFS, bcachefs and others;
+                clonefile on macOS APFS). Both files share their data blocks until one is
+                written, so a clone costs about the same however large the file is.
+    hardlink    A second name for the same file. It is only used for files nobody can write
+                (read-only cache entries), because writing through one name changes the other.
+                Callers that edit the clone pass method=WRITABLE_METHODS to rule it out.
+    copy        A plain copy (shutil.copy2, which the kernel does without a round trip through
+                Python on Linux and macOS), when neither of the above is possible.
+
+A pair of file systems that rejects a reflink once is not asked again, so a file system without
+reflinks costs a single failed call.
+"""
+
+import errno
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+METHODS = ('reflink', 'hardlink', 'copy')
+
+# The methods that give the destination a file of its own, which can be written in place.
+WRITABLE_METHODS = ('reflink', 'copy')
+
+# _IOW(0x94, 9, int) from linux/fs.h.
+FICLONE = 0x40049409
+
+# Errors that mean the file system (or the pair of file systems) cannot clone, rather than that
+# something is wrong with the file.
+REFLINK_UNSUPPORTED_ERRORS = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+WRITE_PERMISSIONS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+_reflink_unsupported = set()
+_reflink_lock = threading.Lock()
+
+
+class CloneStats:
+    """
+    How the files of a tree were cloned.
+
+    Attributes:
+        files (dict): The number of files cloned with each method.
+        bytes (int): The total size of the files.
+    """
+
+    def __init__(self):
+        self.files = dict.fromkeys(METHODS, 0)
+        self.bytes = 0
+
+    def add(self, method, size):
+        self.files[method] += 1
+        self.bytes += size
+
+    def __repr__(self):
+        return f"CloneStats({self.files!r}, bytes={self.bytes})"
+
+
+def reflink_file(source, destination):
+    """
+    Creates destination as a copy-on-write clone of source. Raises OSError if the file system
+    cannot clone.
+    """
+    if sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'clonefile'):
+            raise OSError(errno.ENOTSUP, "clonefile is not available", source)
+        if libc.clonefile(os.fsencode(source), os.fsencode(destination), 0) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), source)
+        return
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.ENOTSUP, "Reflinks are not supported on this platform", source)
+    source_descriptor = os.open(source, os.O_RDONLY)
+    try:
+        destination_descriptor = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(destination_descriptor, FICLONE, source_descriptor)
+        except OSError:
+            os.close(destination_descriptor)
+            os.remove(destination)
+            raise
+        os.close(destination_descriptor)
+    finally:
+        os.close(source_descriptor)
+    shutil.copystat(source, destination)
+
+
+def clone_file(source, destination, method=None, source_stat=None):
+    """
+    Copies source to destination (which must not exist) with the cheapest method available and
+    returns the method used. With method set to one method, only that method is tried and
+    OSError is raised if it is not possible; with a tuple of methods, only those are considered.
+    """
+    source_stat = source_stat or os.stat(source)
+    strict = isinstance(method, str)
+    methods = (method,) if strict else tuple(method or METHODS)
+    if 'reflink' in methods:
+        devices = (source_stat.st_dev, os.stat(os.path.dirname(os.path.abspath(destination))).st_dev)
+        if strict or devices not in _reflink_unsupported:
+            try:
+                reflink_file(source, destination)
+                return 'reflink'
+            except OSError as e:
+                if strict or e.errno not in REFLINK_UNSUPPORTED_ERRORS:
+                    raise
+                with _reflink_lock:
+                    _reflink_unsupported.add(devices)
+    if 'hardlink' in methods and (strict or not source_stat.st_mode & WRITE_PERMISSIONS):
+        try:
+            os.link(source, destination)
+            return 'hardlink'
+        except OSError:
+            if strict:
+                raise
+    if 'copy' not in methods:
+        raise OSError(errno.ENOTSUP, f"Cannot clone with {' or '.join(methods)}", source)
+    shutil.copy2(source, destination)
+    return 'copy'
+
+
+def clone_tree(source, destination, method=None, dirs_exist_ok=False, stats=None):
+    """
+    Copies the directory source to destination like shutil.copytree, cloning each file with
+    clone_file. Files that already exist in destination are replaced. Returns a CloneStats.
+    """
+    stats = stats if stats is not None else CloneStats()
+    os.makedirs(destination, exist_ok=dirs_exist_ok)
+    with os.scandir(source) as entries:
+        for entry in entries:
+            target = os.path.join(destination, entry.name)
+            if entry.is_symlink():
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.symlink(os.readlink(entry.path), target)
+            elif entry.is_dir():
+                clone_tree(entry.path, target, method, dirs_exist_ok, stats)
+            else:
+                if dirs_exist_ok and os.path.lexists(target):
+                    os.remove(target)
+                entry_stat = entry.stat()
+                stats.add(clone_file(entry.path, target, method, entry_stat), entry_stat.st_size)
+    shutil.copystat(source, destination)
+    return stats
+
+
+def move_tree(source, destination):
+    """
+    Moves the directory source to destination (which must not exist) and returns 'rename' or
+    'copy'. On the same file system it is a rename. Otherwise the tree is cloned into a hidden
+    directory next to destination, which is then renamed into place, so destination never holds
+    a half-copied tree; source is removed once the copy is in place.
+    """
+    try:
+        os.rename(source, destination)
+        return 'rename'
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    parent_directory, name = os.path.split(os.path.abspath(destination))
+    copy_directory = tempfile.mkdtemp(prefix=f".{name}.copying-", dir=parent_directory)
+    try:
+        clone_tree(source, copy_directory, dirs_exist_ok=True)
+        os.rename(copy_directory, destination)
+    except BaseException:
+        shutil.rmtree(copy_directory, ignore_errors=True)
+        raise
+    shutil.rmtree(source)
+    return 'copy'
@@ -0,0 +1,177 @@
+"""
+Per-step timing and resource instrumentation for StartDotNet.
+
+Each step of a scaffold (new sln, new project, sln add, build, run) is recorded with its wall
+time and, for steps that started a child process, the CPU time (user and system) and peak
+resident memory of that process tree. MetricsReport prints the numbers as a table and writes
+them as JSON, so slow restores, builds and template instantiation can be told apart.
+"""
+
+import json
+import platform
+import sys
+import time
+
+
+def rusage_to_resources(rusage):
+    """
+    Returns (user_cpu, system_cpu, peak_rss_bytes) from a resource.struct_rusage, or Nones.
+    """
+    if rusage is None:
+        return None, None, None
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    peak_rss = rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+    return rusage.ru_utime, rusage.ru_stime, peak_rss
+
+
+def format_seconds(seconds):
+    return '-' if seconds is None else f"{seconds:.2f}s"
+
+
+def format_bytes(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+class StepMetrics:
+    """
+    The measurements for one step of one project.
+
+    Attributes:
+        project_name (str): The project the step belongs to.
+        step_name (str): The step, e.g. build.
+        command (str): The command the step represents.
+        status (str): The final status of the step (succeeded, failed, skipped...).
+        wall_time (float): Seconds the step took.
+        user_cpu (float): User CPU seconds of the step's child processes, or None if no process ran or it was not measured.
+        system_cpu (float): System CPU seconds of the step's child processes, or None.
+        peak_rss (int): Peak resident memory in bytes of the largest process in the step, or None.
+        processes (int): How many child processes the step started.
+        error (str): The exception that made the step fail, or None.
+    """
+
+    def __init__(self, project_name, step_name, command=None, status=None, wall_time=0.0, error=None):
+        self.project_name = project_name
+        self.step_name = step_name
+        self.command = command
+        self.status = status
+        self.wall_time = wall_time
+        self.user_cpu = None
+        self.system_cpu = None
+        self.peak_rss = None
+        self.processes = 0
+        self.error = error
+
+    def add_process(self, rusage):
+        self.processes += 1
+        user_cpu, system_cpu, peak_rss = rusage_to_resources(rusage)
+        if user_cpu is not None:
+            self.user_cpu = (self.user_cpu or 0.0) + user_cpu
+            self.system_cpu = (self.system_cpu or 0.0) + system_cpu
+            self.peak_rss = max(self.peak_rss or 0, peak_rss)
+
+    def to_dict(self):
+        return {
+            'project': self.project_name,
+            'step': self.step_name,
+            'command': self.command,
+            'status': self.status,
+            'wall_time': round(self.wall_time, 4),
+            'user_cpu': None if self.user_cpu is None else round(self.user_cpu, 4),
+            'system_cpu': None if self.system_cpu is None else round(self.system_cpu, 4),
+            'peak_rss': self.peak_rss,
+            'processes': self.processes,
+            'error': self.error,
+        }
+
+
+class MetricsReport:
+    """
+    The MetricsReport class collects StepMetrics from one or more projects and presents them.
+
+    Attributes:
+        steps (list): The StepMetrics collected so far.
+        wall_time (float): Total seconds for the whole run, set by finish.
+
+    Methods:
+        add: Adds the metrics of a project's steps.
+        finish: Records the total wall time of the run.
+        totals_by_step: Aggregates the metrics of every project per step name.
+        mean_wall_times: Returns the mean wall time per step name of the steps that ran and succeeded.
+        format_table: Returns a text table, per step for one project or aggregated for many.
+        to_dict: Returns the report as JSON-serialisable data.
+        write_json: Writes the report to a JSON file.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.started_at = time.time()
+        self._start_time = time.perf_counter()
+        self.wall_time = None
+
+    def add(self, step_metrics):
+        self.steps.extend(step_metrics)
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self._start_time
+
+    def totals_by_step(self):
+        totals = {}
+        for metrics in self.steps:
+            total = totals.setdefault(metrics.step_name, {'count': 0, 'wall_time': 0.0, 'max_wall_time': 0.0,
+                                                          'user_cpu': None, 'system_cpu': None, 'peak_rss': None})
+            total['count'] += 1
+            total['wall_time'] += metrics.wall_time
+            total['max_wall_time'] = max(total['max_wall_time'], metrics.wall_time)
+            if metrics.user_cpu is not None:
+                total['user_cpu'] = (total['user_cpu'] or 0.0) + metrics.user_cpu
+                total['system_cpu'] = (total['system_cpu'] or 0.0) + metrics.system_cpu
+                total['peak_rss'] = max(total['peak_rss'] or 0, metrics.peak_rss)
+        return totals
+
+    def mean_wall_times(self):
+        # Up-to-date and skipped steps took no time, so only steps that did their work count.
+        wall_times = {}
+        for metrics in self.steps:
+            if metrics.status == 'succeeded':
+                wall_times.setdefault(metrics.step_name, []).append(metrics.wall_time)
+        return {step_name: sum(times) / len(times) for step_name, times in wall_times.items()}
+
+    def format_table(self):
+        projects = {metrics.project_name for metrics in self.steps}
+        width = max([12] + [len(metrics.step_name) for metrics in self.steps])
+        lines = []
+        if len(projects) <= 1:
+            lines.append(f"{'Step':<{width}} {'Status':<10} {'Wall':>9} {'User CPU':>9} {'Sys CPU':>9} {'Peak RSS':>9}")
+            for metrics in self.steps:
+                lines.append(f"{metrics.step_name:<{width}} {metrics.status or '-':<10} {format_seconds(metrics.wall_time):>9} "
+                             f"{format_seconds(metrics.user_cpu):>9} {format_seconds(metrics.system_cpu):>9} {format_bytes(metrics.peak_rss):>9}")
+        else:
+            lines.append(f"{'Step':<{width}} {'Runs':>5} {'Total wall':>11} {'Max wall':>9} {'User CPU':>9} {'Sys CPU':>9} {'Peak RSS':>9}")
+            for step_name, total in self.totals_by_step().items():
+                lines.append(f"{step_name:<{width}} {total['count']:>5} {format_seconds(total['wall_time']):>11} {format_seconds(total['max_wall_time']):>9} "
+                             f"{format_seconds(total['user_cpu']):>9} {format_seconds(total['system_cpu']):>9} {format_bytes(total['peak_rss']):>9}")
+        for metrics in self.steps:
+            if metrics.error:
+                prefix = f"{metrics.project_name}:" if len(projects) > 1 else ''
+                lines.append(f"Error in {prefix}{metrics.step_name}: {metrics.error}")
+        if self.wall_time is not None:
+            lines.append(f"Total wall time: {format_seconds(self.wall_time)}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at,
+            'wall_time': self.wall_time,
+            'host': {'platform': platform.platform(), 'python': platform.python_version()},
+            'steps': [metrics.to_dict() for metrics in self.steps],
+            'totals_by_step': self.totals_by_step(),
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
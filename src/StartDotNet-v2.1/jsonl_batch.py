@@ -0,0 +1,82 @@
+"""
+JSON Lines batch mode for StartDotNet (StartDotNet-v2.1.py --jsonl).
+
+Reads one project request per line from an input stream, scaffolds the projects concurrently
+and writes one JSON result line per project to an output stream as soon as that project
+finishes, so results arrive in completion order rather than input order:
+
+    {"name": "Api", "type": "webapi"}
+    {"name": "Core", "type": "classlib", "directory": "libs"}
+    {"manifest": "shop.toml"}
+
+Requests take the same fields as requests to the scaffold server (see scaffold_server); a
+request without an "id" gets its line number. Results carry the id, the project's paths, its
+status and the timings of every step. Project output goes to the log stream, each line prefixed
+with the project it belongs to, so the output stream holds nothing but results.
+
+Only a few requests more than can run at once are read ahead, and a result is written and
+dropped as soon as it is ready, so memory stays the same however long the input is.
+"""
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scaffold_server import encode_message, execute_request
+
+
+def request_label(request, line_number):
+    return str(request.get('name') or request.get('manifest') or request.get('id') or line_number)
+
+
+def run_jsonl_batch(create_project, input_stream, output_stream, max_workers=None, log_stream=None):
+    """
+    Scaffolds the requests read from input_stream with create_project(request, output_callback)
+    and writes their results to output_stream. Returns the number of requests that succeeded and
+    the number that failed.
+    """
+    log_stream = log_stream if log_stream is not None else sys.stderr
+    write_lock = threading.Lock()
+    counts = {'succeeded': 0, 'failed': 0}
+    max_workers = max_workers or os.cpu_count() or 1
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    # Read at most two requests per worker ahead of the ones running.
+    read_ahead = threading.BoundedSemaphore(max_workers * 2)
+
+    def write_result(result):
+        with write_lock:
+            output_stream.write(encode_message(result).decode('utf-8'))
+            output_stream.flush()
+            counts['succeeded' if result.get('succeeded') else 'failed'] += 1
+
+    def run(request, label):
+        def output(line):
+            with write_lock:
+                log_stream.write(f"[{label}] {line}\n")
+                log_stream.flush()
+
+        try:
+            write_result(execute_request(request, create_project, output))
+        finally:
+            read_ahead.release()
+
+    try:
+        for line_number, line in enumerate(input_stream, 1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request must be a JSON object")
+            except ValueError as e:
+                write_result({'id': line_number, 'event': 'result', 'succeeded': False,
+                              'error': f"Invalid request on line {line_number}: {e}", 'duration': 0.0})
+                continue
+            request.setdefault('id', line_number)
+            read_ahead.acquire()
+            executor.submit(run, request, request_label(request, line_number))
+    finally:
+        executor.shutdown(wait=True)
+    return counts['succeeded'], counts['failed']
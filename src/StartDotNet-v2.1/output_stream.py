@@ -0,0 +1,150 @@
+"""
+Streaming command output for StartDotNet.
+
+run_streaming starts a command and hands every stdout and stderr line to a callback as soon as
+it arrives, instead of buffering the whole output until the process exits. Only the last few
+lines of each stream are kept in memory for error reporting; the complete output is written to
+a log file when one is given.
+
+Commands run in their own process group, so a timeout or a cancellation stops everything they
+started. With a ready pattern, a long-running command such as `dotnet run` of a web app is shut
+down cleanly as soon as a line matching the pattern appears.
+"""
+
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+
+from process_control import DEFAULT_GRACE_PERIOD, ChildWaiter, kill_process_tree, process_group_kwargs, spawn_process, stop_process_tree
+
+DEFAULT_TAIL_LINES = 200
+POLL_INTERVAL = 0.1
+# How long to wait for output after a process tree was stopped, in case something it started
+# escaped the process group and still holds the pipes open.
+READER_JOIN_TIMEOUT = 5.0
+
+
+class CommandOutput:
+    """
+    The result of a command run by run_streaming.
+
+    Attributes:
+        returncode (int): The exit code of the process.
+        stdout_tail (list): The last lines written to stdout.
+        stderr_tail (list): The last lines written to stderr.
+        log_path (str): The file holding the complete output, or None if it was not saved.
+        timed_out (bool): Whether the command was stopped because it ran past its timeout.
+        cancelled (bool): Whether the command was stopped by a CancellationToken.
+        ready (bool): Whether the ready pattern was seen, after which the command was shut down on purpose.
+        wall_time (float): Seconds from starting the process until it was reaped.
+        rusage (resource.struct_rusage): CPU time and peak memory of the process tree, or None where unavailable.
+    """
+
+    def __init__(self, returncode, stdout_tail, stderr_tail, log_path=None, timed_out=False, cancelled=False, ready=False,
+                 wall_time=0.0, rusage=None):
+        self.returncode = returncode
+        self.stdout_tail = stdout_tail
+        self.stderr_tail = stderr_tail
+        self.log_path = log_path
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        self.ready = ready
+        self.wall_time = wall_time
+        self.rusage = rusage
+
+    @property
+    def succeeded(self):
+        if self.timed_out or self.cancelled:
+            return False
+        return self.returncode == 0 or self.ready
+
+
+def run_streaming(command, line_callback=None, log_path=None, tail_lines=DEFAULT_TAIL_LINES, timeout=None,
+                  cancel_token=None, ready_pattern=None, grace_period=DEFAULT_GRACE_PERIOD, log_mode='w', **popen_kwargs):
+    """
+    Runs a command, streaming its output line by line. An argument list is started directly with
+    process_control.spawn_process; a string needs shell=True in popen_kwargs.
+
+    line_callback is called with ("stdout" or "stderr", line) for each line, from a reader thread.
+    The log file is opened with log_mode, 'a' to add to the output of an earlier command.
+    timeout is in seconds; when it expires, or cancel_token is cancelled, the whole process tree
+    is killed. Once a line matches ready_pattern the process tree is asked to shut down and given
+    grace_period seconds before it is killed.
+    popen_kwargs are passed to subprocess.Popen, e.g. shell=True for command strings.
+    """
+    ready_regex = re.compile(ready_pattern) if ready_pattern else None
+    ready_event = threading.Event()
+    tails = {'stdout': deque(maxlen=tail_lines), 'stderr': deque(maxlen=tail_lines)}
+    log_lock = threading.Lock()
+    log_file = None
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        log_file = open(log_path, log_mode, encoding='utf-8')
+
+    def pump(stream_name, pipe):
+        with pipe:
+            for raw_line in iter(pipe.readline, b''):
+                line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+                tails[stream_name].append(line)
+                if log_file:
+                    with log_lock:
+                        if not log_file.closed:
+                            log_file.write(line + '\n')
+                if line_callback:
+                    line_callback(stream_name, line)
+                if ready_regex and ready_regex.search(line):
+                    ready_event.set()
+
+    timed_out = ready = False
+    start_time = time.perf_counter()
+    try:
+        if isinstance(command, str) or popen_kwargs:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **process_group_kwargs(), **popen_kwargs)
+        else:
+            try:
+                process = spawn_process(command)
+            except OSError as e:
+                # Reported like a shell reports a command it cannot run.
+                return CommandOutput(127, [], [f"Could not start {command[0]}: {e}"], log_path)
+        waiter = ChildWaiter(process)
+        if cancel_token:
+            cancel_token.register(process)
+        readers = [threading.Thread(target=pump, args=('stdout', process.stdout), daemon=True),
+                   threading.Thread(target=pump, args=('stderr', process.stderr), daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            try:
+                returncode = waiter.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if ready_event.is_set():
+                ready = True
+                returncode = stop_process_tree(process, grace_period, waiter)
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                timed_out = True
+                kill_process_tree(process)
+                returncode = waiter.wait()
+                break
+
+        wall_time = time.perf_counter() - start_time
+        if cancel_token:
+            cancel_token.unregister(process)
+        stopped = ready or timed_out or (cancel_token is not None and cancel_token.cancelled)
+        for reader in readers:
+            reader.join(READER_JOIN_TIMEOUT if stopped else None)
+    finally:
+        if log_file:
+            with log_lock:
+                log_file.close()
+
+    cancelled = cancel_token is not None and cancel_token.cancelled and not ready and returncode != 0
+    return CommandOutput(returncode, list(tails['stdout']), list(tails['stderr']), log_path,
+                         timed_out=timed_out, cancelled=cancelled, ready=ready, wall_time=wall_time, rusage=waiter.rusage)
@@ -0,0 +1,278 @@
+"""
+Process tree control for StartDotNet.
+
+Every command is started in its own process group (a new session on POSIX, a new process group
+on Windows) so that a timeout or a cancellation can stop the whole tree it spawned: the shell,
+the dotnet CLI, MSBuild worker nodes and the application started by `dotnet run`.
+
+spawn_process starts an argument vector without a shell. Where subprocess.Popen would fork the
+whole interpreter to start a command in a new session, it uses os.posix_spawn instead, which
+creates the child without copying the parent and starts the new session itself.
+
+CancellationToken lets another thread (for example a Ctrl+C handler) cancel every command that
+is running on its behalf and stop new ones from starting.
+"""
+
+import errno
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+DEFAULT_GRACE_PERIOD = 5.0
+
+# Matches the lines ASP.NET Core and the generic host print once an app is serving requests.
+READY_PATTERN = r'Now listening on:|Application started\.'
+
+
+def process_group_kwargs():
+    """
+    Returns the Popen keyword arguments that start a command in a new process group.
+    """
+    if sys.platform == 'win32':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+# Signals Python ignores that a child should see with their default action, as with Popen's
+# restore_signals.
+RESET_SIGNALS = tuple(getattr(signal, name) for name in ('SIGPIPE', 'SIGXFZ', 'SIGXFSZ') if hasattr(signal, name))
+
+# On Linux, Popen starts children with vfork since Python 3.10, which measures slightly faster
+# than os.posix_spawn (see benchmarks/bench_spawn.py); everywhere else Popen forks the whole
+# interpreter and posix_spawn is used instead.
+_use_posix_spawn = (hasattr(os, 'posix_spawn') and sys.platform != 'win32'
+                    and not (sys.platform.startswith('linux') and sys.version_info >= (3, 10)))
+
+
+class SpawnedProcess:
+    """
+    A child started by os.posix_spawn, with the parts of the subprocess.Popen interface that
+    StartDotNet uses.
+
+    Attributes:
+        pid (int): The process id, which is also its process group id.
+        args (list): The argument vector.
+        stdout (file): The read end of the child's stdout pipe.
+        stderr (file): The read end of the child's stderr pipe.
+        returncode (int): The exit code once the child has been reaped, otherwise None.
+    """
+
+    def __init__(self, pid, args, stdout, stderr):
+        self.pid = pid
+        self.args = args
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                self.returncode = 0  # Reaped elsewhere; Popen reports 0 as well.
+                return self.returncode
+            if pid:
+                self.returncode = exit_code_from_status(status)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if timeout is None and self.returncode is None:
+            try:
+                _, status = os.waitpid(self.pid, 0)
+                self.returncode = exit_code_from_status(status)
+            except ChildProcessError:
+                self.returncode = 0
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        delay = 0.0005
+        while self.poll() is None:
+            if time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            delay = min(delay * 2, 0.005)
+            time.sleep(max(0, min(delay, deadline - time.monotonic())))
+        return self.returncode
+
+    def send_signal(self, signum):
+        if self.returncode is None:
+            os.kill(self.pid, signum)
+
+
+def resolve_executable(name):
+    """
+    Returns the path of the executable name, searching PATH like a shell would.
+    """
+    if os.path.dirname(name):
+        return name
+    path = shutil.which(name)
+    if path is None:
+        raise FileNotFoundError(errno.ENOENT, "Not found on PATH", name)
+    return path
+
+
+def posix_spawn_process(argv):
+    """
+    Starts argv with os.posix_spawn in a new session, with stdout and stderr piped, and returns a
+    SpawnedProcess. Raises NotImplementedError if the C library cannot start a new session from
+    posix_spawn, and OSError if the program cannot be started.
+    """
+    argv = list(argv)
+    executable = resolve_executable(argv[0])
+    stdout_read, stdout_write = os.pipe()
+    stderr_read, stderr_write = os.pipe()
+    if min(stdout_write, stderr_write) <= 2:
+        # stdout or stderr is closed, and the file actions would overwrite one pipe with another.
+        for descriptor in (stdout_read, stdout_write, stderr_read, stderr_write):
+            os.close(descriptor)
+        return subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **process_group_kwargs())
+    pid = None
+    try:
+        file_actions = [(os.POSIX_SPAWN_DUP2, stdout_write, 1), (os.POSIX_SPAWN_DUP2, stderr_write, 2)]
+        pid = os.posix_spawn(executable, argv, os.environ, file_actions=file_actions, setsigdef=RESET_SIGNALS, setsid=True)
+    finally:
+        # The child has its own copies of the write ends from the file actions.
+        os.close(stdout_write)
+        os.close(stderr_write)
+        if pid is None:
+            os.close(stdout_read)
+            os.close(stderr_read)
+    return SpawnedProcess(pid, argv, os.fdopen(stdout_read, 'rb'), os.fdopen(stderr_read, 'rb'))
+
+
+def spawn_process(argv):
+    """
+    Starts argv without a shell, in a new process group, with stdout and stderr piped. Returns
+    a SpawnedProcess or a subprocess.Popen. Raises OSError if the program cannot be started.
+    """
+    global _use_posix_spawn
+    if _use_posix_spawn:
+        try:
+            return posix_spawn_process(argv)
+        except NotImplementedError:
+            _use_posix_spawn = False
+    return subprocess.Popen(list(argv), stdout=subprocess.PIPE, stderr=subprocess.PIPE, **process_group_kwargs())
+
+
+def send_terminate(process):
+    """
+    Asks a process tree started with process_group_kwargs to shut down cleanly.
+    """
+    try:
+        if sys.platform == 'win32':
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def kill_process_tree(process):
+    """
+    Forcefully kills a process tree started with process_group_kwargs.
+    """
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+class ChildWaiter:
+    """
+    Waits for a subprocess.Popen child and, on POSIX, keeps the resource usage the kernel reports
+    for it when it is reaped. That usage covers the child and every descendant it waited for (the
+    dotnet CLI behind a shell, MSBuild, the compiler server), which getrusage(RUSAGE_CHILDREN)
+    cannot attribute to one command when several run at the same time.
+
+    Attributes:
+        process (subprocess.Popen): The child to wait for.
+        rusage (resource.struct_rusage): The child's resource usage once reaped, or None if unavailable.
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.rusage = None
+
+    def wait(self, timeout=None):
+        if self.process.returncode is not None or not hasattr(os, 'wait4'):
+            return self.process.wait(timeout)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        delay = 0.0005
+        while True:
+            try:
+                pid, status, rusage = os.wait4(self.process.pid, os.WNOHANG)
+            except ChildProcessError:
+                return self.process.wait(timeout)
+            if pid:
+                self.rusage = rusage
+                self.process.returncode = exit_code_from_status(status)
+                return self.process.returncode
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.process.args, timeout)
+            # Poll quickly: the exit of a short command is noticed within a few milliseconds.
+            delay = min(delay * 2, 0.005)
+            time.sleep(delay if deadline is None else max(0, min(delay, deadline - time.monotonic())))
+
+
+def exit_code_from_status(status):
+    if hasattr(os, 'waitstatus_to_exitcode'):
+        return os.waitstatus_to_exitcode(status)
+    return -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+
+def stop_process_tree(process, grace_period=DEFAULT_GRACE_PERIOD, waiter=None):
+    """
+    Asks a subprocess.Popen tree to shut down, killing it if it is still running after grace_period seconds.
+    Returns the exit code of the process.
+    """
+    waiter = waiter or ChildWaiter(process)
+    send_terminate(process)
+    try:
+        return waiter.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(process)
+        return waiter.wait()
+
+
+class CancellationToken:
+    """
+    A thread-safe flag that cancels the commands registered with it.
+
+    Methods:
+        cancel: Marks the token as cancelled and kills every registered process tree.
+        register: Tracks a running process; kills it straight away if the token is already cancelled.
+        unregister: Stops tracking a process once it has exited.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            processes = list(self._processes)
+        for process in processes:
+            kill_process_tree(process)
+
+    def register(self, process):
+        with self._lock:
+            self._processes.add(process)
+        if self.cancelled:
+            kill_process_tree(process)
+
+    def unregister(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
@@ -0,0 +1,262 @@
+"""
+Pre-warmed project pool for StartDotNet.
+
+Creating the files of a project takes milliseconds, but restoring its NuGet packages takes
+seconds. The pool keeps a few scaffolds per project type that have already been created,
+restored and built under a placeholder name, in ~/.startdotnet/pool. A request takes one of them
+and retargets it:
+
+    - bin and the intermediate build output in obj are removed, because the compiled assembly
+      carries the placeholder's name;
+    - the absolute paths that restore wrote into obj are pointed at the new location;
+    - the placeholder name is replaced in file names and contents (namespaces, assembly names,
+      the .sln entry) and the project GUIDs get fresh values, as for the template cache;
+    - the tree is moved into place.
+
+The new project's restore is then already done, so only the build remains. After every request
+the pool is refilled in the background. Entries are keyed like the template cache: by project
+type, target framework, SDK version and installed template packs. An entry is claimed by
+renaming its directory, so several processes can share a pool without handing out the same
+scaffold twice.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from file_clone import move_tree
+from template_cache import PLACEHOLDER_NAME, rename_tree
+
+DEFAULT_POOL_DIRECTORY = os.path.join(os.path.expanduser('~'), '.startdotnet', 'pool')
+
+# A scaffold still being built after this many seconds is assumed to belong to a fill that died.
+STALE_BUILD_SECONDS = 30 * 60
+
+
+def retarget_restore_output(directory, old_path, new_path, keep_build_output=False):
+    """
+    Removes every bin directory and the build output in every obj directory below directory, and
+    replaces old_path with new_path in the restore files that are kept (project.assets.json,
+    project.nuget.cache and the generated .props and .targets files). With keep_build_output,
+    bin and the build output in obj are kept and old_path is replaced in the text files of obj
+    and all its subdirectories, so the next build stays incremental.
+    """
+    replacements = [(old_path, new_path), (json.dumps(old_path)[1:-1], json.dumps(new_path)[1:-1])]
+    for root, dir_names, file_names in os.walk(directory):
+        if 'obj' in os.path.relpath(root, directory).split(os.sep):
+            if not keep_build_output:
+                for dir_name in dir_names:
+                    shutil.rmtree(os.path.join(root, dir_name))
+                dir_names[:] = []
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                try:
+                    with open(path, 'r', encoding='utf-8', newline='') as file:
+                        content = file.read()
+                except UnicodeDecodeError:
+                    continue
+                new_content = content
+                for old, new in replacements:
+                    new_content = new_content.replace(old, new)
+                if new_content != content:
+                    with open(path, 'w', encoding='utf-8', newline='') as file:
+                        file.write(new_content)
+        elif 'bin' in dir_names and not keep_build_output:
+            shutil.rmtree(os.path.join(root, 'bin'))
+            dir_names.remove('bin')
+
+
+class ProjectPool:
+    """
+    The ProjectPool class keeps restored and built scaffolds ready for each project type and
+    hands them out under a new name.
+
+    Attributes:
+        pool_directory (str): Where the scaffolds are kept.
+        size (int): How many scaffolds are kept ready per project type and framework.
+        build_scaffold (callable): Called with a project type, a framework (or None) and an empty
+            directory; creates, restores and builds a project named PLACEHOLDER_NAME in it and
+            returns True on success.
+        sdk_version (str): The SDK version that is part of every key.
+        pack_fingerprint (str): The template pack fingerprint that is part of every key.
+        options (dict): Other settings that change the scaffolds, also part of every key.
+        fill_in_background (callable): Called with a project type and framework to refill the pool
+            from another process; None refills on a background thread of this process.
+        hits (int): How many projects were handed out from the pool.
+        misses (int): How many requests found no scaffold ready.
+
+    Methods:
+        key_directory: Returns the directory holding the scaffolds for a project type and framework.
+        ready_entries: Returns the scaffolds ready to be handed out.
+        remove_stale_entries: Removes scaffolds left half built or half claimed by a process that died.
+        acquire_fill_lock: Makes this process the only one filling a key, if no other process is.
+        take: Moves a ready scaffold to a directory under a new name.
+        build_entry: Builds one scaffold and adds it to the pool.
+        fill: Builds scaffolds until the pool holds size of them.
+        start_fill: Refills the pool without waiting for it.
+        clear: Removes every scaffold.
+    """
+
+    def __init__(self, build_scaffold, pool_directory=None, size=2, sdk_version=None, pack_fingerprint=None, options=None,
+                 fill_in_background=None):
+        self.pool_directory = pool_directory or DEFAULT_POOL_DIRECTORY
+        self.size = size
+        self.build_scaffold = build_scaffold
+        self.sdk_version = sdk_version
+        self.pack_fingerprint = pack_fingerprint
+        self.options = dict(options or {})
+        self.fill_in_background = fill_in_background
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._filling = set()
+
+    def key_directory(self, project_type, framework=None):
+        key_data = json.dumps({
+            'type': project_type,
+            'framework': framework,
+            'sdk_version': self.sdk_version,
+            'packs': self.pack_fingerprint,
+            'options': sorted(self.options.items()),
+        }, sort_keys=True)
+        key = hashlib.sha256(key_data.encode()).hexdigest()[:24]
+        return os.path.join(self.pool_directory, f"{project_type}-{framework or 'default'}-{key}")
+
+    def ready_entries(self, project_type, framework=None):
+        key_directory = self.key_directory(project_type, framework)
+        if not os.path.isdir(key_directory):
+            return []
+        return sorted(entry.path for entry in os.scandir(key_directory)
+                      if entry.name.startswith('ready-') and os.path.isfile(os.path.join(entry.path, 'entry.json')))
+
+    def remove_stale_entries(self, key_directory):
+        for entry in os.scandir(key_directory):
+            if entry.name.startswith(('.building-', '.claimed-')) and time.time() - entry.stat().st_mtime > STALE_BUILD_SECONDS:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def acquire_fill_lock(self, key_directory):
+        # Only one process fills a key at a time; a lock older than STALE_BUILD_SECONDS is left
+        # over from a fill that died.
+        lock_path = os.path.join(key_directory, '.fill.lock')
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return lock_path
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) <= STALE_BUILD_SECONDS:
+                        return None
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+        return None
+
+    def take(self, project_type, framework, project_name, destination):
+        """
+        Moves a ready scaffold to destination (which must not exist yet), renamed to project_name.
+        Returns True if a scaffold was handed out, False if none was ready.
+        """
+        for entry_directory in self.ready_entries(project_type, framework):
+            claimed_directory = os.path.join(os.path.dirname(entry_directory), f".claimed-{uuid.uuid4().hex}")
+            try:
+                os.rename(entry_directory, claimed_directory)
+            except OSError:
+                continue  # Another process claimed it first.
+            os.utime(claimed_directory)  # So it is not mistaken for a stale claim while it is retargeted.
+            try:
+                with open(os.path.join(claimed_directory, 'entry.json'), 'r', encoding='utf-8') as file:
+                    metadata = json.load(file)
+                solution_directory = os.path.join(claimed_directory, PLACEHOLDER_NAME)
+                shutil.rmtree(os.path.join(solution_directory, '.startdotnet'), ignore_errors=True)
+                retarget_restore_output(solution_directory, metadata['solution_directory'], destination)
+                rename_tree(solution_directory, PLACEHOLDER_NAME, project_name)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                move_tree(solution_directory, destination)  # Leaves nothing behind at destination if it fails.
+            except (OSError, ValueError, KeyError):
+                continue
+            finally:
+                shutil.rmtree(claimed_directory, ignore_errors=True)
+            with self._lock:
+                self.hits += 1
+            return True
+        with self._lock:
+            self.misses += 1
+        return False
+
+    def build_entry(self, project_type, framework=None):
+        key_directory = self.key_directory(project_type, framework)
+        os.makedirs(key_directory, exist_ok=True)
+        staging_directory = tempfile.mkdtemp(prefix='.building-', dir=key_directory)
+        try:
+            if not self.build_scaffold(project_type, framework, staging_directory):
+                shutil.rmtree(staging_directory, ignore_errors=True)
+                return False
+            metadata = {
+                'type': project_type,
+                'framework': framework,
+                'sdk_version': self.sdk_version,
+                'solution_directory': os.path.join(staging_directory, PLACEHOLDER_NAME),
+                'created': time.time(),
+            }
+            with open(os.path.join(staging_directory, 'entry.json'), 'w', encoding='utf-8') as file:
+                json.dump(metadata, file, indent=2)
+            os.rename(staging_directory, os.path.join(key_directory, f"ready-{time.time_ns()}-{uuid.uuid4().hex[:8]}"))
+        except BaseException:
+            shutil.rmtree(staging_directory, ignore_errors=True)
+            raise
+        return True
+
+    def fill(self, project_type, framework=None):
+        """
+        Builds scaffolds until size of them are ready. Returns the number built, stopping at the
+        first one that fails; returns 0 at once if another process is filling the same key.
+        """
+        key_directory = self.key_directory(project_type, framework)
+        os.makedirs(key_directory, exist_ok=True)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key_directory, threading.Lock())
+        built = 0
+        with key_lock:
+            lock_path = self.acquire_fill_lock(key_directory)
+            if lock_path is None:
+                return 0
+            try:
+                self.remove_stale_entries(key_directory)
+                while len(self.ready_entries(project_type, framework)) < self.size:
+                    if not self.build_entry(project_type, framework):
+                        break
+                    built += 1
+                    os.utime(lock_path)
+            finally:
+                os.remove(lock_path)
+        return built
+
+    def start_fill(self, project_type, framework=None):
+        if len(self.ready_entries(project_type, framework)) >= self.size:
+            return
+        with self._lock:
+            if (project_type, framework) in self._filling:
+                return
+            self._filling.add((project_type, framework))
+        if self.fill_in_background is not None:
+            # The other process fills the key completely, so it is started once per key.
+            self.fill_in_background(project_type, framework)
+            return
+
+        def fill():
+            try:
+                self.fill(project_type, framework)
+            finally:
+                with self._lock:
+                    self._filling.discard((project_type, framework))
+
+        threading.Thread(target=fill, name=f"pool-fill-{project_type}", daemon=True).start()
+
+    def clear(self):
+        shutil.rmtree(self.pool_directory, ignore_errors=True)
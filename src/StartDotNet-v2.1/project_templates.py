@@ -0,0 +1,308 @@
+"""
+Built-in project templates for StartDotNet.
+
+For the project types StartDotNet supports out of the box (console, webapi, classlib, xunit and
+mstest) the .csproj, source files and settings are written straight from the templates below,
+so no `dotnet new` process or template engine is started. The files mirror what the SDK
+templates generate; the webapi template leaves out the optional OpenAPI/Swagger packages so the
+project restores without extra downloads. The templates use implicit usings, so they are only
+used for .NET 6 and newer. Any other template or target framework still goes through `dotnet new`.
+"""
+
+import os
+import random
+import re
+from string import Template
+
+DEFAULT_FRAMEWORK = 'net8.0'
+
+# The oldest .NET version the built-in templates (ImplicitUsings, top-level statements) build for.
+MINIMUM_NATIVE_VERSION = 6
+
+FRAMEWORK_PATTERN = re.compile(r'^net(\d+)\.\d+(-[\w.]+)?$')
+
+PROJECT_REFERENCE_PATTERN = re.compile(r'<ProjectReference\s+Include="([^"]+)"')
+
+TEST_SDK_VERSION = '17.8.0'
+COVERLET_VERSION = '6.0.0'
+XUNIT_VERSION = '2.5.3'
+MSTEST_VERSION = '3.1.1'
+
+SDK_PROPERTY_GROUP = """  <PropertyGroup>
+$output_type    <TargetFramework>$framework</TargetFramework>
+    <ImplicitUsings>enable</ImplicitUsings>
+    <Nullable>enable</Nullable>
+$extra_properties  </PropertyGroup>
+"""
+
+CONSOLE_PROGRAM = """// See https://aka.ms/new-console-template for more information
+Console.WriteLine("Hello, World!");
+"""
+
+CLASSLIB_CLASS = """namespace $namespace;
+
+public class Class1
+{
+
+}
+"""
+
+WEBAPI_PROGRAM = """var builder = WebApplication.CreateBuilder(args);
+
+var app = builder.Build();
+
+app.UseHttpsRedirection();
+
+var summaries = new[]
+{
+    "Freezing", "Bracing", "Chilly", "Cool", "Mild", "Warm", "Balmy", "Hot", "Sweltering", "Scorching"
+};
+
+app.MapGet("/weatherforecast", () =>
+{
+    var forecast = Enumerable.Range(1, 5).Select(index =>
+        new WeatherForecast
+        (
+            DateOnly.FromDateTime(DateTime.Now.AddDays(index)),
+            Random.Shared.Next(-20, 55),
+            summaries[Random.Shared.Next(summaries.Length)]
+        ))
+        .ToArray();
+    return forecast;
+})
+.WithName("GetWeatherForecast");
+
+app.Run();
+
+record WeatherForecast(DateOnly Date, int TemperatureC, string? Summary)
+{
+    public int TemperatureF => 32 + (int)(TemperatureC / 0.5556);
+}
+"""
+
+WEBAPI_APPSETTINGS = """{
+  "Logging": {
+    "LogLevel": {
+      "Default": "Information",
+      "Microsoft.AspNetCore": "Warning"
+    }
+  },
+  "AllowedHosts": "*"
+}
+"""
+
+WEBAPI_APPSETTINGS_DEVELOPMENT = """{
+  "Logging": {
+    "LogLevel": {
+      "Default": "Information",
+      "Microsoft.AspNetCore": "Warning"
+    }
+  }
+}
+"""
+
+WEBAPI_LAUNCH_SETTINGS = """{
+  "$$schema": "http://json.schemastore.org/launchsettings.json",
+  "profiles": {
+    "http": {
+      "commandName": "Project",
+      "dotnetRunMessages": true,
+      "launchBrowser": false,
+      "launchUrl": "weatherforecast",
+      "applicationUrl": "http://localhost:$http_port",
+      "environmentVariables": {
+        "ASPNETCORE_ENVIRONMENT": "Development"
+      }
+    },
+    "https": {
+      "commandName": "Project",
+      "dotnetRunMessages": true,
+      "launchBrowser": false,
+      "launchUrl": "weatherforecast",
+      "applicationUrl": "https://localhost:$https_port;http://localhost:$http_port",
+      "environmentVariables": {
+        "ASPNETCORE_ENVIRONMENT": "Development"
+      }
+    }
+  }
+}
+"""
+
+XUNIT_TEST = """namespace $namespace;
+
+public class UnitTest1
+{
+    [Fact]
+    public void Test1()
+    {
+
+    }
+}
+"""
+
+MSTEST_TEST = """namespace $namespace;
+
+[TestClass]
+public class UnitTest1
+{
+    [TestMethod]
+    public void TestMethod1()
+    {
+    }
+}
+"""
+
+TEST_PROPERTIES = """
+    <IsPackable>false</IsPackable>
+    <IsTestProject>true</IsTestProject>
+"""
+
+
+def framework_for_sdk(sdk_version):
+    """
+    Returns the target framework an SDK creates projects for by default, e.g. net8.0 for 8.0.100.
+    """
+    match = re.match(r'^(\d+)\.(\d+)', sdk_version or '')
+    if not match:
+        return DEFAULT_FRAMEWORK
+    if int(match.group(1)) < 5:
+        return f"netcoreapp{match.group(1)}.{match.group(2)}"
+    return f"net{match.group(1)}.{match.group(2)}"
+
+
+def is_native_framework(framework):
+    """
+    Returns whether the built-in templates can target framework, e.g. True for net8.0 and False
+    for net5.0, netcoreapp3.1 or netstandard2.0.
+    """
+    match = FRAMEWORK_PATTERN.match(framework or '')
+    return bool(match) and int(match.group(1)) >= MINIMUM_NATIVE_VERSION
+
+
+def get_namespace(project_name):
+    """
+    Returns the root namespace `dotnet new` derives from a project name.
+    """
+    segments = [re.sub(r'[^A-Za-z0-9_]', '_', segment) for segment in project_name.split('.')]
+    return '.'.join(f"_{segment}" if segment[:1].isdigit() else segment for segment in segments)
+
+
+def build_csproj(framework, sdk='Microsoft.NET.Sdk', output_type=None, extra_properties='', package_references=(), usings=()):
+    property_group = Template(SDK_PROPERTY_GROUP).substitute(
+        output_type=f"    <OutputType>{output_type}</OutputType>\n" if output_type else '',
+        framework=framework,
+        extra_properties=extra_properties.lstrip('\n'),
+    )
+    sections = [f'<Project Sdk="{sdk}">\n', property_group]
+    if package_references:
+        sections.append('  <ItemGroup>\n'
+                        + ''.join(f'    <PackageReference Include="{name}" Version="{version}" />\n' for name, version in package_references)
+                        + '  </ItemGroup>\n')
+    if usings:
+        sections.append('  <ItemGroup>\n'
+                        + ''.join(f'    <Using Include="{using}" />\n' for using in usings)
+                        + '  </ItemGroup>\n')
+    return '\n'.join(sections) + '\n</Project>\n'
+
+
+def render_console(project_name, framework):
+    return {
+        f"{project_name}.csproj": build_csproj(framework, output_type='Exe'),
+        'Program.cs': CONSOLE_PROGRAM,
+    }
+
+
+def render_classlib(project_name, framework):
+    return {
+        f"{project_name}.csproj": build_csproj(framework),
+        'Class1.cs': Template(CLASSLIB_CLASS).substitute(namespace=get_namespace(project_name)),
+    }
+
+
+def render_webapi(project_name, framework):
+    http_port = random.randint(5000, 5300)
+    https_port = random.randint(7000, 7300)
+    return {
+        f"{project_name}.csproj": build_csproj(framework, sdk='Microsoft.NET.Sdk.Web'),
+        'Program.cs': WEBAPI_PROGRAM,
+        'appsettings.json': WEBAPI_APPSETTINGS,
+        'appsettings.Development.json': WEBAPI_APPSETTINGS_DEVELOPMENT,
+        os.path.join('Properties', 'launchSettings.json'): Template(WEBAPI_LAUNCH_SETTINGS).substitute(http_port=http_port, https_port=https_port),
+    }
+
+
+def render_xunit(project_name, framework):
+    packages = [('coverlet.collector', COVERLET_VERSION), ('Microsoft.NET.Test.Sdk', TEST_SDK_VERSION),
+                ('xunit', XUNIT_VERSION), ('xunit.runner.visualstudio', XUNIT_VERSION)]
+    return {
+        f"{project_name}.csproj": build_csproj(framework, extra_properties=TEST_PROPERTIES, package_references=packages, usings=['Xunit']),
+        'UnitTest1.cs': Template(XUNIT_TEST).substitute(namespace=get_namespace(project_name)),
+    }
+
+
+def render_mstest(project_name, framework):
+    packages = [('Microsoft.NET.Test.Sdk', TEST_SDK_VERSION), ('MSTest.TestAdapter', MSTEST_VERSION),
+                ('MSTest.TestFramework', MSTEST_VERSION), ('coverlet.collector', COVERLET_VERSION)]
+    return {
+        f"{project_name}.csproj": build_csproj(framework, extra_properties=TEST_PROPERTIES, package_references=packages,
+                                               usings=['Microsoft.VisualStudio.TestTools.UnitTesting']),
+        'UnitTest1.cs': Template(MSTEST_TEST).substitute(namespace=get_namespace(project_name)),
+    }
+
+
+TEMPLATE_RENDERERS = {
+    'console': render_console,
+    'classlib': render_classlib,
+    'webapi': render_webapi,
+    'xunit': render_xunit,
+    'mstest': render_mstest,
+}
+
+
+def add_project_references(project_path, reference_paths):
+    """
+    Adds ProjectReference items for reference_paths to a .csproj file, the way `dotnet add
+    reference` does, skipping references the project already has. Returns the references added.
+    """
+    with open(project_path, 'r', encoding='utf-8', newline='') as file:
+        content = file.read()
+    newline = '\r\n' if '\r\n' in content else '\n'
+    project_directory = os.path.dirname(os.path.abspath(project_path))
+    existing = {include.replace('/', '\\').lower() for include in PROJECT_REFERENCE_PATTERN.findall(content)}
+    added = []
+    for reference_path in reference_paths:
+        include = os.path.relpath(os.path.abspath(reference_path), project_directory).replace('/', '\\')
+        if include.lower() not in existing:
+            existing.add(include.lower())
+            added.append(include)
+    if not added:
+        return added
+    end = content.rfind('</Project>')
+    if end == -1:
+        raise ValueError(f"{project_path} is not an MSBuild project file.")
+    item_group = (f'  <ItemGroup>{newline}'
+                  + ''.join(f'    <ProjectReference Include="{include}" />{newline}' for include in added)
+                  + f'  </ItemGroup>{newline}{newline}')
+    with open(project_path, 'w', encoding='utf-8', newline='') as file:
+        file.write(content[:end] + item_group + content[end:])
+    return added
+
+
+def is_builtin_template(project_type):
+    return project_type in TEMPLATE_RENDERERS
+
+
+def generate_project(project_type, project_name, output_directory, framework=None):
+    """
+    Writes a project of a built-in type into output_directory and returns the files written.
+    Raises KeyError for project types that need `dotnet new`.
+    """
+    files = TEMPLATE_RENDERERS[project_type](project_name, framework or DEFAULT_FRAMEWORK)
+    written = []
+    for relative_path, content in files.items():
+        path = os.path.join(output_directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='\n') as file:
+            file.write(content)
+        written.append(path)
+    return written
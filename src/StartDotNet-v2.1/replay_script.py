@@ -0,0 +1,256 @@
+"""
+Replay scripts for StartDotNet (--export-script).
+
+CARPS 1.0 to 3.0 could write a scaffold's commands to "<name> - Copy into Terminal to
+create.txt" for machines where it could not run them itself. export_script brings that back for
+StartDotNet's step graphs: it compiles one project, a batch or a solution manifest into a script
+that needs nothing but the .NET SDK and a shell:
+
+    bash        For Linux and macOS. Steps run side by side with bash 4.3 or newer; older
+                versions (the bash that ships with macOS) run them one at a time.
+    powershell  For Windows PowerShell 5.1 and PowerShell 7. Steps run as thread jobs, or as
+                background jobs where the ThreadJob module is missing.
+
+The script carries the dependencies between the steps and starts every step as soon as the
+steps it depends on have succeeded, at most MAX_JOBS (-MaxJobs) at a time, as StartDotNet would.
+The first step that fails stops the steps still running and the script exits with 1. Each line
+of output is prefixed with the step that wrote it.
+
+The commands are the .NET CLI commands of every step, including those StartDotNet normally does
+itself (writing the solution and built-in project files, editing the .sln file), after the
+planner has removed repeated restores and builds. Paths inside the directory the projects are
+created in are written relative to it, so the script can be replayed anywhere:
+
+    bash 'Api - Run in Terminal to create.sh' /work/projects
+    MAX_JOBS=2 bash 'Api - Run in Terminal to create.sh'
+    & '.\\Api - Run in Terminal to create.ps1' -Root C:\\work -MaxJobs 2
+"""
+
+import os
+import re
+import shlex
+
+from command_line import CommandLine
+
+SHELLS = ('bash', 'powershell')
+SCRIPT_EXTENSIONS = {'bash': '.sh', 'powershell': '.ps1'}
+
+# Arguments PowerShell passes to a native command as they are written.
+PLAIN_POWERSHELL_ARGUMENT = re.compile(r'^[\w./:=+-]+$')
+
+BASH_RUNNER = r'''
+pids=()
+if (( BASH_VERSINFO[0] < 4 || (BASH_VERSINFO[0] == 4 && BASH_VERSINFO[1] < 3) )); then
+    MAX_JOBS=1  # Without `wait -n` a step cannot be waited for while others run.
+fi
+
+stop_steps() {
+    local pid
+    for pid in "${pids[@]}"; do
+        kill -TERM -- "-$pid" 2>/dev/null
+    done
+    wait 2>/dev/null
+}
+trap 'stop_steps; exit 130' INT TERM
+
+start_step() {
+    # Each step runs in its own process group, so stopping it also stops the dotnet processes it started.
+    set -m
+    ( set -o pipefail; "step_$1" 2>&1 | while IFS= read -r line || [[ -n $line ]]; do printf '[%s] %s\n' "${STEP_NAMES[$1]}" "$line"; done ) &
+    set +m
+    pids[$1]=$!
+    STATE[$1]=running
+}
+
+wait_for_step() {
+    local index status
+    if (( MAX_JOBS > 1 )); then
+        wait -n 2>/dev/null
+    fi
+    for index in "${!pids[@]}"; do
+        if (( MAX_JOBS == 1 )) || ! kill -0 "${pids[$index]}" 2>/dev/null; then
+            status=0
+            wait "${pids[$index]}" || status=$?
+            unset "pids[$index]"
+            if (( status != 0 )); then
+                echo "Failed (exit code $status): ${STEP_NAMES[$index]}" >&2
+                stop_steps
+                exit 1
+            fi
+            STATE[$index]=done
+        fi
+    done
+}
+
+while :; do
+    for index in "${!STEP_NAMES[@]}"; do
+        (( ${#pids[@]} < MAX_JOBS )) || break
+        [[ ${STATE[$index]} == pending ]] || continue
+        ready=1
+        for dependency in ${STEP_DEPENDS_ON[$index]}; do
+            [[ ${STATE[$dependency]} == done ]] || ready=0
+        done
+        (( ready )) && start_step "$index"
+    done
+    (( ${#pids[@]} )) || break
+    wait_for_step
+done
+'''
+
+POWERSHELL_RUNNER = r'''
+$UseThreadJobs = [bool](Get-Command Start-ThreadJob -ErrorAction SilentlyContinue)
+$State = @{}
+foreach ($Step in $Steps) { $State[$Step.Name] = 'pending' }
+$Running = @{}
+try {
+    while ($true) {
+        foreach ($Step in $Steps) {
+            if ($Running.Count -ge $MaxJobs) { break }
+            if ($State[$Step.Name] -ne 'pending') { continue }
+            if (@($Step.DependsOn | Where-Object { $State[$_] -ne 'done' }).Count -gt 0) { continue }
+            if ($UseThreadJobs) {
+                $Job = Start-ThreadJob -Name $Step.Name -ScriptBlock $Step.Script -ArgumentList $Root -ThrottleLimit $MaxJobs
+            } else {
+                $Job = Start-Job -Name $Step.Name -ScriptBlock $Step.Script -ArgumentList $Root
+            }
+            $Running[$Job.Id] = $Step
+            $State[$Step.Name] = 'running'
+        }
+        if ($Running.Count -eq 0) { break }
+        $Job = Wait-Job -Id @($Running.Keys) -Any
+        $Step = $Running[$Job.Id]
+        $Running.Remove($Job.Id)
+        Receive-Job -Job $Job -ErrorAction Continue 2>&1 | ForEach-Object { "[$($Step.Name)] $_" }
+        $Failed = $Job.State -ne 'Completed'
+        Remove-Job -Job $Job -Force
+        if ($Failed) {
+            Write-Error "Failed: $($Step.Name)" -ErrorAction Continue
+            exit 1
+        }
+        $State[$Step.Name] = 'done'
+    }
+} finally {
+    # Reached on a failure or Ctrl+C as well: the steps still running are stopped.
+    foreach ($Id in @($Running.Keys)) { Stop-Job -Id $Id; Remove-Job -Id $Id -Force }
+}
+'''
+
+
+class ReplayStep:
+    """
+    A step of a replay script.
+
+    Attributes:
+        name (str): The step name, prefixed with its project in a batch, e.g. Api:build.
+        command (CommandLine): The commands the step runs, one after another.
+        depends_on (tuple): The names of the steps that must succeed first.
+    """
+
+    def __init__(self, name, command, depends_on=()):
+        self.name = name
+        self.command = command
+        self.depends_on = tuple(depends_on)
+
+
+def replay_steps(graph, prefix=''):
+    """
+    Returns the ReplaySteps of a StepGraph, with prefix added to every step name.
+    """
+    graph.validate()
+    steps = []
+    for step in graph.steps.values():
+        if not isinstance(step.command, CommandLine):
+            raise ValueError(f"Step '{step.name}' has no command line to replay.")
+        steps.append(ReplayStep(prefix + step.name, step.command, (prefix + name for name in step.depends_on)))
+    return steps
+
+
+def relative_to_root(argument, root_directory):
+    if argument == root_directory:
+        return ''
+    if argument.startswith(root_directory.rstrip(os.sep) + os.sep):
+        return argument[len(root_directory.rstrip(os.sep)) + 1:].replace(os.sep, '/')
+    return None
+
+
+def bash_argument(argument, root_directory):
+    relative = relative_to_root(argument, root_directory)
+    if relative is None:
+        return shlex.quote(argument)
+    return '"$ROOT"' + ('/' + shlex.quote(relative) if relative else '')
+
+
+def powershell_argument(argument, root_directory):
+    relative = relative_to_root(argument, root_directory)
+    if relative is not None:
+        escaped = relative.replace('`', '``').replace('$', '`$').replace('"', '`"')
+        return f'"$Root{"/" + escaped if escaped else ""}"'
+    if PLAIN_POWERSHELL_ARGUMENT.match(argument):
+        return argument
+    return "'" + argument.replace("'", "''") + "'"
+
+
+def bash_script(steps, root_directory, max_jobs, description):
+    index = {step.name: position for position, step in enumerate(steps)}
+    lines = [
+        '#!/usr/bin/env bash',
+        f'# {description}',
+        '# Generated by StartDotNet. Usage: [MAX_JOBS=N] bash <this script> [DIRECTORY]',
+        '# Creates the projects in DIRECTORY (the current directory by default).',
+        '',
+        'ROOT="${1:-$PWD}"',
+        f'MAX_JOBS="${{MAX_JOBS:-{max_jobs or "$(getconf _NPROCESSORS_ONLN 2>/dev/null || echo 4)"}}}"',
+        'mkdir -p "$ROOT" && ROOT="$(cd "$ROOT" && pwd)" || exit 1',
+        '',
+    ]
+    for position, step in enumerate(steps):
+        commands = ' && '.join(' '.join(bash_argument(argument, root_directory) for argument in argv) for argv in step.command.argvs)
+        lines.append(f'step_{position}() {{ {commands}; }}')
+    lines.append('')
+    lines.append('STEP_NAMES=(' + ' '.join(shlex.quote(step.name) for step in steps) + ')')
+    lines.append('STEP_DEPENDS_ON=(' + ' '.join("'" + ' '.join(str(index[name]) for name in step.depends_on) + "'" for step in steps) + ')')
+    lines.append('STATE=(' + ' '.join('pending' for _ in steps) + ')')
+    return '\n'.join(lines) + '\n' + BASH_RUNNER + 'echo "All ${#STEP_NAMES[@]} steps succeeded."\n'
+
+
+def powershell_script(steps, root_directory, max_jobs, description):
+    lines = [
+        f'# {description}',
+        '# Generated by StartDotNet. Usage: & <this script> [-Root DIRECTORY] [-MaxJobs N]',
+        '# Creates the projects in DIRECTORY (the current directory by default).',
+        '',
+        f'param([string]$Root = (Get-Location).Path, [int]$MaxJobs = {max_jobs or "[Environment]::ProcessorCount"})',
+        '',
+        'New-Item -ItemType Directory -Force -Path $Root | Out-Null',
+        '$Root = (Resolve-Path -LiteralPath $Root).Path',
+        '',
+        '$Steps = @(',
+    ]
+    for step in steps:
+        lines.append(f"    @{{ Name = '{step.name}'; DependsOn = @({', '.join(repr(name) for name in step.depends_on)}); Script = {{")
+        lines.append('        param($Root)')
+        for argv in step.command.argvs:
+            lines.append('        & ' + ' '.join(powershell_argument(argument, root_directory) for argument in argv) + ' 2>&1')
+            lines.append('        if ($LASTEXITCODE -ne 0) { throw "Exit code $LASTEXITCODE" }')
+        lines.append('    } }')
+    lines.append(')')
+    return '\n'.join(lines) + '\n' + POWERSHELL_RUNNER + "Write-Output \"All $($Steps.Count) steps succeeded.\"\n"
+
+
+def export_script(path, steps, root_directory, shell='bash', max_jobs=None, description='StartDotNet replay script'):
+    """
+    Writes a script in shell (bash or powershell) that runs steps with paths inside root_directory
+    made relative to the directory the script is given. max_jobs is the default number of steps
+    run at once (None uses the CPU count of the machine running the script).
+    """
+    if shell == 'bash':
+        content, encoding = bash_script(steps, root_directory, max_jobs, description), 'utf-8'
+    elif shell == 'powershell':
+        # Windows PowerShell 5.1 reads a script without a byte order mark as ANSI.
+        content, encoding = powershell_script(steps, root_directory, max_jobs, description), 'utf-8-sig'
+    else:
+        raise ValueError(f"Unknown shell '{shell}'. Please use one of: {', '.join(SHELLS)}.")
+    with open(path, 'w', encoding=encoding, newline='\n') as file:
+        file.write(content)
+    if shell == 'bash':
+        os.chmod(path, os.stat(path).st_mode | 0o111)
@@ -0,0 +1,285 @@
+"""
+Scaffold server for StartDotNet.
+
+Once the template cache is warm, starting StartDotNet (Python itself, the imports and reading the
+environment cache) costs more than the scaffold does. `--serve` pays that cost once. The server
+keeps the environment, the template cache and a pool of worker threads alive and accepts
+scaffold requests on a Unix socket, so an editor or a web portal gets each project back in the
+time the work itself takes.
+
+The protocol is newline-delimited JSON. A client sends one request per line and then shuts down
+its side of the connection for writing. The requests of a connection run at the same time, up
+to the number of workers shared by all clients. A request looks like
+
+    {"id": "1", "name": "Api", "type": "webapi", "directory": "/home/me/src"}
+    {"id": "2", "manifest": "shop.toml", "directory": "/home/me/src"}
+
+and may also set framework, run_mode, timeout, step_timeouts and force. The server streams the
+output of each request and ends it with its result:
+
+    {"id": "1", "event": "output", "line": "Executing command: ..."}
+    {"id": "1", "event": "result", "succeeded": true, "failed_commands": [], "duration": 0.4, ...}
+
+The connection is closed after the last result. If the client goes away, the scaffolds it
+started are cancelled.
+"""
+
+import json
+import os
+import select
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# How often a connection waiting for its results checks whether the client has hung up.
+HANGUP_POLL_INTERVAL = 0.2
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.startdotnet', 'startdotnet.sock')
+
+
+class ScaffoldServerError(Exception):
+    pass
+
+
+def unix_sockets_supported():
+    return hasattr(socket, 'AF_UNIX') and hasattr(socketserver, 'ThreadingUnixStreamServer')
+
+
+def encode_message(message):
+    return (json.dumps(message) + '\n').encode('utf-8')
+
+
+def execute_request(request, create_project, output_callback, on_start=None):
+    """
+    Creates the project of a request with create_project(request, output_callback), scaffolds it
+    and returns the result message. on_start is called with the project before it runs.
+    """
+    request_id = request.get('id')
+    start_time = time.perf_counter()
+    try:
+        project = create_project(request, output_callback)
+    except Exception as e:
+        # A bad request (or a manifest that cannot be read) fails that request, not the server.
+        return {'id': request_id, 'event': 'result', 'succeeded': False, 'error': str(e), 'duration': 0.0}
+
+    if on_start is not None:
+        on_start(project)
+    result = {'id': request_id, 'event': 'result', 'project': project.project_name, 'directory': project.project_directory_path,
+              'solution': project.solution_path, 'csproj': project.csproj_path}
+    try:
+        failed_commands = project.run_dotnet_commands()
+        result.update(succeeded=not failed_commands, failed_commands=failed_commands,
+                      skipped_commands=project.skipped_commands, timed_out_commands=project.timed_out_commands,
+                      step_errors=project.step_errors,
+                      up_to_date_commands=project.up_to_date_commands, eliminated_work=project.eliminated_work, estimated_savings=round(project.estimated_savings, 4),
+                      metrics=[metrics.to_dict() for metrics in project.metrics])
+    except Exception as e:
+        result.update(succeeded=False, error=str(e))
+    result['duration'] = time.perf_counter() - start_time
+    return result
+
+
+class ClientConnection:
+    """
+    One client connection, shared by the requests it sent.
+
+    Attributes:
+        closed (bool): Whether the client has gone away; nothing more is sent once it has.
+        projects (list): The projects started for the client's requests, cancelled when it goes away.
+
+    Methods:
+        send: Sends a message to the client; returns False if the client has gone away.
+        close: Marks the client as gone and cancels its projects.
+        add_project: Registers a running project, cancelling it at once if the client has already gone.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.closed = False
+        self.projects = []
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            if self.closed:
+                return False
+            try:
+                self.writer.write(encode_message(message))
+                return True
+            except OSError:
+                pass
+        self.close()
+        return False
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            projects = list(self.projects)
+        for project in projects:
+            project.cancel()
+
+    def add_project(self, project):
+        with self._lock:
+            self.projects.append(project)
+            closed = self.closed
+        if closed:
+            project.cancel()
+
+
+class ScaffoldRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        connection = ClientConnection(self.wfile)
+        futures = []
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request must be a JSON object")
+                except ValueError as e:
+                    connection.send({'id': None, 'event': 'result', 'succeeded': False, 'error': f"Invalid request: {e}"})
+                    continue
+                futures.append(self.server.scaffold_server.submit(request, connection))
+        except OSError:
+            connection.close()
+        self.wait_for_results(futures, connection)
+
+    def wait_for_results(self, futures, connection):
+        # A step that prints nothing would not notice a client that went away until it finished,
+        # so the socket is watched for a hang-up while the requests run.
+        poller = select.poll() if hasattr(select, 'poll') else None
+        if poller is not None:
+            poller.register(self.connection, select.POLLHUP | select.POLLERR)
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=HANGUP_POLL_INTERVAL)
+            if poller is not None and not connection.closed and poller.poll(0):
+                connection.close()
+
+
+class ScaffoldServer:
+    """
+    The ScaffoldServer class accepts scaffold requests on a Unix socket and runs them on a shared
+    pool of worker threads, streaming each project's output back to the client that asked for it.
+
+    Attributes:
+        socket_path (str): The Unix socket the server listens on.
+        create_project (callable): Called with a request and an output callback; returns the
+            DotNetProject to run, or raises ValueError for an invalid request.
+        max_workers (int): The number of projects scaffolded at the same time, across all clients.
+        requests_served (int): The number of requests finished since the server started.
+
+    Methods:
+        remove_stale_socket: Removes a socket left behind by a server that is no longer running.
+        serve_forever: Listens for clients until the server is shut down or interrupted.
+        submit: Queues a request from a client on the worker pool.
+        run_request: Scaffolds the project of a request and sends the client its result.
+        cancel_all: Cancels every running scaffold.
+        shutdown: Stops serve_forever from another thread.
+    """
+
+    def __init__(self, create_project, socket_path=None, max_workers=None):
+        self.socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.create_project = create_project
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.requests_served = 0
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.server = None
+        self.active_projects = set()
+        self._lock = threading.Lock()
+
+    def remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)
+        else:
+            raise ScaffoldServerError(f"A StartDotNet server is already listening on {self.socket_path}.")
+        finally:
+            probe.close()
+
+    def serve_forever(self):
+        if not unix_sockets_supported():
+            raise ScaffoldServerError("The scaffold server needs Unix domain sockets, which this platform does not support.")
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        self.remove_stale_socket()
+        # Only the user running the server may connect, since requests create files in their name.
+        old_umask = os.umask(0o177)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, ScaffoldRequestHandler)
+        finally:
+            os.umask(old_umask)
+        self.server.daemon_threads = True
+        self.server.scaffold_server = self
+        print(f"Serving on {self.socket_path} with {self.max_workers} worker{'s' if self.max_workers != 1 else ''}. Press Ctrl+C to stop.")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.cancel_all()
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self.executor.shutdown(wait=False)
+
+    def submit(self, request, connection):
+        return self.executor.submit(self.run_request, request, connection)
+
+    def run_request(self, request, connection):
+        request_id = request.get('id')
+        started = []
+
+        def output(line):
+            connection.send({'id': request_id, 'event': 'output', 'line': line})
+
+        def start(project):
+            started.append(project)
+            with self._lock:
+                self.active_projects.add(project)
+            connection.add_project(project)
+
+        try:
+            result = execute_request(request, self.create_project, output, start)
+        finally:
+            with self._lock:
+                self.active_projects.difference_update(started)
+                self.requests_served += 1
+        connection.send(result)
+        print(f"{'OK' if result['succeeded'] else 'FAILED':<7} {result.get('project', request_id)} in {result['duration']:.1f}s")
+
+    def cancel_all(self):
+        with self._lock:
+            projects = list(self.active_projects)
+        for project in projects:
+            project.cancel()
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+def send_requests(requests, on_message=None, socket_path=None):
+    """
+    Sends scaffold requests to a running server and calls on_message with every message it sends
+    back. Returns the result messages, keyed by request id. Raises OSError if no server is listening.
+    """
+    results = {}
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        client.connect(socket_path or DEFAULT_SOCKET_PATH)
+        client.sendall(b''.join(encode_message(request) for request in requests))
+        client.shutdown(socket.SHUT_WR)
+        with client.makefile('rb') as reader:
+            for line in reader:
+                message = json.loads(line)
+                if on_message is not None:
+                    on_message(message)
+                if message.get('event') == 'result':
+                    results[message.get('id')] = message
+    return results
@@ -0,0 +1,397 @@
+"""
+Visual Studio solution (.sln) files for StartDotNet.
+
+SolutionFile parses a .sln file, adds and removes projects and writes it back without starting
+`dotnet sln`. Lines the parser does not need to understand are kept as they are, so editing a
+solution only changes the entries for the projects that were added or removed. Projects are
+indexed by GUID and path, which keeps edits fast for solutions with thousands of projects.
+"""
+
+import codecs
+import os
+import re
+import stat
+import tempfile
+import uuid
+
+CSHARP_PROJECT_TYPE = 'FAE04EC0-301F-11D3-BF4B-00C04F79EFBC'
+FSHARP_PROJECT_TYPE = 'F2A71F9B-5D33-465A-A702-920D77279786'
+VB_PROJECT_TYPE = 'F184B08F-C81C-45F6-A57F-5ABD9991F28F'
+SOLUTION_FOLDER_TYPE = '2150E333-8FDC-42A3-9474-1A3956D46DE8'
+
+PROJECT_TYPES_BY_EXTENSION = {
+    '.csproj': CSHARP_PROJECT_TYPE,
+    '.fsproj': FSHARP_PROJECT_TYPE,
+    '.vbproj': VB_PROJECT_TYPE,
+}
+
+DEFAULT_CONFIGURATIONS = ['Debug|Any CPU', 'Release|Any CPU']
+
+# The umask can only be read by setting it, which is done once here, before any threads start.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+EMPTY_SOLUTION = """
+Microsoft Visual Studio Solution File, Format Version 12.00
+# Visual Studio Version 17
+VisualStudioVersion = 17.0.31903.59
+MinimumVisualStudioVersion = 10.0.40219.1
+Global
+\tGlobalSection(SolutionConfigurationPlatforms) = preSolution
+\t\tDebug|Any CPU = Debug|Any CPU
+\t\tRelease|Any CPU = Release|Any CPU
+\tEndGlobalSection
+\tGlobalSection(SolutionProperties) = preSolution
+\t\tHideSolutionNode = FALSE
+\tEndGlobalSection
+EndGlobal
+"""
+
+PROJECT_PATTERN = re.compile(r'^Project\("\{(?P<type>[^}]+)\}"\)\s*=\s*"(?P<name>[^"]*)",\s*"(?P<path>[^"]*)",\s*"\{(?P<guid>[^}]+)\}"')
+SECTION_PATTERN = re.compile(r'^\s*GlobalSection\((?P<name>[^)]+)\)\s*=\s*(?P<when>\S+)')
+PROJECT_GUID_PATTERN = re.compile(r'<ProjectGuid>\s*\{?([0-9A-Fa-f-]{36})\}?\s*</ProjectGuid>')
+NESTED_PROJECT_PATTERN = re.compile(r'^\s*\{(?P<child>[0-9A-Fa-f-]{36})\}\s*=\s*\{(?P<parent>[0-9A-Fa-f-]{36})\}')
+
+
+class SolutionFileError(Exception):
+    pass
+
+
+class SolutionProject:
+    """
+    A Project(...) ... EndProject block of a solution file.
+
+    Attributes:
+        type_guid (str): The project type GUID, e.g. the C# or solution folder GUID.
+        name (str): The project name shown in the solution.
+        path (str): The project path relative to the solution, with backslashes.
+        guid (str): The unique GUID of the project, upper-case without braces.
+        body (list): The lines between the Project line and EndProject, kept verbatim.
+    """
+
+    def __init__(self, type_guid, name, path, guid, body=None):
+        self.type_guid = type_guid.upper()
+        self.name = name
+        self.path = path
+        self.guid = guid.upper()
+        self.body = body or []
+
+    @property
+    def is_solution_folder(self):
+        return self.type_guid == SOLUTION_FOLDER_TYPE
+
+    def to_lines(self):
+        return ([f'Project("{{{self.type_guid}}}") = "{self.name}", "{self.path}", "{{{self.guid}}}"']
+                + self.body + ['EndProject'])
+
+
+class GlobalSection:
+    """
+    A GlobalSection(...) ... EndGlobalSection block inside the Global block.
+
+    Attributes:
+        name (str): The section name, e.g. ProjectConfigurationPlatforms.
+        when (str): preSolution or postSolution.
+        lines (list): The lines inside the section, kept verbatim.
+    """
+
+    def __init__(self, name, when, lines=None):
+        self.name = name
+        self.when = when
+        self.lines = lines or []
+
+    def to_lines(self):
+        return [f'\tGlobalSection({self.name}) = {self.when}'] + self.lines + ['\tEndGlobalSection']
+
+
+class SolutionFile:
+    """
+    The SolutionFile class reads, edits and writes a Visual Studio solution file.
+
+    Attributes:
+        path (str): The file the solution was loaded from and is saved to.
+        items (list): Lines and SolutionProject blocks before the Global block, in file order.
+        sections (list): The GlobalSection blocks inside the Global block and, in file order, any other lines there.
+        trailer (list): Lines after the Global block.
+        newline (str): The line ending used by the file.
+        bom (bool): Whether the file starts with a UTF-8 byte order mark.
+
+    Methods:
+        load: Reads a solution file from disk.
+        parse: Builds a SolutionFile from the text of a .sln file.
+        projects: Returns the projects (not solution folders) in the solution.
+        find_project: Finds a project by GUID, name or path.
+        add_project: Adds a project file, with configuration entries for every solution configuration.
+        add_projects: Adds several project files and returns the new SolutionProject entries.
+        remove_project: Removes a project and every configuration and nesting entry that refers to it.
+        to_text: Returns the solution as .sln text.
+        save: Writes the solution to disk, replacing the file atomically.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.items = []
+        self.sections = []
+        self.trailer = []
+        self.newline = '\r\n'
+        self.bom = True
+        self._has_global = False
+        self._projects_by_guid = {}
+        self._projects_by_path = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        bom = data.startswith(codecs.BOM_UTF8)
+        text = data[len(codecs.BOM_UTF8):].decode('utf-8') if bom else data.decode('utf-8')
+        solution = cls.parse(text, path)
+        solution.bom = bom
+        return solution
+
+    @classmethod
+    def create(cls, path):
+        return cls.parse(EMPTY_SOLUTION, path)
+
+    @classmethod
+    def parse(cls, text, path=None):
+        solution = cls(path)
+        solution.newline = '\r\n' if '\r\n' in text else '\n'
+        lines = text.splitlines()
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            stripped = line.strip()
+            project_match = PROJECT_PATTERN.match(stripped)
+            if project_match:
+                body = []
+                index += 1
+                while index < len(lines) and lines[index].strip() != 'EndProject':
+                    body.append(lines[index])
+                    index += 1
+                if index == len(lines):
+                    raise SolutionFileError(f"Project '{project_match.group('name')}' is missing EndProject")
+                solution._append_project(SolutionProject(project_match.group('type'), project_match.group('name'),
+                                                         project_match.group('path'), project_match.group('guid'), body))
+            elif stripped == 'Global':
+                solution._has_global = True
+                index += 1
+                while index < len(lines) and lines[index].strip() != 'EndGlobal':
+                    section_match = SECTION_PATTERN.match(lines[index])
+                    if section_match:
+                        section = GlobalSection(section_match.group('name'), section_match.group('when'))
+                        index += 1
+                        while index < len(lines) and lines[index].strip() != 'EndGlobalSection':
+                            section.lines.append(lines[index])
+                            index += 1
+                        solution.sections.append(section)
+                    else:
+                        solution.sections.append(lines[index])
+                    index += 1
+                if index == len(lines):
+                    raise SolutionFileError("Global block is missing EndGlobal")
+            elif solution._has_global:
+                solution.trailer.append(line)
+            else:
+                solution.items.append(line)
+            index += 1
+        return solution
+
+    def _append_project(self, project):
+        self.items.append(project)
+        self._projects_by_guid[project.guid] = project
+        self._projects_by_path[self._normalise_path(project.path)] = project
+
+    @staticmethod
+    def _normalise_path(path):
+        return path.replace('/', '\\').lower()
+
+    def projects(self):
+        return [item for item in self.items if isinstance(item, SolutionProject) and not item.is_solution_folder]
+
+    def find_project(self, key):
+        key = key.strip('{}')
+        if key.upper() in self._projects_by_guid:
+            return self._projects_by_guid[key.upper()]
+        if self._normalise_path(key) in self._projects_by_path:
+            return self._projects_by_path[self._normalise_path(key)]
+        for item in self.items:
+            if isinstance(item, SolutionProject) and item.name == key:
+                return item
+        return None
+
+    def get_section(self, name, when=None, create=False):
+        for section in self.sections:
+            if isinstance(section, GlobalSection) and section.name == name:
+                return section
+        if not create:
+            return None
+        section = GlobalSection(name, when)
+        # Keep preSolution sections ahead of postSolution ones, as Visual Studio does.
+        if when == 'preSolution':
+            position = next((i for i, existing in enumerate(self.sections)
+                             if isinstance(existing, GlobalSection) and existing.when != 'preSolution'), len(self.sections))
+            self.sections.insert(position, section)
+        else:
+            self.sections.append(section)
+        self._has_global = True
+        return section
+
+    def configurations(self):
+        section = self.get_section('SolutionConfigurationPlatforms', 'preSolution', create=True)
+        if not section.lines:
+            section.lines.extend(f'\t\t{configuration} = {configuration}' for configuration in DEFAULT_CONFIGURATIONS)
+        return [line.split('=')[0].strip() for line in section.lines if '=' in line]
+
+    def _relative_path(self, project_path):
+        if self.path is None or not os.path.isabs(project_path):
+            return project_path.replace('/', '\\')
+        try:
+            return os.path.relpath(project_path, os.path.dirname(os.path.abspath(self.path))).replace('/', '\\')
+        except ValueError:
+            # On Windows there is no relative path from one drive to another.
+            return project_path.replace('/', '\\')
+
+    def _insert_project(self, project):
+        # Scan backwards: only the few header lines before the first project are ever skipped.
+        position = len(self.items)
+        while position > 0 and not isinstance(self.items[position - 1], SolutionProject):
+            position -= 1
+        self.items.insert(position or len(self.items), project)
+        self._projects_by_guid[project.guid] = project
+        self._projects_by_path[self._normalise_path(project.path)] = project
+
+    def _get_solution_folder(self, folder_path):
+        # A path such as src/Libs is a Libs folder nested in a src folder, as `dotnet sln add
+        # --solution-folder` creates it. Returns the innermost folder, or None for an empty path.
+        nested_section = self.get_section('NestedProjects', 'preSolution')
+        parents = {}
+        for line in nested_section.lines if nested_section is not None else ():
+            nested_match = NESTED_PROJECT_PATTERN.match(line)
+            if nested_match:
+                parents[nested_match.group('child').upper()] = nested_match.group('parent').upper()
+        parent = None
+        for folder_name in (part for part in re.split(r'[\\/]', folder_path) if part not in ('', '.')):
+            parent_guid = parent.guid if parent is not None else None
+            folder = next((item for item in self.items if isinstance(item, SolutionProject) and item.is_solution_folder
+                           and item.name == folder_name and parents.get(item.guid) == parent_guid), None)
+            if folder is None:
+                folder = SolutionProject(SOLUTION_FOLDER_TYPE, folder_name, folder_name, str(uuid.uuid4()))
+                self._insert_project(folder)
+                if parent is not None:
+                    self._nest(folder, parent)
+                    parents[folder.guid] = parent.guid
+            parent = folder
+        return parent
+
+    def _nest(self, item, folder):
+        nested_section = self.get_section('NestedProjects', 'preSolution', create=True)
+        nested_section.lines.append(f'\t\t{{{item.guid}}} = {{{folder.guid}}}')
+
+    def add_project(self, project_path, project_guid=None, type_guid=None, solution_folder=None, configurations=None):
+        relative_path = self._relative_path(project_path)
+        existing = self._projects_by_path.get(self._normalise_path(relative_path))
+        if existing is not None:
+            return existing
+
+        if project_guid is None and os.path.isfile(project_path):
+            with open(project_path, 'r', encoding='utf-8', errors='replace') as file:
+                guid_match = PROJECT_GUID_PATTERN.search(file.read())
+            project_guid = guid_match.group(1) if guid_match else None
+        if type_guid is None:
+            extension = os.path.splitext(project_path)[1].lower()
+            if extension not in PROJECT_TYPES_BY_EXTENSION:
+                raise SolutionFileError(f"Unsupported project file type: {project_path}")
+            type_guid = PROJECT_TYPES_BY_EXTENSION[extension]
+
+        name = os.path.splitext(os.path.basename(relative_path.replace('\\', '/')))[0]
+        project = SolutionProject(type_guid, name, relative_path, project_guid or str(uuid.uuid4()))
+        if project.guid in self._projects_by_guid:
+            project.guid = str(uuid.uuid4()).upper()
+        self._insert_project(project)
+
+        configuration_section = self.get_section('ProjectConfigurationPlatforms', 'postSolution', create=True)
+        for configuration in configurations or self.configurations():
+            project_configuration = f"{configuration.split('|')[0]}|Any CPU"
+            configuration_section.lines.append(f'\t\t{{{project.guid}}}.{configuration}.ActiveCfg = {project_configuration}')
+            configuration_section.lines.append(f'\t\t{{{project.guid}}}.{configuration}.Build.0 = {project_configuration}')
+
+        folder = self._get_solution_folder(solution_folder) if solution_folder else None
+        if folder is not None:
+            self._nest(project, folder)
+        return project
+
+    def add_projects(self, project_paths, solution_folder=None):
+        configurations = self.configurations()
+        return [self.add_project(path, solution_folder=solution_folder, configurations=configurations) for path in project_paths]
+
+    def remove_project(self, key):
+        project = self.find_project(key)
+        if project is None:
+            return False
+        self.items.remove(project)
+        del self._projects_by_guid[project.guid]
+        self._projects_by_path.pop(self._normalise_path(project.path), None)
+        marker = f'{{{project.guid}}}'
+        for section in self.sections:
+            if isinstance(section, GlobalSection) and section.name in ('ProjectConfigurationPlatforms', 'NestedProjects'):
+                section.lines = [line for line in section.lines if marker not in line.upper()]
+        return True
+
+    def to_lines(self):
+        lines = []
+        for item in self.items:
+            lines.extend(item.to_lines() if isinstance(item, SolutionProject) else [item])
+        if self._has_global:
+            lines.append('Global')
+            for section in self.sections:
+                lines.extend(section.to_lines() if isinstance(section, GlobalSection) else [section])
+            lines.append('EndGlobal')
+        lines.extend(self.trailer)
+        return lines
+
+    def to_text(self):
+        return self.newline.join(self.to_lines()) + self.newline
+
+    def save(self, path=None):
+        path = path or self.path
+        data = self.to_text().encode('utf-8')
+        if self.bom:
+            data = codecs.BOM_UTF8 + data
+        directory = os.path.dirname(os.path.abspath(path))
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+        file_descriptor, temporary_path = tempfile.mkstemp(prefix='.sln-', dir=directory)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(data)
+            # mkstemp creates the file readable by its owner only; keep the solution's own mode.
+            os.chmod(temporary_path, mode)
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        self.path = path
+
+
+def add_projects_to_solution(solution_path, project_paths, solution_folder=None):
+    """
+    Adds project files to a solution file on disk, creating the solution if it does not exist.
+    """
+    solution = SolutionFile.load(solution_path) if os.path.exists(solution_path) else SolutionFile.create(solution_path)
+    added = solution.add_projects(project_paths, solution_folder)
+    solution.save()
+    return added
+
+
+def remove_projects_from_solution(solution_path, keys):
+    """
+    Removes projects (by GUID, name or path) from a solution file on disk.
+    """
+    solution = SolutionFile.load(solution_path)
+    removed = [key for key in keys if solution.remove_project(key)]
+    solution.save()
+    return removed
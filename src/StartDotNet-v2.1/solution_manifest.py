@@ -0,0 +1,176 @@
+"""
+Multi-project solution manifests for StartDotNet.
+
+A manifest describes a whole solution: its projects, their types and the project references
+between them. It is written as JSON or TOML, for example:
+
+    solution = "Shop"
+    framework = "net8.0"
+    run = "Shop.Api"
+
+    [[projects]]
+    name = "Shop.Api"
+    type = "webapi"
+    folder = "src"
+    references = ["Shop.Core"]
+
+    [[projects]]
+    name = "Shop.Core"
+    type = "classlib"
+    folder = "src"
+
+    [[projects]]
+    name = "Shop.Tests"
+    type = "xunit"
+    folder = "tests"
+    references = ["Shop.Core"]
+
+Each project is created in <solution>/<folder>/<name>/ and listed under the solution folder of
+the same name. run names the project started after the build (leave it out to only build), and
+framework may also be set per project.
+"""
+
+import json
+import os
+import re
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+PROJECT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$')
+
+
+class SolutionManifestError(ValueError):
+    pass
+
+
+class ProjectSpec:
+    """
+    One project in a solution manifest.
+
+    Attributes:
+        name (str): The project name, which is also its directory and .csproj name.
+        project_type (str): The template to create it from, e.g. classlib.
+        folder (str): The directory (and solution folder) the project is placed in, or None.
+        references (list): The names of the projects this project references.
+        framework (str): The target framework, or None for the solution's framework.
+    """
+
+    def __init__(self, name, project_type='classlib', folder=None, references=None, framework=None):
+        self.name = name
+        self.project_type = project_type
+        self.folder = folder
+        self.references = list(references or [])
+        self.framework = framework
+
+    def relative_directory(self):
+        return os.path.join(self.folder, self.name) if self.folder else self.name
+
+    def relative_csproj_path(self):
+        return os.path.join(self.relative_directory(), f"{self.name}.csproj")
+
+    def __repr__(self):
+        return f"ProjectSpec({self.name!r}, {self.project_type!r})"
+
+
+class SolutionManifest:
+    """
+    The SolutionManifest class holds a parsed and validated solution manifest.
+
+    Attributes:
+        solution_name (str): The name of the solution and of the directory it is created in.
+        projects (list): The ProjectSpecs, in the order they were listed.
+        framework (str): The target framework of every project that does not set its own, or None.
+        run_project (str): The name of the project to run after the build, or None.
+
+    Methods:
+        load: Reads a manifest from a .json or .toml file.
+        from_dict: Builds a manifest from parsed JSON or TOML data.
+        validate: Checks names, types, references and reference cycles.
+        get_project: Returns the ProjectSpec with a name.
+    """
+
+    def __init__(self, solution_name, projects, framework=None, run_project=None):
+        self.solution_name = solution_name
+        self.projects = projects
+        self.framework = framework
+        self.run_project = run_project
+
+    @classmethod
+    def load(cls, path, valid_types=None):
+        extension = os.path.splitext(path)[1].lower()
+        try:
+            if extension == '.toml':
+                if tomllib is None:
+                    raise SolutionManifestError("TOML manifests need Python 3.11 or newer; use a .json manifest instead.")
+                with open(path, 'rb') as file:
+                    data = tomllib.load(file)
+            else:
+                with open(path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+        except OSError as e:
+            raise SolutionManifestError(f"Cannot read manifest {path}: {e}")
+        except ValueError as e:
+            raise SolutionManifestError(f"Invalid manifest {path}: {e}")
+        return cls.from_dict(data, valid_types)
+
+    @classmethod
+    def from_dict(cls, data, valid_types=None):
+        if not isinstance(data, dict) or not isinstance(data.get('projects'), list):
+            raise SolutionManifestError("A manifest needs a list of projects.")
+        projects = []
+        for entry in data['projects']:
+            if not isinstance(entry, dict) or 'name' not in entry:
+                raise SolutionManifestError(f"Every project needs a name: {entry!r}")
+            projects.append(ProjectSpec(entry['name'], entry.get('type', 'classlib'), entry.get('folder'),
+                                        entry.get('references'), entry.get('framework')))
+        manifest = cls(data.get('solution'), projects, data.get('framework'), data.get('run'))
+        manifest.validate(valid_types)
+        return manifest
+
+    def get_project(self, name):
+        return next((project for project in self.projects if project.name == name), None)
+
+    def validate(self, valid_types=None):
+        if not self.solution_name or not PROJECT_NAME_PATTERN.match(self.solution_name):
+            raise SolutionManifestError(f"Invalid solution name '{self.solution_name}'. Names may contain letters, digits, underscores and dots.")
+        if not self.projects:
+            raise SolutionManifestError("The manifest does not list any projects.")
+        names = set()
+        for project in self.projects:
+            if not PROJECT_NAME_PATTERN.match(str(project.name)):
+                raise SolutionManifestError(f"Invalid project name '{project.name}'. Names may contain letters, digits, underscores and dots.")
+            if project.name in names:
+                raise SolutionManifestError(f"Project '{project.name}' is listed more than once.")
+            if valid_types is not None and project.project_type not in valid_types:
+                raise SolutionManifestError(f"Invalid type '{project.project_type}' for project '{project.name}'. Please use one of: {', '.join(valid_types)}.")
+            for field, value in (('folder', project.folder), ('framework', project.framework)):
+                if value is not None and not isinstance(value, str):
+                    raise SolutionManifestError(f"The {field} of project '{project.name}' must be a string, not {value!r}.")
+            if project.folder is not None and (os.path.isabs(project.folder) or '..' in re.split(r'[\\/]', project.folder)):
+                raise SolutionManifestError(f"The folder of project '{project.name}' must be a relative path inside the solution.")
+            names.add(project.name)
+        for project in self.projects:
+            for reference in project.references:
+                if reference not in names:
+                    raise SolutionManifestError(f"Project '{project.name}' references unknown project '{reference}'.")
+        if self.run_project is not None and self.run_project not in names:
+            raise SolutionManifestError(f"The project to run, '{self.run_project}', is not in the manifest.")
+
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise SolutionManifestError(f"Project references form a cycle at '{name}'.")
+            visiting.add(name)
+            for reference in self.get_project(name).references:
+                visit(reference)
+            visiting.discard(name)
+            visited.add(name)
+
+        for project in self.projects:
+            visit(project.name)
@@ -0,0 +1,128 @@
+"""
+Staged scaffolding for StartDotNet (--stage).
+
+On a network-mounted workspace every file the template engine writes, and every file restore
+and build write to obj and bin, is a round trip to the server. With --stage a new project is
+created, restored and built in a scratch directory on a local file system instead (by default
+/dev/shm, a tmpfs, when it exists, otherwise the temporary directory) and published to its
+destination once every step has succeeded:
+
+    - the absolute paths restore and build wrote into obj are pointed at the destination;
+    - the tree is renamed into place when the scratch directory is on the same file system, or
+      copied in one pass into a hidden directory next to the destination and then renamed, so
+      the destination never holds a half-finished project (see file_clone.move_tree).
+
+A scaffold that fails or is cancelled is removed from the scratch directory; its step logs are
+moved to ~/.startdotnet/staged-logs first, since the scratch directory may not outlive a reboot. A project is built in place instead when its directory already exists (earlier work
+is resumed there) or when a directory above it holds files MSBuild or the .NET CLI read from
+parent directories, such as Directory.Build.props or NuGet.config, which the scratch directory
+would not see.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from command_line import CommandLine
+
+# Files MSBuild, NuGet and the .NET CLI look for in the directories above a project.
+INHERITED_BUILD_FILES = ('Directory.Build.props', 'Directory.Build.targets', 'Directory.Packages.props',
+                         'NuGet.config', 'nuget.config', 'NuGet.Config', 'global.json')
+
+TMPFS_DIRECTORY = '/dev/shm'
+
+# Where the logs of a discarded scaffold are kept.
+DEFAULT_KEEP_DIRECTORY = os.path.join(os.path.expanduser('~'), '.startdotnet', 'staged-logs')
+
+
+def default_stage_root():
+    if os.path.isdir(TMPFS_DIRECTORY) and os.access(TMPFS_DIRECTORY, os.W_OK | os.X_OK):
+        return TMPFS_DIRECTORY
+    return tempfile.gettempdir()
+
+
+def inherited_build_files(destination):
+    """
+    Returns the files in the directories above destination that a build of a project in
+    destination would read.
+    """
+    found = []
+    directory = os.path.dirname(os.path.abspath(destination))
+    while True:
+        found.extend(path for path in (os.path.join(directory, name) for name in INHERITED_BUILD_FILES)
+                     if os.path.isfile(path) and path not in found)
+        parent_directory = os.path.dirname(directory)
+        if parent_directory == directory:
+            return found
+        directory = parent_directory
+
+
+def retarget_command(command, old_path, new_path):
+    """
+    Returns command with old_path replaced by new_path in its arguments.
+    """
+    if not isinstance(command, CommandLine):
+        return command
+    return CommandLine(*(tuple(argument.replace(old_path, new_path) for argument in argv) for argv in command.argvs))
+
+
+class StagedDirectory:
+    """
+    A scratch directory a project is built in before it is published to its destination.
+
+    Attributes:
+        destination (str): Where the project is published.
+        stage_root (str): The directory scratch directories are created in.
+        staging_directory (str): Where the project is built; it has the same name as destination.
+        publish_method (str): rename or copy, once the project has been published.
+
+    Methods:
+        publish: Moves the finished project to its destination.
+        discard: Removes the staged project.
+    """
+
+    def __init__(self, destination, stage_root=None):
+        self.destination = os.path.abspath(destination)
+        self.stage_root = stage_root or default_stage_root()
+        os.makedirs(self.stage_root, exist_ok=True)
+        self._scratch_directory = tempfile.mkdtemp(prefix='startdotnet-stage-', dir=self.stage_root)
+        self.staging_directory = os.path.join(self._scratch_directory, os.path.basename(self.destination))
+        self.publish_method = None
+
+    def publish(self):
+        """
+        Moves the staged project to destination, which must not exist, and returns how it was
+        moved (rename or copy). Nothing is left at destination if it fails.
+        """
+        from file_clone import move_tree
+        from project_pool import retarget_restore_output
+        if os.path.lexists(self.destination):
+            raise FileExistsError(f"{self.destination} was created while the project was staged.")
+        # Restore may have written the staging path as given or with its symbolic links resolved.
+        for staged_path in {self.staging_directory, os.path.realpath(self.staging_directory)}:
+            retarget_restore_output(self.staging_directory, staged_path, self.destination, keep_build_output=True)
+        os.makedirs(os.path.dirname(self.destination), exist_ok=True)
+        self.publish_method = move_tree(self.staging_directory, self.destination)
+        shutil.rmtree(self._scratch_directory, ignore_errors=True)
+        return self.publish_method
+
+    def discard(self, keep=None, keep_directory=None):
+        """
+        Removes the staged project. keep (a path inside it, e.g. its logs) is first moved to a new
+        directory in keep_directory (DEFAULT_KEEP_DIRECTORY by default) when it exists. Returns
+        where keep was moved, or None.
+        """
+        from file_clone import move_tree
+        kept_path = None
+        if keep is not None and os.path.exists(keep):
+            keep_directory = keep_directory or DEFAULT_KEEP_DIRECTORY
+            try:
+                os.makedirs(keep_directory, exist_ok=True)
+                prefix = f"{os.path.basename(self.destination)}-{time.strftime('%Y%m%d-%H%M%S')}-"
+                kept_path = os.path.join(tempfile.mkdtemp(prefix=prefix, dir=keep_directory), os.path.basename(keep))
+                move_tree(keep, kept_path)
+            except OSError:
+                kept_path = None
+        shutil.rmtree(self._scratch_directory, ignore_errors=True)
+        return kept_path
@@ -0,0 +1,104 @@
+"""
+Thin client for a running StartDotNet server (StartDotNet-v2.1.py --serve).
+
+The client sends its projects to the server's Unix socket and prints the output the server
+streams back. It imports nothing but the protocol, so it starts in a fraction of the time a full
+StartDotNet run needs, and the server's warm caches do the rest.
+
+    python startdotnet_client.py MyApi -t webapi -d ./Projects
+    python startdotnet_client.py -b Api:webapi Core:classlib Tests:xunit
+    python startdotnet_client.py -m shop.toml
+"""
+
+import argparse
+import os
+import sys
+
+from scaffold_server import DEFAULT_SOCKET_PATH, send_requests
+
+
+def parse_step_timeout(spec):
+    step_name, _, seconds = spec.partition('=')
+    try:
+        return step_name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid step timeout '{spec}'. Use STEP=SECONDS, e.g. build=600.")
+
+def build_requests(args):
+    options = {'framework': args.framework, 'run_mode': args.run_mode, 'timeout': args.timeout,
+               'step_timeouts': dict(args.step_timeout) or None, 'force': args.force or None}
+    options = {key: value for key, value in options.items() if value is not None}
+    requests = []
+    if args.project_name:
+        requests.append(dict(options, name=args.project_name, type=args.type))
+    for spec in args.batch or []:
+        project_name, _, project_type = spec.partition(':')
+        requests.append(dict(options, name=project_name, type=project_type or args.type))
+    if args.manifest:
+        requests.append(dict(options, manifest=os.path.abspath(args.manifest)))
+    directory = os.path.abspath(args.directory or os.getcwd())
+    for index, request in enumerate(requests, 1):
+        request['id'] = str(index)
+        request['directory'] = directory
+    return requests
+
+def print_result(label, result):
+    if result is None:
+        print(f"  FAILED  {label}: the server closed the connection before it finished.")
+        return False
+    print(f"  {'OK' if result['succeeded'] else 'FAILED':<7} {label} in {result.get('duration', 0.0):.1f}s")
+    for cmd in result.get('failed_commands', []):
+        print(f"          {'timed out' if cmd in result.get('timed_out_commands', []) else 'failed'}: {cmd}")
+    for cmd in result.get('skipped_commands', []):
+        print(f"          skipped: {cmd}")
+    if result.get('error'):
+        print(f"          error: {result['error']}")
+    return result['succeeded']
+
+def main():
+    parser = argparse.ArgumentParser(description="Create .NET projects through a running StartDotNet server.")
+    parser.add_argument("project_name", nargs='?', default=None, help="The name of the project to create.")
+    parser.add_argument("-d", "--directory", help="The directory where the project should be created (defaults to the current directory).")
+    parser.add_argument("-t", "--type", default='console', help="The type of .NET project to create.")
+    parser.add_argument("-m", "--manifest", metavar="PATH", help="Create a solution described by a .json or .toml manifest.")
+    parser.add_argument("-b", "--batch", nargs='+', metavar="NAME[:TYPE]", help="Create several projects at once.")
+    parser.add_argument("-f", "--framework", default=None, help="The target framework, e.g. net8.0.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds any single step may run.")
+    parser.add_argument("--step-timeout", type=parse_step_timeout, action="append", default=[], metavar="STEP=SECONDS",
+                        help="Timeout for one step; may be repeated.")
+    parser.add_argument("--run-mode", default=None, help="wait, ready, skip or auto (defaults to the server's setting).")
+    parser.add_argument("--force", action="store_true", help="Run every step again, even steps whose files are unchanged.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"The socket of the server (defaults to {DEFAULT_SOCKET_PATH}).")
+    args = parser.parse_args()
+
+    requests = build_requests(args)
+    if not requests:
+        parser.error("Give a project name, --batch or --manifest.")
+    labels = {request['id']: request.get('name') or os.path.basename(request['manifest']) for request in requests}
+
+    def print_message(message):
+        if message.get('event') == 'output':
+            line = message.get('line', '')
+            print(f"[{labels.get(message.get('id'))}] {line}" if len(requests) > 1 else line, flush=True)
+
+    try:
+        results = send_requests(requests, print_message, args.socket)
+    except KeyboardInterrupt:
+        # Closing the connection makes the server cancel this client's projects.
+        print("\nCancelled.")
+        sys.exit(130)
+    except OSError as e:
+        print(f"Error: No StartDotNet server is reachable on {args.socket} ({e}). Start one with: python StartDotNet-v2.1.py --serve")
+        sys.exit(2)
+
+    print("\nSummary:")
+    succeeded = [print_result(labels[request['id']], results.get(request['id'])) for request in requests]
+    if None in results:
+        print_result("request", results[None])
+        succeeded.append(False)
+    sys.exit(0 if all(succeeded) else 1)
+
+#=====================================================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Step graph executor for StartDotNet.
+
+A StepGraph holds named steps and the steps each one depends on. Steps whose dependencies
+have all succeeded run at the same time on a thread pool, and as soon as a step fails every
+step that depends on it (directly or indirectly) is marked as skipped, so the total run time
+is the critical path through the graph rather than the sum of all steps.
+
+A step can also be given an up_to_date check. When the step's dependencies are satisfied the
+check runs first, and if it returns True the step is marked up to date without running, which
+satisfies its dependents just like a step that succeeded.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+UP_TO_DATE = 'up to date'
+
+# Statuses that let the steps depending on a step start.
+COMPLETED = (SUCCEEDED, UP_TO_DATE)
+
+
+class Step:
+    """
+    A single unit of work in a StepGraph.
+
+    Attributes:
+        name (str): The unique name of the step.
+        action (callable): Called with no arguments to run the step; returns True on success.
+        depends_on (tuple): The names of the steps that must succeed before this one starts.
+        command (str): A human-readable description of the work, e.g. the shell command.
+        up_to_date (callable): Called with no arguments before the step would start; returning True
+            marks the step as up to date instead of running it (None always runs the step).
+        status (str): One of pending, running, succeeded, failed, skipped or up to date.
+        duration (float): Wall-clock seconds the action took.
+        error (str): The exception raised by the action, if any.
+    """
+
+    def __init__(self, name, action, depends_on=(), command=None, up_to_date=None):
+        self.name = name
+        self.action = action
+        self.depends_on = tuple(depends_on)
+        self.command = command or name
+        self.up_to_date = up_to_date
+        self.status = PENDING
+        self.duration = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return f"Step({self.name!r}, status={self.status!r})"
+
+
+class StepGraph:
+    """
+    The StepGraph class runs a set of steps with explicit dependencies, starting each step
+    as soon as everything it depends on has succeeded.
+
+    Methods:
+        add_step: Adds a step to the graph and returns it.
+        validate: Checks that every dependency exists and that the graph has no cycles.
+        dependents_of: Returns every step that depends, directly or indirectly, on a step.
+        run: Executes the graph and returns the steps in the order they were added.
+        run_async: Executes the graph on the running event loop; coroutine actions are awaited and
+            plain callables run in the loop's default executor.
+    """
+
+    def __init__(self):
+        self.steps = {}
+
+    def add_step(self, name, action, depends_on=(), command=None, up_to_date=None):
+        if name in self.steps:
+            raise ValueError(f"Duplicate step name: {name}")
+        step = Step(name, action, depends_on, command, up_to_date)
+        self.steps[name] = step
+        return step
+
+    def validate(self):
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step '{step.name}' depends on unknown step '{dependency}'")
+
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at step '{name}'")
+            visiting.add(name)
+            for dependency in self.steps[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.steps:
+            visit(name)
+
+    def dependents_of(self, name):
+        dependents, queue = [], [name]
+        while queue:
+            current = queue.pop()
+            for step in self.steps.values():
+                if current in step.depends_on and step not in dependents:
+                    dependents.append(step)
+                    queue.append(step.name)
+        return dependents
+
+    def _run_step(self, step):
+        start_time = time.perf_counter()
+        try:
+            succeeded = bool(step.action())
+        except Exception as e:
+            step.error = str(e)
+            succeeded = False
+        step.duration = time.perf_counter() - start_time
+        return succeeded
+
+    def _is_up_to_date(self, step):
+        if step.up_to_date is None:
+            return False
+        try:
+            return bool(step.up_to_date())
+        except Exception:
+            return False  # A check that cannot decide means the step runs.
+
+    def ready_steps(self):
+        # Steps found up to date complete immediately, which can make their dependents ready too.
+        ready = []
+        while True:
+            completed_any = False
+            for step in self.steps.values():
+                if step.status != PENDING or step in ready:
+                    continue
+                if not all(self.steps[dependency].status in COMPLETED for dependency in step.depends_on):
+                    continue
+                if self._is_up_to_date(step):
+                    step.status = UP_TO_DATE
+                    completed_any = True
+                else:
+                    ready.append(step)
+            if not completed_any:
+                return ready
+
+    def finish_step(self, step, succeeded):
+        if succeeded:
+            step.status = SUCCEEDED
+            return
+        step.status = FAILED
+        for dependent in self.dependents_of(step.name):
+            if dependent.status == PENDING:
+                dependent.status = SKIPPED
+
+    def run(self, max_workers=None):
+        self.validate()
+        max_workers = max_workers or max(len(self.steps), 1)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while True:
+                for step in self.ready_steps():
+                    step.status = RUNNING
+                    running[executor.submit(self._run_step, step)] = step
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    self.finish_step(step, future.result())
+
+        return list(self.steps.values())
+
+    async def _run_step_async(self, step):
+        import asyncio  # Only the asyncio runs need it; the command-line path does not load it.
+        start_time = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(step.action):
+                result = await step.action()
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(None, step.action)
+            succeeded = bool(result)
+        except Exception as e:
+            step.error = str(e)
+            succeeded = False
+        step.duration = time.perf_counter() - start_time
+        return succeeded
+
+    async def run_async(self):
+        import asyncio
+        self.validate()
+        running = {}
+        while True:
+            for step in self.ready_steps():
+                step.status = RUNNING
+                running[asyncio.ensure_future(self._run_step_async(step))] = step
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step = running.pop(task)
+                self.finish_step(step, task.result())
+
+        return list(self.steps.values())
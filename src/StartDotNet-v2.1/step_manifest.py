@@ -0,0 +1,137 @@
+"""
+Step manifest for StartDotNet.
+
+The manifest is a JSON file next to the solution (<solution>/.startdotnet/manifest.json) that
+records every step that completed: the command it ran, and hashes of the files it read (inputs)
+and the files it produced (outputs). When the same project is scaffolded again, a step whose
+command is the same and whose inputs and outputs still hash to the recorded values is up to
+date and is not run again, so a re-run after fixing a build error resumes at the build instead
+of starting over from `dotnet new sln`.
+
+Hashes are over file contents, so touching a file does not make a step stale, while editing,
+adding or deleting a file does. Directories are hashed recursively, leaving out build output
+(bin, obj) and StartDotNet's own files (.startdotnet).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+MANIFEST_VERSION = 1
+IGNORED_DIRECTORIES = {'bin', 'obj', '.startdotnet', '.vs', '.git'}
+
+
+def hash_file(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest
+
+
+def hash_path(path, ignored_directories=IGNORED_DIRECTORIES, ignored_files=()):
+    """
+    Returns a hash of a file's contents, or of the names and contents of every file below a
+    directory (skipping ignored_directories and ignored_files), or None if the path does not exist.
+    """
+    if os.path.isfile(path):
+        return hash_file(path).hexdigest()
+    if not os.path.isdir(path):
+        return None
+    digest = hashlib.sha256()
+    for root, dir_names, file_names in os.walk(path):
+        dir_names[:] = sorted(name for name in dir_names if name not in ignored_directories)
+        for file_name in sorted(file_names):
+            if file_name in ignored_files:
+                continue
+            file_path = os.path.join(root, file_name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, '/').encode() + b'\0')
+            hash_file(file_path, digest)
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class StepManifest:
+    """
+    The StepManifest class remembers which steps of a scaffold completed and what their files
+    looked like, so unchanged steps can be skipped on the next run.
+
+    Step files are given relative to base_directory, the solution directory.
+
+    Attributes:
+        path (str): The manifest file.
+        base_directory (str): The directory step paths are relative to.
+        steps (dict): The recorded steps, keyed by step name.
+
+    Methods:
+        load: Reads the manifest from disk; a missing or unreadable manifest is treated as empty.
+        is_up_to_date: Whether a step's recorded command and file hashes match the current ones.
+        record: Records a step as completed with the current hashes of its files.
+        forget: Removes a step, so it runs again next time.
+        save: Writes the manifest to disk atomically.
+    """
+
+    def __init__(self, path, base_directory):
+        self.path = path
+        self.base_directory = base_directory
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, base_directory):
+        manifest = cls(path, base_directory)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return manifest
+        if data.get('version') == MANIFEST_VERSION:
+            manifest.steps = data.get('steps', {})
+        return manifest
+
+    def hash_files(self, relative_paths):
+        return {relative_path: hash_path(os.path.join(self.base_directory, relative_path)) for relative_path in relative_paths}
+
+    def is_up_to_date(self, step_name, command, inputs=(), outputs=()):
+        with self._lock:
+            entry = self.steps.get(step_name)
+        if entry is None or entry.get('command') != command:
+            return False
+        if sorted(entry.get('inputs', {})) != sorted(inputs) or sorted(entry.get('outputs', {})) != sorted(outputs):
+            return False
+        current_outputs = self.hash_files(outputs)
+        if any(value is None for value in current_outputs.values()):
+            return False
+        return current_outputs == entry['outputs'] and self.hash_files(inputs) == entry['inputs']
+
+    def record(self, step_name, command, inputs=(), outputs=()):
+        entry = {
+            'command': command,
+            'inputs': self.hash_files(inputs),
+            'outputs': self.hash_files(outputs),
+            'completed': time.time(),
+        }
+        with self._lock:
+            self.steps[step_name] = entry
+
+    def forget(self, step_name):
+        with self._lock:
+            self.steps.pop(step_name, None)
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({'version': MANIFEST_VERSION, 'steps': self.steps}, indent=2, sort_keys=True)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(prefix='.manifest-', dir=directory)
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+                file.write(data)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
@@ -0,0 +1,134 @@
+"""
+Redundant-work planner for StartDotNet.
+
+Left alone, the .NET CLI repeats work: `dotnet build` restores NuGet packages, and `dotnet run`
+restores and builds the project again before starting it. plan_dotnet_steps takes the dotnet
+steps a scaffold wants to run and rewrites them so each piece of work happens once:
+
+    restore     One `dotnet restore` per restore target (the solution or project) is added.
+    build       Builds run with --no-restore after the restore step.
+    run, test   Run with --no-build when the same project (or a solution containing it) is built
+                earlier in the plan, or with --no-restore when it is not.
+
+The plan lists the work it removed, so a scaffold can report the restores and builds that were
+skipped by the steps that actually ran, and the time they would have taken going by how long the
+restore and build steps of the same run took.
+"""
+
+from command_line import dotnet
+
+# Verbs that restore (and, for run and test, build) the project unless told not to.
+RESTORING_VERBS = ('build', 'run', 'test', 'publish', 'pack')
+BUILDING_VERBS = ('run', 'test', 'publish', 'pack')
+
+
+class DotNetStep:
+    """
+    A dotnet CLI step in a form the planner can rewrite.
+
+    Attributes:
+        name (str): The step name, e.g. build.
+        verb (str): The dotnet command, e.g. build or run.
+        target (str): The project or solution the command works on.
+        depends_on (tuple): The names of the steps that must succeed first.
+        options (list): Extra command line options, e.g. --no-build.
+        covers (tuple): Other targets the step also works on, e.g. the projects of a solution it builds.
+    """
+
+    def __init__(self, name, verb, target, depends_on=(), options=None, covers=()):
+        self.name = name
+        self.verb = verb
+        self.target = target
+        self.depends_on = tuple(depends_on)
+        self.options = list(options or [])
+        self.covers = tuple(covers)
+
+    @property
+    def command(self):
+        target_option = ('--project',) if self.verb == 'run' else ()
+        return dotnet(self.verb, *target_option, self.target, *self.options)
+
+    def __repr__(self):
+        return f"DotNetStep({self.name!r}, {self.command!r})"
+
+
+class ExecutionPlan:
+    """
+    The rewritten steps and the work the rewrite removed.
+
+    Attributes:
+        steps (list): The DotNetSteps to run, in order.
+        eliminated (list): (step_name, work) pairs, e.g. ('run', 'build') for the build `dotnet run` no longer does.
+
+    Methods:
+        eliminated_by: Returns the work removed from the given steps.
+    """
+
+    def __init__(self, steps, eliminated=None):
+        self.steps = steps
+        self.eliminated = eliminated or []
+
+    def eliminated_by(self, step_names):
+        return [(step_name, work) for step_name, work in self.eliminated if step_name in step_names]
+
+
+def estimate_savings(eliminated, durations):
+    """
+    Returns the seconds the work in eliminated, a list of (step_name, work) pairs, would have
+    taken, from durations (measured seconds per step name, e.g. {'restore': 1.4, 'build': 3.2}).
+    Work that was not measured is left out; returns 0.0 when none of it was.
+    """
+    return sum(durations.get(work, 0.0) for _, work in eliminated)
+
+
+def describe_eliminated(eliminated, durations=None):
+    """
+    Returns a sentence counting the restores and builds in eliminated, a list of (step_name, work)
+    pairs, with the time they would have taken when durations measured it, or None when eliminated
+    is empty.
+    """
+    if not eliminated:
+        return None
+    counts = {}
+    for _, work in eliminated:
+        counts[work] = counts.get(work, 0) + 1
+    skipped = ' and '.join(f"{count} {work}{'s' if count > 1 else ''}" for work, count in sorted(counts.items(), reverse=True))
+    savings = estimate_savings(eliminated, durations or {})
+    if not savings:
+        return f"The planner skipped {skipped} that later steps would have repeated."
+    return f"The planner skipped {skipped} that later steps would have repeated, about {savings:.1f}s saved."
+
+
+def plan_dotnet_steps(steps, restore_target, restore_depends_on=(), restore_name='restore'):
+    """
+    Rewrites DotNetSteps so packages are restored once, before anything else, and each project
+    is built once. restore_target is restored by a new step that depends on restore_depends_on.
+    Returns an ExecutionPlan; the original steps are not modified.
+    """
+    planned = []
+    eliminated = []
+    built_targets = set()
+    restore_step = None
+    for step in steps:
+        step = DotNetStep(step.name, step.verb, step.target, step.depends_on, step.options, step.covers)
+        if step.verb in RESTORING_VERBS and '--no-restore' not in step.options and '--no-build' not in step.options:
+            if restore_step is None:
+                restore_step = DotNetStep(restore_name, 'restore', restore_target, restore_depends_on)
+                planned.append(restore_step)
+            if step.verb in BUILDING_VERBS and step.target in built_targets:
+                step.options.append('--no-build')
+                eliminated.extend([(step.name, 'restore'), (step.name, 'build')])
+            else:
+                step.options.append('--no-restore')
+                eliminated.append((step.name, 'restore'))
+            if restore_name not in step.depends_on:
+                step.depends_on += (restore_name,)
+        if step.verb == 'build':
+            built_targets.add(step.target)
+            built_targets.update(step.covers)
+        planned.append(step)
+
+    # The added restore replaces one of the restores that was removed.
+    if restore_step is not None:
+        eliminated.remove(next(item for item in eliminated if item[1] == 'restore'))
+    return ExecutionPlan(planned, eliminated)
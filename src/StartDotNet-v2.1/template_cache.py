@@ -0,0 +1,301 @@
+"""
+Template snapshot cache for StartDotNet.
+
+The first time a template is instantiated, `dotnet new` is run once with a placeholder project
+name and the generated tree is stored on disk, keyed by the template, the template options, the
+SDK version and a fingerprint of the installed template packs. Later scaffolds copy the stored
+tree, replace the placeholder with the real project name (file names, namespaces, assembly
+names) and give every generated GUID a fresh value, without starting the dotnet CLI at all.
+Snapshots are copied with file_clone, so on a file system with reflinks a copy shares the
+snapshot's data blocks instead of duplicating them.
+
+Entries are evicted least-recently-used first once the cache grows past its entry or size cap.
+Upgrading the SDK or installing/removing template packs changes the key, so stale snapshots are
+never reused and age out of the cache on their own.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from file_clone import WRITABLE_METHODS, clone_tree, move_tree
+
+PLACEHOLDER_NAME = 'StartDotNetPlaceholder'
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.startdotnet', 'template-cache')
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+GUID_PATTERN = re.compile(r'[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}')
+
+# Project type GUIDs identify the kind of project in a .sln file and must never be regenerated.
+WELL_KNOWN_GUIDS = {
+    'FAE04EC0-301F-11D3-BF4B-00C04F79EFBC',  # C# project
+    '9A19103F-16F7-4668-BE54-9A1E7A4F7556',  # SDK-style C# project
+    '2150E333-8FDC-42A3-9474-1A3956D46DE8',  # Solution folder
+    'F2A71F9B-5D33-465A-A702-920D77279786',  # F# project
+    '6EC3EE1D-3C4E-46DD-8F32-0CC8E7565705',  # SDK-style F# project
+    'F184B08F-C81C-45F6-A57F-5ABD9991F28F',  # VB.NET project
+    '778DAE3C-4631-46EA-AA77-85C1314464D9',  # SDK-style VB.NET project
+}
+
+
+def get_sdk_version():
+    """
+    Returns the version printed by `dotnet --version`, or None if the SDK cannot be found.
+    """
+    try:
+        completed_process = subprocess.run(['dotnet', '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return None
+    if completed_process.returncode != 0:
+        return None
+    return completed_process.stdout.decode().strip() or None
+
+
+def get_template_pack_directories():
+    """
+    Returns the directories whose contents change when template packs are installed or removed.
+    """
+    directories = [os.path.join(os.path.expanduser('~'), '.templateengine')]
+    dotnet_path = shutil.which('dotnet')
+    if dotnet_path:
+        directories.append(os.path.join(os.path.dirname(os.path.realpath(dotnet_path)), 'templates'))
+    return directories
+
+
+def get_template_pack_fingerprint(directories=None):
+    """
+    Hashes the names and modification times of the template pack directories and their children.
+    """
+    digest = hashlib.sha256()
+    for directory in directories or get_template_pack_directories():
+        if not os.path.isdir(directory):
+            continue
+        digest.update(directory.encode())
+        for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+            digest.update(f"{entry.name}:{entry.stat().st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def rename_tree(directory, placeholder, project_name):
+    """
+    Replaces the placeholder name in file names and text file contents below directory, and
+    gives every generated GUID a new value, keeping the same new value for repeated occurrences.
+    """
+    replacements = [(placeholder, project_name), (placeholder.lower(), project_name.lower())]
+    new_guids = {}
+
+    def replace_guid(match):
+        guid = match.group(0)
+        if guid.upper() in WELL_KNOWN_GUIDS:
+            return guid
+        key = guid.upper()
+        if key not in new_guids:
+            new_guids[key] = str(uuid.uuid4())
+        new_guid = new_guids[key]
+        return new_guid.upper() if guid.isupper() else new_guid
+
+    for root, dir_names, file_names in os.walk(directory, topdown=False):
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            try:
+                with open(path, 'r', encoding='utf-8', newline='') as file:
+                    content = file.read()
+            except UnicodeDecodeError:
+                content = None
+            if content is not None:
+                new_content = content
+                for old, new in replacements:
+                    new_content = new_content.replace(old, new)
+                new_content = GUID_PATTERN.sub(replace_guid, new_content)
+                if new_content != content:
+                    # Written to a new file and swapped in, so a read-only file is replaced
+                    # rather than opened for writing.
+                    new_path = os.path.join(root, f".{file_name}.renaming")
+                    with open(new_path, 'w', encoding='utf-8', newline='') as file:
+                        file.write(new_content)
+                    shutil.copymode(path, new_path)
+                    os.replace(new_path, path)
+            renamed = file_name
+            for old, new in replacements:
+                renamed = renamed.replace(old, new)
+            if renamed != file_name:
+                os.replace(path, os.path.join(root, renamed))
+        for dir_name in dir_names:
+            renamed = dir_name
+            for old, new in replacements:
+                renamed = renamed.replace(old, new)
+            if renamed != dir_name:
+                os.replace(os.path.join(root, dir_name), os.path.join(root, renamed))
+
+
+def get_tree_size(directory):
+    total = 0
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            total += os.path.getsize(os.path.join(root, file_name))
+    return total
+
+
+class TemplateCache:
+    """
+    The TemplateCache class stores the output of `dotnet new` per template and replays it for
+    later scaffolds.
+
+    Attributes:
+        cache_directory (str): Where snapshots are stored.
+        max_entries (int): The most snapshots kept before the least recently used are evicted.
+        max_bytes (int): The most bytes of snapshots kept before the least recently used are evicted.
+        sdk_version (str): The SDK version that is part of every key; None disables the cache.
+        pack_fingerprint (str): The template pack fingerprint that is part of every key.
+        hits (int): How many instantiations were served from the cache.
+        misses (int): How many instantiations had to run the dotnet CLI.
+
+    Methods:
+        cache_key: Returns the key for a template and its options.
+        lookup: Returns the snapshot directory for a key, or None.
+        store: Saves a generated tree as the snapshot for a template.
+        instantiate: Copies a template's snapshot to a directory under a new name, generating it first if needed.
+        evict: Removes least recently used snapshots until the cache fits its caps.
+        clear: Removes every snapshot.
+    """
+
+    def __init__(self, cache_directory=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 sdk_version=None, pack_fingerprint=None):
+        self.cache_directory = cache_directory or DEFAULT_CACHE_DIRECTORY
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sdk_version = sdk_version or get_sdk_version()
+        self.pack_fingerprint = pack_fingerprint or get_template_pack_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @property
+    def enabled(self):
+        return self.sdk_version is not None
+
+    def cache_key(self, template, options=None):
+        key_data = json.dumps({
+            'template': template,
+            'options': sorted((options or {}).items()),
+            'sdk_version': self.sdk_version,
+            'packs': self.pack_fingerprint,
+        }, sort_keys=True)
+        return hashlib.sha256(key_data.encode()).hexdigest()[:24]
+
+    def _entry_directory(self, key):
+        return os.path.join(self.cache_directory, key)
+
+    def lookup(self, key):
+        entry_directory = self._entry_directory(key)
+        metadata_path = os.path.join(entry_directory, 'entry.json')
+        if not os.path.isfile(metadata_path):
+            return None
+        os.utime(metadata_path)  # Mark as recently used for LRU eviction.
+        return entry_directory
+
+    def store(self, key, template, options, generated_directory):
+        os.makedirs(self.cache_directory, exist_ok=True)
+        staging_directory = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_directory)
+        move_tree(generated_directory, os.path.join(staging_directory, 'tree'))
+        metadata = {
+            'template': template,
+            'options': options or {},
+            'sdk_version': self.sdk_version,
+            'packs': self.pack_fingerprint,
+            'placeholder': PLACEHOLDER_NAME,
+            'size': get_tree_size(staging_directory),
+            'created': time.time(),
+        }
+        with open(os.path.join(staging_directory, 'entry.json'), 'w') as file:
+            json.dump(metadata, file, indent=2)
+        try:
+            os.rename(staging_directory, self._entry_directory(key))
+        except OSError:
+            # Another process stored the same snapshot first.
+            shutil.rmtree(staging_directory, ignore_errors=True)
+        self.evict(keep=key)
+        return self._entry_directory(key)
+
+    def instantiate(self, template, project_name, output_directory, generate, options=None):
+        """
+        Places the template's files in output_directory, named after project_name.
+
+        generate(placeholder_name, directory) is called on a cache miss to run `dotnet new` into
+        an empty directory and must return True on success. Returns 'hit' or 'miss' once the files
+        are in place, or None if generating the snapshot failed.
+        """
+        key = self.cache_key(template, options)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry_directory = self.lookup(key)
+            if entry_directory is None:
+                self.misses += 1
+                with tempfile.TemporaryDirectory(prefix='startdotnet-template-') as scratch_directory:
+                    generated_directory = os.path.join(scratch_directory, PLACEHOLDER_NAME)
+                    if not generate(PLACEHOLDER_NAME, generated_directory):
+                        return None
+                    entry_directory = self.store(key, template, options, generated_directory)
+                result = 'miss'
+            else:
+                self.hits += 1
+                result = 'hit'
+
+        # The snapshot is cloned next to the output directory, so that on the same file system
+        # the renamed tree can be moved into place instead of being copied a second time. Hardlinks
+        # are ruled out: rename_tree rewrites the files, which would write through to the snapshot.
+        parent_directory = os.path.dirname(os.path.abspath(output_directory))
+        os.makedirs(parent_directory, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix='.startdotnet-template-', dir=parent_directory) as scratch_directory:
+            tree_directory = os.path.join(scratch_directory, 'tree')
+            clone_tree(os.path.join(entry_directory, 'tree'), tree_directory, WRITABLE_METHODS)
+            rename_tree(tree_directory, PLACEHOLDER_NAME, project_name)
+            if os.path.exists(output_directory):
+                clone_tree(tree_directory, output_directory, WRITABLE_METHODS, dirs_exist_ok=True)
+            else:
+                os.rename(tree_directory, output_directory)
+        return result
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_directory):
+            return entries
+        for entry in os.scandir(self.cache_directory):
+            metadata_path = os.path.join(entry.path, 'entry.json')
+            if entry.name.startswith('.') or not os.path.isfile(metadata_path):
+                continue
+            try:
+                with open(metadata_path) as file:
+                    size = json.load(file).get('size', 0)
+            except (OSError, ValueError):
+                size = 0
+            entries.append((os.path.getmtime(metadata_path), size, entry.path))
+        return entries
+
+    def evict(self, keep=None):
+        with self._lock:
+            entries = sorted(self._entries())
+            entry_count = len(entries)
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if entry_count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                if os.path.basename(path) == keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                entry_count -= 1
+                total_bytes -= size
+
+    def clear(self):
+        shutil.rmtree(self.cache_directory, ignore_errors=True)